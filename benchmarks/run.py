@@ -0,0 +1,206 @@
+import argparse
+import json
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence
+
+from path import Path
+
+from src.config_loaders import HugoConfigLoader
+from src.post_codecs import HugoPostCodec, IPostCodec
+from src.utils.parsers import PARSER_BACKENDS
+
+from .sites import FRONTMATTER_FORMATS, SyntheticSite, generate_hugo_site
+
+
+class BenchmarkResult(NamedTuple):
+    operations: int
+    seconds: float
+    throughput: float
+    peak_memory: int
+
+
+def _measure(
+    function: Callable[[], Any], operations: int, repeat: int
+) -> BenchmarkResult:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+
+    # Tracing slows the code down, so memory is measured in a separate run
+    tracemalloc.start()
+    try:
+        function()
+        _, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    seconds = min(timings)
+
+    return BenchmarkResult(
+        operations=operations,
+        seconds=seconds,
+        throughput=operations / seconds if seconds else float("inf"),
+        peak_memory=peak_memory,
+    )
+
+
+def _benchmarks(
+    site: SyntheticSite, codec: IPostCodec, outdir: Path, parser_backend: str
+) -> Dict[str, Callable[[], Any]]:
+    posts = [codec.load(filepath) for filepath in site.posts]
+    dumped_posts = [
+        post.copy(update={"filepath": outdir / post.filepath.name}) for post in posts
+    ]
+
+    return {
+        "PostCodec.load": lambda: [codec.load(filepath) for filepath in site.posts],
+        "PostCodec.dump": lambda: [codec.dump(post) for post in dumped_posts],
+        "PostCodec.dump_many": lambda: codec.dump_many(dumped_posts),
+        "PostCodec.dump_app_data": lambda: [codec.dump_app_data(post) for post in posts],
+        "PostCodec.is_publishable": lambda: [
+            codec.is_publishable(filepath) for filepath in site.posts
+        ],
+        "HugoConfigLoader.load": lambda: HugoConfigLoader(
+            site.workdir, parser_backend=parser_backend
+        ).load(),
+    }
+
+
+def run_benchmarks(
+    posts: int = 1000,
+    paragraphs: int = 20,
+    frontmatter_formats: Sequence[str] = FRONTMATTER_FORMATS,
+    split_config: bool = True,
+    repeat: int = 3,
+    only: Optional[Sequence[str]] = None,
+    parser_backend: str = "fast",
+) -> Dict[str, Any]:
+    with tempfile.TemporaryDirectory() as tmpdir:
+        site = generate_hugo_site(
+            Path(tmpdir) / "site",
+            posts=posts,
+            paragraphs=paragraphs,
+            frontmatter_formats=frontmatter_formats,
+            split_config=split_config,
+        )
+        codec = HugoPostCodec(
+            site.postsdir,
+            ignore_globs=["drafts/**", "!drafts/keep-*"],
+            parser_backend=parser_backend,
+        )
+        outdir = (Path(tmpdir) / "out").mkdir()
+
+        results = dict()
+        benchmarks = _benchmarks(site, codec, outdir, parser_backend)
+        for name, function in benchmarks.items():
+            if only and name not in only:
+                continue
+            operations = 1 if name == "HugoConfigLoader.load" else posts
+            results[name] = _measure(function, operations, repeat)._asdict()
+
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "posts": posts,
+            "paragraphs": paragraphs,
+            "frontmatter_formats": list(frontmatter_formats),
+            "split_config": split_config,
+            "repeat": repeat,
+            "parser_backend": parser_backend,
+        },
+        "results": results,
+    }
+
+
+def find_regressions(
+    report: Dict[str, Any], baseline: Dict[str, Any], threshold: float = 0.1
+) -> List[str]:
+    regressions = []
+    for name, result in report["results"].items():
+        if (baseline_result := baseline["results"].get(name)) is None:
+            continue
+
+        slowdown = 1 - result["throughput"] / baseline_result["throughput"]
+        if slowdown > threshold:
+            regressions.append(
+                f"{name}: {result['throughput']:.1f} ops/s, "
+                f"{slowdown:.0%} slower than the baseline "
+                f"({baseline_result['throughput']:.1f} ops/s)"
+            )
+
+    return regressions
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Benchmark the codecs and config loaders."
+    )
+    parser.add_argument("--posts", type=int, default=1000)
+    parser.add_argument("--paragraphs", type=int, default=20)
+    parser.add_argument(
+        "--formats",
+        nargs="+",
+        choices=FRONTMATTER_FORMATS,
+        default=FRONTMATTER_FORMATS,
+        help="Frontmatter formats, used in turn by the generated posts.",
+    )
+    parser.add_argument("--single-config", action="store_true")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--only", nargs="+", help="Benchmarks to run.")
+    parser.add_argument(
+        "--parsers",
+        choices=list(PARSER_BACKENDS),
+        default="fast",
+        help="Parsers of the frontmatters and config files.",
+    )
+    parser.add_argument("--output", type=Path, help="Save the results as JSON.")
+    parser.add_argument("--baseline", type=Path, help="Compare with saved results.")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="Throughput loss over which a benchmark is a regression.",
+    )
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(
+        posts=args.posts,
+        paragraphs=args.paragraphs,
+        frontmatter_formats=args.formats,
+        split_config=not args.single_config,
+        repeat=args.repeat,
+        only=args.only,
+        parser_backend=args.parsers,
+    )
+
+    for name, result in report["results"].items():
+        print(
+            f"{name:<28} {result['throughput']:>12.1f} ops/s"
+            f" {result['seconds']:>10.4f} s"
+            f" {result['peak_memory'] / 2 ** 20:>10.2f} MiB"
+        )
+
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=4))
+
+    if args.baseline:
+        regressions = find_regressions(
+            report, json.loads(args.baseline.read_text()), args.threshold
+        )
+        for regression in regressions:
+            print(f"Regression: {regression}", file=sys.stderr)
+        if regressions:
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
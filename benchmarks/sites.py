@@ -0,0 +1,100 @@
+import json
+import random
+from typing import Any, Dict, List, NamedTuple, Sequence
+
+import toml
+import yaml
+from path import Path
+
+FRONTMATTER_FORMATS = ["yaml", "toml", "json"]
+
+WORDS = (
+    "lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor "
+    "incididunt ut labore et dolore magna aliqua"
+).split()
+
+
+class SyntheticSite(NamedTuple):
+    workdir: Path
+    postsdir: Path
+    posts: List[Path]
+
+
+def _frontmatter(metadata: Dict[str, Any], frontmatter_format: str) -> str:
+    if frontmatter_format == "yaml":
+        return f"---\n{yaml.safe_dump(metadata)}---\n"
+    elif frontmatter_format == "toml":
+        return f"+++\n{toml.dumps(metadata)}+++\n"
+    elif frontmatter_format == "json":
+        return json.dumps(metadata, indent=4) + "\n"
+    else:
+        raise ValueError(f"Unknown frontmatter format '{frontmatter_format}'.")
+
+
+def _body(rng: random.Random, paragraphs: int) -> str:
+    blocks = ["# " + " ".join(rng.choices(WORDS, k=4)).title()]
+    for i in range(paragraphs):
+        if i % 5 == 4:
+            blocks.append("\n".join(f"* {rng.choice(WORDS)}" for _ in range(3)))
+        else:
+            words = rng.choices(WORDS, k=60)
+            words[3] = f"*{words[3]}*"
+            words[7] = f"[{words[7]}](https://example.com/{words[8]})"
+            blocks.append(" ".join(words))
+
+    return "\n\n".join(blocks) + "\n"
+
+
+def _write_config(workdir: Path, rng: random.Random, split_config: bool) -> None:
+    params = {f"param_{i}": " ".join(rng.choices(WORDS, k=5)) for i in range(50)}
+    menus = {"main": [{"name": word, "url": f"/{word}/"} for word in WORDS[:10]]}
+    config = {"baseURL": "https://example.com/", "title": "Benchmark"}
+
+    if split_config:
+        configdir = (workdir / "config/_default").makedirs_p()
+        (configdir / "config.toml").write_text(toml.dumps(config))
+        (configdir / "params.yaml").write_text(yaml.safe_dump(params))
+        (configdir / "menus.json").write_text(json.dumps(menus))
+        for environment in ["production", "staging"]:
+            (workdir / "config" / environment).makedirs_p()
+            (workdir / "config" / environment / "config.toml").write_text(
+                f'baseURL = "https://{environment}.example.com/"'
+            )
+    else:
+        (workdir / "config.toml").write_text(
+            toml.dumps(dict(config, params=params, menus=menus))
+        )
+
+
+def generate_hugo_site(
+    workdir: Path,
+    posts: int = 1000,
+    paragraphs: int = 20,
+    frontmatter_formats: Sequence[str] = FRONTMATTER_FORMATS,
+    split_config: bool = True,
+    seed: int = 0,
+) -> SyntheticSite:
+    rng = random.Random(seed)
+    workdir = Path(workdir)
+    postsdir = (workdir / "content").makedirs_p()
+    _write_config(workdir, rng, split_config)
+
+    filepaths = []
+    for i in range(posts):
+        # A few sections, to exercise the directory walk and the ignore globs
+        section = ("posts", "drafts", "notes")[i % 3]
+        filepath = (postsdir / section).makedirs_p() / f"post-{i:06d}.md"
+        metadata = {
+            "title": " ".join(rng.choices(WORDS, k=6)).capitalize(),
+            "is_draft": section == "drafts",
+            "tags": sorted(set(rng.choices(WORDS, k=3))),
+            "categories": [rng.choice(WORDS[:4])],
+        }
+        frontmatter_format = frontmatter_formats[i % len(frontmatter_formats)]
+        filepath.write_text(
+            _frontmatter(metadata, frontmatter_format) + _body(rng, paragraphs),
+            encoding="utf-8",
+        )
+        filepaths.append(filepath)
+
+    return SyntheticSite(workdir=workdir, postsdir=postsdir, posts=filepaths)
@@ -1,18 +1,39 @@
-import json
 from abc import ABC, abstractmethod
-from typing import Any, Dict, Final
+from concurrent.futures import ThreadPoolExecutor
+from copy import deepcopy
+from typing import Any, Dict, Final, Iterable, List, Mapping, NamedTuple, Optional, Tuple
 
-import toml
-import yaml
 from path import Path
 
-from .utils.misc import list_to_nested_dicts, merge_nested_dicts
+from .instrumentation import Recorder, stage
+from .utils.misc import (
+    freeze_nested,
+    get_nested_value,
+    list_to_nested_dicts,
+    merge_nested_dicts,
+)
+from .utils.parsers import get_parsers
+
+# A file is parsed again only when its (mtime, size) changes
+_FileSignature = Tuple[int, int]
+
+_MISSING = object()
+
+
+class MergePlanEntry(NamedTuple):
+    file: Path
+    # Where the content of the file is merged in the config
+    prefix: Tuple[str, ...]
 
 
 class IConfigLoader(ABC):
     def __init__(self, workdir: Path):
         self._workdir: Final = workdir
 
+    @property
+    def workdir(self) -> Path:
+        return self._workdir
+
     @abstractmethod
     def load(self) -> Dict[str, Any]:
         ...
@@ -20,41 +41,192 @@ class IConfigLoader(ABC):
 
 class HugoConfigLoader(IConfigLoader):
     FILE_EXTS = [".toml", ".yaml", ".yml", ".json"]
+    DEFAULT_ENVIRONMENT = "_default"
+
+    def __init__(
+        self,
+        workdir: Path,
+        max_workers: Optional[int] = None,
+        environment: Optional[str] = None,
+        parser_backend: str = "fast",
+        recorder: Optional[Recorder] = None,
+    ):
+        super().__init__(workdir)
+        self.max_workers = max_workers
+        self.environment = environment
+        self.parsers = get_parsers(parser_backend)
+        self.recorder = recorder
+
+        self._fragments: Dict[Path, Tuple[_FileSignature, Dict[Any, Any]]] = dict()
+        self._snapshot: Optional[Tuple[Tuple[Any, ...], Mapping[Any, Any]]] = None
 
     def _load_file(self, file: Path) -> Dict[Any, Any]:
-        if file.ext in [
-            ".toml",
-        ]:
-            content = dict(toml.loads(file.read_text()))
-        elif file.ext in [".yaml", ".yml"]:
-            content = yaml.safe_load(file.read_text()) or dict()
-        elif file.ext in [
-            ".json",
-        ]:
-            content = dict(json.loads(file.read_text()))
+        with stage(self.recorder, "config.parse", file) as parse_stage:
+            text = file.read_text()
+            parse_stage.add_text(text)
+
+            if file.ext in [
+                ".toml",
+            ]:
+                content = dict(self.parsers.load_toml(text))
+            elif file.ext in [".yaml", ".yml"]:
+                content = self.parsers.load_yaml(text) or dict()
+            elif file.ext in [
+                ".json",
+            ]:
+                content = dict(self.parsers.load_json(text))
 
         return content
 
-    def load(self) -> Dict[Any, Any]:
+    def _load_fragment(self, entry: MergePlanEntry) -> Dict[Any, Any]:
+        if entry.prefix:
+            return list_to_nested_dicts(entry.prefix, self._load_file(entry.file))
+        else:
+            return self._load_file(entry.file)
+
+    def _find_files(self, configdir: Path) -> List[Path]:
+        # The files of a directory, then its subdirectories, both by name
+        return sorted(
+            (file for file in configdir.walkfiles() if file.ext in self.FILE_EXTS),
+            key=lambda file: [
+                (True, dirname) for dirname in file.relpath(configdir).splitall()[1:-1]
+            ]
+            + [(False, file.name)],
+        )
+
+    def merge_plan(self) -> List[MergePlanEntry]:
         # Search One Config File
         for ext in self.FILE_EXTS:
             if (file := self._workdir.joinpath(f"config{ext}")).exists():
-                return self._load_file(file)
+                return [MergePlanEntry(file, ())]
+
+        # Recursive Search, with Hugo's environments when config/_default exists
+        configdir = self._workdir.joinpath("config")
+        configdirs = [configdir]
+        if (default_configdir := configdir / self.DEFAULT_ENVIRONMENT).isdir():
+            configdirs = [default_configdir]
+            if self.environment and (configdir / self.environment).isdir():
+                configdirs.append(configdir / self.environment)
+
+        return [
+            MergePlanEntry(
+                file, tuple(file.stem.split(".")) if file.stem != "config" else ()
+            )
+            for configdir in configdirs
+            for file in self._find_files(configdir)
+        ]
+
+    def _load_fragments(
+        self, plan: List[MergePlanEntry]
+    ) -> List[Tuple[MergePlanEntry, _FileSignature, Dict[Any, Any]]]:
+        signatures = dict()
+        for entry in plan:
+            stat = entry.file.stat()
+            signatures[entry.file] = (stat.st_mtime_ns, stat.st_size)
+
+        outdated_entries = [
+            entry
+            for entry in plan
+            if entry.file not in self._fragments
+            or self._fragments[entry.file][0] != signatures[entry.file]
+        ]
+        if len(outdated_entries) > 1:
+            with ThreadPoolExecutor(self.max_workers) as executor:
+                parsed_fragments = list(
+                    executor.map(self._load_fragment, outdated_entries)
+                )
         else:
-            # Recursive Search
-            config: Dict[Any, Any] = dict()
-            for file in self._workdir.joinpath("config").walkfiles():
-                if file.ext in self.FILE_EXTS:
-                    if file.stem == "config":
-                        file_config = self._load_file(file)
-                    else:
-                        file_config = list_to_nested_dicts(
-                            file.stem.split("."), self._load_file(file),
-                        )
-
-                    merge_nested_dicts(config, file_config)
-
-        if config:
+            parsed_fragments = [self._load_fragment(entry) for entry in outdated_entries]
+
+        for entry, fragment in zip(outdated_entries, parsed_fragments):
+            self._fragments[entry.file] = (signatures[entry.file], fragment)
+
+        return [
+            (entry, signatures[entry.file], self._fragments[entry.file][1])
+            for entry in plan
+        ]
+
+    def _forget_removed_files(self, plan: List[MergePlanEntry]) -> None:
+        for file in self._fragments.keys() - {entry.file for entry in plan}:
+            del self._fragments[file]
+
+    def _merge(self, fragments: Iterable[Dict[Any, Any]]) -> Dict[Any, Any]:
+        config: Dict[Any, Any] = dict()
+        with stage(self.recorder, "config.merge", self._workdir):
+            for fragment in fragments:
+                # The memoized fragments must not be changed by the merge
+                merge_nested_dicts(config, deepcopy(fragment))
+
+        return config
+
+    def _load_plan(
+        self,
+    ) -> Tuple[
+        List[MergePlanEntry],
+        List[Tuple[MergePlanEntry, _FileSignature, Dict[Any, Any]]],
+        Tuple[Any, ...],
+    ]:
+        plan = self.merge_plan()
+        self._forget_removed_files(plan)
+        fragments = self._load_fragments(plan)
+        # Identifies the merged config, without merging it
+        key = tuple((entry.file, signature) for entry, signature, _ in fragments)
+
+        return plan, fragments, key
+
+    def _merge_config(
+        self,
+        plan: List[MergePlanEntry],
+        fragments: List[Tuple[MergePlanEntry, _FileSignature, Dict[Any, Any]]],
+    ) -> Dict[Any, Any]:
+        config = self._merge(fragment for _, _, fragment in fragments)
+        # An empty config is only valid when it comes from One Config File
+        if config or (len(plan) == 1 and plan[0].file.parent == self._workdir):
             return config
         else:
             raise FileNotFoundError(f"No Hugo Configuration Found in {self._workdir}")
+
+    def load(self) -> Dict[Any, Any]:
+        plan, fragments, _ = self._load_plan()
+
+        return self._merge_config(plan, fragments)
+
+    def snapshot(self) -> Mapping[Any, Any]:
+        plan, fragments, key = self._load_plan()
+
+        # Merged and frozen again only when a file changed
+        if self._snapshot is None or self._snapshot[0] != key:
+            self._snapshot = (key, freeze_nested(self._merge_config(plan, fragments)))
+
+        return self._snapshot[1]
+
+    def _contributing_fragments(
+        self, keys: Tuple[str, ...]
+    ) -> List[Tuple[MergePlanEntry, _FileSignature, Dict[Any, Any]]]:
+        # Only the files merged above or below the key are parsed
+        return self._load_fragments(
+            [
+                entry
+                for entry in self.merge_plan()
+                if entry.prefix[: len(keys)] == keys[: len(entry.prefix)]
+            ]
+        )
+
+    def get(self, key: str, default: Any = None) -> Any:
+        keys = tuple(key.split("."))
+        config = self._merge(
+            fragment for _, _, fragment in self._contributing_fragments(keys)
+        )
+
+        value = get_nested_value(config, keys, _MISSING)
+        return default if value is _MISSING else value
+
+    def origin(self, key: str) -> Optional[Path]:
+        keys = tuple(key.split("."))
+
+        origin = None
+        for entry, _, fragment in self._contributing_fragments(keys):
+            if get_nested_value(fragment, keys, _MISSING) is not _MISSING:
+                origin = entry.file
+
+        return origin
@@ -0,0 +1,172 @@
+import json
+import threading
+import time
+from typing import Any, Dict, Hashable, List, NamedTuple, Optional, Union
+
+
+class StageRecord(NamedTuple):
+    stage: str
+    # What the stage processed, like the filepath of a post
+    key: Optional[Hashable]
+    seconds: float
+    nbytes: int
+    failed: bool
+
+
+class StageStats(NamedTuple):
+    calls: int
+    seconds: float
+    nbytes: int
+    errors: int
+
+
+class _Stage:
+    __slots__ = ("recorder", "name", "key", "nbytes", "_start")
+
+    def __init__(self, recorder: "Recorder", name: str, key: Optional[Hashable]):
+        self.recorder = recorder
+        self.name = name
+        self.key = key
+        self.nbytes = 0
+
+    def __enter__(self) -> "_Stage":
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type: Any, *_: Any) -> None:
+        seconds = time.perf_counter() - self._start
+        self.recorder.add(
+            StageRecord(self.name, self.key, seconds, self.nbytes, exc_type is not None)
+        )
+
+    def add_text(self, text: str) -> None:
+        self.nbytes += len(text.encode("utf-8"))
+
+
+class _NullStage:
+    __slots__ = ()
+
+    def __enter__(self) -> "_NullStage":
+        return self
+
+    def __exit__(self, *_: Any) -> None:
+        pass
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        pass
+
+    def add_text(self, text: str) -> None:
+        pass
+
+
+_NULL_STAGE = _NullStage()
+
+
+class Recorder:
+    def __init__(self, keep_records: bool = True):
+        self.keep_records = keep_records
+
+        self._lock = threading.Lock()
+        self._records: List[StageRecord] = list()
+        self._stats: Dict[str, StageStats] = dict()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        del state["_lock"]
+
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def stage(self, name: str, key: Optional[Hashable] = None) -> _Stage:
+        return _Stage(self, name, key)
+
+    def add(self, record: StageRecord) -> None:
+        with self._lock:
+            if self.keep_records:
+                self._records.append(record)
+
+            stats = self._stats.get(record.stage, StageStats(0, 0.0, 0, 0))
+            self._stats[record.stage] = StageStats(
+                stats.calls + 1,
+                stats.seconds + record.seconds,
+                stats.nbytes + record.nbytes,
+                stats.errors + record.failed,
+            )
+
+    def drain(self) -> List[StageRecord]:
+        with self._lock:
+            records, self._records = self._records, list()
+            self._stats.clear()
+
+        return records
+
+    def clear(self) -> None:
+        self.drain()
+
+    @property
+    def records(self) -> List[StageRecord]:
+        with self._lock:
+            return list(self._records)
+
+    @property
+    def stats(self) -> Dict[str, StageStats]:
+        with self._lock:
+            return dict(self._stats)
+
+    def by_key(self) -> Dict[Hashable, Dict[str, StageStats]]:
+        by_key: Dict[Hashable, Dict[str, StageStats]] = dict()
+        for record in self.records:
+            key_stats = by_key.setdefault(record.key, dict())
+            stats = key_stats.get(record.stage, StageStats(0, 0.0, 0, 0))
+            key_stats[record.stage] = StageStats(
+                stats.calls + 1,
+                stats.seconds + record.seconds,
+                stats.nbytes + record.nbytes,
+                stats.errors + record.failed,
+            )
+
+        return by_key
+
+    def to_json(self, **kwargs: Any) -> str:
+        report: Dict[str, Any] = {
+            "stages": {name: stats._asdict() for name, stats in self.stats.items()}
+        }
+        if self.keep_records:
+            report["records"] = [
+                dict(record._asdict(), key=str(record.key) if record.key else None)
+                for record in self.records
+            ]
+
+        return json.dumps(report, **kwargs)
+
+    def to_prometheus(self, prefix: str = "post_publisher") -> str:
+        metrics = [
+            ("stage_calls_total", "Number of runs of the stage.", "calls"),
+            ("stage_seconds_total", "Time spent in the stage.", "seconds"),
+            ("stage_bytes_total", "Bytes processed by the stage.", "nbytes"),
+            ("stage_errors_total", "Number of failed runs of the stage.", "errors"),
+        ]
+        stats = self.stats
+
+        lines = []
+        for metric, description, field in metrics:
+            lines.append(f"# HELP {prefix}_{metric} {description}")
+            lines.append(f"# TYPE {prefix}_{metric} counter")
+            for name in sorted(stats):
+                value = getattr(stats[name], field)
+                lines.append(f'{prefix}_{metric}{{stage="{name}"}} {value}')
+
+        return "\n".join(lines) + "\n"
+
+
+def stage(
+    recorder: Optional[Recorder], name: str, key: Optional[Hashable] = None
+) -> Union[_Stage, _NullStage]:
+    # Without a recorder, the stages share a context manager that does nothing
+    if recorder is None:
+        return _NULL_STAGE
+
+    return recorder.stage(name, key)
@@ -0,0 +1,126 @@
+import os
+import sqlite3
+import threading
+import zlib
+from typing import Any, Dict, Final, Optional, Tuple
+
+from path import Path
+
+
+class PostCache:
+    def __init__(self, filepath: Path, max_entries: int = 50_000):
+        self.filepath: Final = Path(filepath)
+        self.max_entries: Final = max_entries
+
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._connection: Optional[sqlite3.Connection] = None
+        self._connection_pid: Optional[int] = None
+        self._size = 0
+        self._clock = 0
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        del state["_lock"]
+        state["_connection"] = state["_connection_pid"] = None
+
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connect().execute("SELECT COUNT(*) FROM posts").fetchone()[0]
+
+    def _connect(self) -> sqlite3.Connection:
+        # A connection inherited from a forked parent must not be reused
+        if self._connection is None or self._connection_pid != os.getpid():
+            self._connection = sqlite3.connect(
+                self.filepath, isolation_level=None, check_same_thread=False, timeout=30
+            )
+            self._connection_pid = os.getpid()
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS posts "
+                "(key TEXT PRIMARY KEY, value BLOB NOT NULL, last_used INTEGER NOT NULL)"
+            )
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS posts_last_used ON posts (last_used)"
+            )
+            self._size, self._clock = self._connection.execute(
+                "SELECT COUNT(*), COALESCE(MAX(last_used), 0) FROM posts"
+            ).fetchone()
+
+        return self._connection
+
+    def _tick(self) -> int:
+        self._clock += 1
+
+        return self._clock
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            connection = self._connect()
+            row = connection.execute(
+                "SELECT value FROM posts WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+
+            connection.execute(
+                "UPDATE posts SET last_used = ? WHERE key = ?", (self._tick(), key)
+            )
+            self.hits += 1
+
+        return zlib.decompress(row[0]).decode("utf-8")
+
+    def set(self, key: str, value: str) -> None:
+        with self._lock:
+            connection = self._connect()
+            inserted = connection.execute(
+                "INSERT OR IGNORE INTO posts (key, value, last_used) VALUES (?, ?, ?)",
+                (key, zlib.compress(value.encode("utf-8")), self._tick()),
+            ).rowcount
+            self._size += inserted
+
+            # Evict the least recently used entries
+            if self._size > self.max_entries:
+                connection.execute(
+                    "DELETE FROM posts WHERE key IN "
+                    "(SELECT key FROM posts ORDER BY last_used LIMIT ?)",
+                    (self._size - self.max_entries,),
+                )
+                self._size = connection.execute("SELECT COUNT(*) FROM posts").fetchone()[
+                    0
+                ]
+
+    def drain_counts(self) -> Tuple[int, int]:
+        with self._lock:
+            counts = (self.hits, self.misses)
+            self.hits = self.misses = 0
+
+        return counts
+
+    def add_counts(self, hits: int, misses: int) -> None:
+        # Counts of the copies of the cache used by other processes
+        with self._lock:
+            self.hits += hits
+            self.misses += misses
+
+    def clear(self) -> None:
+        with self._lock:
+            self._connect().execute("DELETE FROM posts")
+            self._size = 0
+            self.hits = self.misses = 0
+
+    def close(self) -> None:
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = self._connection_pid = None
@@ -1,20 +1,59 @@
+import hashlib
 import json
+import os
 import re
-from abc import ABC, abstractmethod
+import struct
+from abc import ABC
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
 from enum import Enum, unique
-from glob import glob
+from functools import partial
 from json.decoder import JSONDecodeError
-from typing import Any, ClassVar, Dict, FrozenSet, List, Optional
+from typing import (
+    Any,
+    Callable,
+    ClassVar,
+    Dict,
+    FrozenSet,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Type,
+    Union,
+)
 from uuid import UUID, uuid4
 
 import frontmatter
-from markdown import markdown
 from markdownify import markdownify
 from path import Path
-from pydantic import BaseModel, Field, HttpUrl
+from pydantic import BaseModel, Field, HttpUrl, PrivateAttr, ValidationError
 from toml.decoder import TomlDecodeError
 from yaml.scanner import ScannerError
 
+from .instrumentation import Recorder, StageRecord, stage
+from .post_cache import PostCache
+from .renderers import MarkdownRenderer
+from .utils.content_diff import ContentBlocks, ContentPatch, diff_blocks, index_blocks
+from .utils.frontmatter_blocks import (
+    find_frontmatter,
+    load_metadata,
+    parse_frontmatter_bytes,
+    read_frontmatter,
+    set_metadata_entry,
+)
+from .utils.field_maps import MetadataField, compile_field_map
+from .utils.globs import IgnoreMatcher
+from .utils.misc import atomic_write_bytes, atomic_write_many
+from .utils.parsers import get_parsers
+from .utils.trusted_models import (
+    Model,
+    construct_exact,
+    construct_trusted,
+    validate_values,
+)
 
 
 class PostDecodeError(ValueError):
@@ -52,8 +91,122 @@ class Post(BaseModel):
 
     is_draft: bool
 
+    # Renders the content on first access, when it has been deferred
+    _content_loader: Optional[Callable[[], str]] = PrivateAttr(default=None)
+    _content_fingerprint: Optional[Tuple[str, bytes]] = PrivateAttr(default=None)
+    _content_blocks: Optional[Tuple[str, ContentBlocks]] = PrivateAttr(default=None)
+    # The Markdown the content was rendered from, and the rendered content
+    _markdown_source: Optional[str] = PrivateAttr(default=None)
+    _rendered_content: Optional[str] = PrivateAttr(default=None)
+
+    def defer_content(self, content_loader: Callable[[], str]) -> None:
+        self.__dict__.pop("content", None)
+        self._content_loader = content_loader
+        self._markdown_source = self._rendered_content = None
+
+    def set_markdown_source(
+        self, markdown_source: str, rendered_content: Optional[str] = None
+    ) -> None:
+        # Without rendered content, the deferred content is rendered from the source
+        self._markdown_source = markdown_source
+        self._rendered_content = rendered_content
+
+    @property
+    def is_content_loaded(self) -> bool:
+        return "content" in self.__dict__
+
+    def _load_content(self) -> None:
+        # Read once, another thread may load the content meanwhile
+        content_loader = self._content_loader
+        if not self.is_content_loaded and content_loader is not None:
+            content = self.__dict__["content"] = content_loader()
+            self._content_loader = None
+            if self._markdown_source is not None and self._rendered_content is None:
+                self._rendered_content = content
+
+    @property
+    def markdown_source(self) -> Optional[str]:
+        # Loading the content may set the source
+        if self._markdown_source is None:
+            self._load_content()
+
+        # The source is only valid while the content is still the rendered one
+        if self.is_content_loaded and self.content != self._rendered_content:
+            return None
+
+        return self._markdown_source
+
+    def __getattr__(self, name: str) -> Any:
+        if name == "content":
+            self._load_content()
+            if self.is_content_loaded:
+                return self.__dict__["content"]
+
+        raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+
+    # pydantic reads the fields from __dict__
+    def __iter__(self) -> Any:
+        self._load_content()
+        return super().__iter__()
+
+    def _iter(self, *args: Any, **kwargs: Any) -> Any:
+        self._load_content()
+        return super()._iter(*args, **kwargs)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        self._load_content()
+        return super().__getstate__()
+
+    def __repr_args__(self) -> Any:
+        self._load_content()
+        return super().__repr_args__()
+
+    @property
+    def content_fingerprint(self) -> bytes:
+        # Computed once per content object, whichever way the content was replaced
+        content = self.content
+        cached_fingerprint = self._content_fingerprint
+        if cached_fingerprint is None or cached_fingerprint[0] is not content:
+            # Whitespace is not significant in the rendered HTML
+            fingerprint = hashlib.blake2b(
+                re.sub(r"\s+", "", content).encode("utf-8"), digest_size=16
+            ).digest()
+            cached_fingerprint = self._content_fingerprint = (content, fingerprint)
+
+        return cached_fingerprint[1]
+
+    @property
+    def content_blocks(self) -> ContentBlocks:
+        # Split once per content object, like the fingerprint
+        content = self.content
+        cached_blocks = self._content_blocks
+        if cached_blocks is None or cached_blocks[0] is not content:
+            cached_blocks = self._content_blocks = (content, index_blocks(content))
+
+        return cached_blocks[1]
+
+    def _identity(self) -> Tuple[Any, ...]:
+        # A post without app data gets a new ID on each load, the ID is left out
+        post_publisher = self.post_publisher
+        post_publisher_id = (
+            post_publisher.id if "id" in post_publisher.__fields_set__ else None
+        )
+
+        return (
+            self.filepath,
+            post_publisher_id,
+            self.title,
+            self.canonical_url,
+            self.tags,
+            self.categories,
+            self.is_draft,
+            self.content_fingerprint,
+        )
+
     def __eq__(self, other: Any) -> bool:
-        if isinstance(other, BaseModel):
+        if isinstance(other, Post):
+            return self._identity() == other._identity()
+        elif isinstance(other, BaseModel):
             self_dict, other_dict = self.dict(), other.dict()
             self_content = re.sub(r"\s+", "", self_dict.pop("content"))
             other_content = re.sub(r"\s+", "", other_dict.pop("content"))
@@ -62,21 +215,383 @@ class Post(BaseModel):
         else:
             return self.dict() == other
 
+    # Posts are mutable, a post must not be changed while it is in a set or a dict
+    def __hash__(self) -> int:
+        return hash(self._identity())
+
+
+class PostsDiff(NamedTuple):
+    added: List[Post]
+    removed: List[Post]
+    changed: List[Post]
+
+
+def diff_posts(old_posts: Iterable[Post], new_posts: Iterable[Post]) -> PostsDiff:
+    old_posts_by_path = {post.filepath: post for post in old_posts}
+
+    diff = PostsDiff(added=list(), removed=list(), changed=list())
+    for new_post in new_posts:
+        old_post = old_posts_by_path.pop(new_post.filepath, None)
+        if old_post is None:
+            diff.added.append(new_post)
+        elif old_post != new_post:
+            diff.changed.append(new_post)
+    diff.removed.extend(old_posts_by_path.values())
+
+    return diff
+
+
+def diff_post_contents(old_post: Post, new_post: Post) -> ContentPatch:
+    # The fingerprints skip the unchanged contents without splitting them
+    if old_post.content_fingerprint == new_post.content_fingerprint:
+        return ContentPatch(b"", ())
+
+    return diff_blocks(old_post.content_blocks, new_post.content_blocks)
+
+
+def validate_posts(posts: Iterable[Post]) -> Dict[Path, PostDecodeError]:
+    # Checks the posts of a trusted codec in one pass, and reports every invalid post
+    errors: Dict[Path, PostDecodeError] = dict()
+    for post in posts:
+        values = dict(post.__dict__)
+        # A deferred content is rendered to a string
+        is_content_loaded = post.is_content_loaded
+        if not is_content_loaded:
+            values["content"] = ""
+
+        values, error = validate_values(Post, values)
+        if error is not None:
+            errors[post.filepath] = PostDecodeError(str(error))
+            continue
+
+        if not is_content_loaded:
+            del values["content"]
+        # The validation may have converted some values
+        post.__dict__.update(values)
+
+    return errors
+
+
+def _to_builtin(value: Any) -> Any:
+    # Same types as json.loads(model.json())
+    if isinstance(value, BaseModel):
+        return {name: _to_builtin(getattr(value, name)) for name in value.__fields__}
+    elif isinstance(value, (set, frozenset)):
+        # Rebuilt like pydantic does, which may change the order of the items
+        return [_to_builtin(item) for item in type(value)(iter(value))]
+    elif isinstance(value, (list, tuple)):
+        return [_to_builtin(item) for item in value]
+    elif isinstance(value, (str, UUID)):
+        return str(value)
+    else:
+        return value
+
+
+# Wire format of encode_post(): a header, the lengths of the tags and categories, and
+# the UTF-8 strings. The content comes last, it is only decoded when it is accessed.
+_POST_WIRE_VERSION = 1
+_POST_HEADER = struct.Struct("<BBH16s7I")
+_POST_FIELDS = list(Post.__fields__)
+_IS_DRAFT = 1
+_HAS_POST_PUBLISHER_ID = 2
+_HAS_CANONICAL_URL = 4
+_HAS_MARKDOWN_SOURCE = 8
+
+
+def encode_post(post: Post) -> bytes:
+    # Much smaller and faster than pickling the pydantic models
+    content = post.content.encode("utf-8")
+    markdown_source = post.markdown_source
+    source = markdown_source.encode("utf-8") if markdown_source is not None else b""
+    filepath = str(post.filepath).encode("utf-8")
+    title = post.title.encode("utf-8")
+    canonical_url = (post.canonical_url or "").encode("utf-8")
+    items = [tag.encode("utf-8") for tag in post.tags]
+    items += [category.encode("utf-8") for category in post.categories]
+
+    flags = _IS_DRAFT if post.is_draft else 0
+    if post.post_publisher.__fields_set__:
+        flags |= _HAS_POST_PUBLISHER_ID
+    if post.canonical_url is not None:
+        flags |= _HAS_CANONICAL_URL
+    if markdown_source is not None:
+        flags |= _HAS_MARKDOWN_SOURCE
+    fields_set = sum(
+        1 << i for i, name in enumerate(_POST_FIELDS) if name in post.__fields_set__
+    )
+
+    header = _POST_HEADER.pack(
+        _POST_WIRE_VERSION,
+        flags,
+        fields_set,
+        post.post_publisher.id.bytes,
+        len(filepath),
+        len(title),
+        len(canonical_url),
+        len(post.tags),
+        len(post.categories),
+        len(source),
+        len(content),
+    )
+    item_lengths = struct.pack(f"<{len(items)}I", *map(len, items))
+
+    return b"".join(
+        [header, item_lengths, filepath, title, canonical_url, *items, source, content]
+    )
+
+
+def decode_post(data: bytes) -> Post:
+    (
+        version,
+        flags,
+        fields_set,
+        post_publisher_id,
+        filepath_length,
+        title_length,
+        canonical_url_length,
+        tags_count,
+        categories_count,
+        source_length,
+        content_length,
+    ) = _POST_HEADER.unpack_from(data)
+    if version != _POST_WIRE_VERSION:
+        raise ValueError(f"Unknown post wire format version '{version}'.")
+
+    offset = _POST_HEADER.size
+    item_lengths = struct.unpack_from(f"<{tags_count + categories_count}I", data, offset)
+    offset += 4 * len(item_lengths)
+
+    view = memoryview(data)
+    strings = []
+    for length in (
+        filepath_length,
+        title_length,
+        canonical_url_length,
+        *item_lengths,
+        source_length,
+    ):
+        strings.append(str(view[offset : offset + length], "utf-8"))
+        offset += length
+    filepath, title, canonical_url, *items, source = strings
+
+    url = None
+    if flags & _HAS_CANONICAL_URL:
+        url, _ = Post.__fields__["canonical_url"].validate(
+            canonical_url, {}, loc="canonical_url"
+        )
+
+    # The post was validated before it was encoded
+    post = construct_exact(
+        Post,
+        {
+            "filepath": Path(filepath),
+            "post_publisher": construct_exact(
+                PostPublisher,
+                {"id": UUID(bytes=post_publisher_id)},
+                {"id"} if flags & _HAS_POST_PUBLISHER_ID else set(),
+            ),
+            "title": title,
+            "canonical_url": url,
+            "tags": frozenset(items[:tags_count]),
+            "categories": frozenset(items[tags_count:]),
+            "is_draft": bool(flags & _IS_DRAFT),
+        },
+        {name for i, name in enumerate(_POST_FIELDS) if fields_set & (1 << i)},
+    )
+    post.defer_content(partial(str, view[offset : offset + content_length], "utf-8"))
+    if flags & _HAS_MARKDOWN_SOURCE:
+        post.set_markdown_source(source)
+
+    return post
+
+
+class CodecConfig(NamedTuple):
+    # The arguments of IPostCodec.__init__()
+    postsdir: Path
+    ignore_globs: List[str]
+    cache: Optional[PostCache]
+    markdown_extensions: List[str]
+    parser_backend: str
+    recorder: Optional[Recorder]
+    trusted: bool
+
+
+class PostsLoadResult(NamedTuple):
+    posts: List[Post]
+    errors: Dict[Path, PostDecodeError]
+
+
+_LoadOutcome = Tuple[Path, Optional[Post], Optional[PostDecodeError]]
+# Posts loaded in other processes are sent back encoded
+_WorkerLoadOutcome = Tuple[Path, Union[Post, bytes, None], Optional[PostDecodeError]]
+# With the stage records and the cache (hits, misses) of the worker
+_WorkerLoadResult = Tuple[_WorkerLoadOutcome, List[StageRecord], Tuple[int, int]]
+
+# Codec used by the processes of IPostCodec.load_many()
+_worker_codec: Optional["IPostCodec"] = None
+
+
+def _init_load_worker(codec: "IPostCodec") -> None:
+    global _worker_codec
+    _worker_codec = codec
+    # Each worker records its stages and counts its cache hits, and sends them back
+    # with the posts
+    if codec.recorder is not None:
+        codec.recorder = Recorder()
+    if codec.cache is not None:
+        codec.cache.drain_counts()
+
+
+def _load_in_worker(filepath: Path) -> _WorkerLoadResult:
+    assert _worker_codec is not None
+
+    _, post, error = _worker_codec._try_load(filepath)
+    # Trusted posts are validated before they are encoded, the encoding needs their types
+    if post is not None and _worker_codec.trusted:
+        error = validate_posts([post]).get(filepath)
+        post = post if error is None else None
+    recorder, cache = _worker_codec.recorder, _worker_codec.cache
+
+    return (
+        (filepath, encode_post(post) if post is not None else None, error),
+        recorder.drain() if recorder is not None else [],
+        cache.drain_counts() if cache is not None else (0, 0),
+    )
+
+
+def _load_in_thread(codec: "IPostCodec", filepath: Path) -> _WorkerLoadResult:
+    # The threads share the recorder and the cache of the codec
+    return codec._try_load(filepath), [], (0, 0)
+
 
 class IPostCodec(ABC):
     CONTENT_FORMATS: ClassVar[List[ContentFormats]]
+    MARKDOWN_EXTENSIONS: ClassVar[List[str]] = []
+    # How the post fields are read from the frontmatter metadata
+    METADATA_FIELDS: ClassVar[List[MetadataField]] = [
+        MetadataField("is_draft", ("is_draft",)),
+        MetadataField("title", ("title",)),
+        MetadataField("tags", ("tags",)),
+        MetadataField("categories", ("categories",)),
+    ]
+    # Bump when the decoding changes, to invalidate cached posts
+    CODEC_VERSION: ClassVar[int] = 2
+
+    _extract_metadata: ClassVar[Callable[[Dict[str, Any]], Dict[str, Any]]]
+
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+        # Compiled once per codec, instead of reading the fields key by key
+        cls._extract_metadata = compile_field_map(cls.METADATA_FIELDS)
+
+    def __init__(
+        self,
+        postsdir,
+        ignore_globs: Optional[List[str]] = None,
+        cache: Optional[PostCache] = None,
+        markdown_extensions: Optional[List[str]] = None,
+        parser_backend: str = "fast",
+        recorder: Optional[Recorder] = None,
+        trusted: bool = False,
+    ):
+        # The codecs are concrete once they declare their formats
+        if not hasattr(self, "CONTENT_FORMATS"):
+            raise TypeError(f"{type(self).__name__} does not declare CONTENT_FORMATS.")
 
-    def __init__(self, postsdir, ignore_globs: Optional[List[str]] = None):
         self.postsdir = postsdir
         self.ignore_globs = ignore_globs if ignore_globs else list()
+        self.cache = cache
+        if markdown_extensions is None:
+            markdown_extensions = self.MARKDOWN_EXTENSIONS
+        self.renderer = MarkdownRenderer(markdown_extensions)
+        self.parsers = get_parsers(parser_backend)
+        self.recorder = recorder
+        self.trusted = trusted
+        self._ignore_matcher = IgnoreMatcher(self.ignore_globs)
+
+    @property
+    def config(self) -> CodecConfig:
+        return CodecConfig(
+            self.postsdir,
+            list(self.ignore_globs),
+            self.cache,
+            list(self.renderer.extensions),
+            self.parsers.name,
+            self.recorder,
+            self.trusted,
+        )
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        # Rebuilt from its config, instead of pickling the renderer and the compiled globs
+        return type(self), tuple(self.config)
 
-    @abstractmethod
     def _get_post(self, metadata: Dict[str, Any], partial_dict: Dict[str, Any]) -> Post:
-        ...
+        try:
+            # Read from the class, the function is not a method
+            fields = type(self)._extract_metadata(metadata)
+        except KeyError as e:
+            raise PostDecodeError(f"'{e}' key is missing.")
+
+        return self._new(Post, **fields, **partial_dict)
+
+    def _new(self, model_class: Type[Model], **fields: Any) -> Model:
+        # Trusted models are not validated, validate_posts() checks them afterwards
+        if self.trusted:
+            return construct_trusted(model_class, fields)
+
+        return model_class(**fields)
+
+    def _cache_key(self, data: bytes) -> str:
+        codec_id = f"{type(self).__module__}.{type(self).__qualname__}"
+        codec_id += f":{self.CODEC_VERSION}:{','.join(self.renderer.extensions)}"
+
+        return hashlib.sha256(codec_id.encode("utf-8") + b"\0" + data).hexdigest()
+
+    def load(self, filepath: Path, lazy: bool = False) -> Post:
+        with stage(self.recorder, "read", filepath) as read_stage:
+            data = filepath.read_bytes()
+            read_stage.nbytes = len(data)
+
+        if self.cache is None:
+            return self._decode(filepath, data, lazy)
 
-    def load(self, filepath: Path) -> Post:
+        key = self._cache_key(data)
+        with stage(self.recorder, "cache", filepath):
+            cached_post = self.cache.get(key)
+        if cached_post is not None:
+            fields = json.loads(cached_post)
+            post_publisher = fields.pop("post_publisher", None) or dict()
+            markdown_source = fields.pop("markdown_source", None)
+
+            post = self._new(
+                Post,
+                filepath=filepath,
+                post_publisher=self._new(PostPublisher, **post_publisher),
+                **fields,
+            )
+            if markdown_source is not None:
+                post.set_markdown_source(markdown_source, post.content)
+
+            return post
+
+        post = self._decode(filepath, data, lazy)
+
+        # Only rendered posts are cached, since rendering is what the cache saves
+        if post.is_content_loaded:
+            # A post without app data gets a new ID on each load, so the ID is not cached
+            exclude = {"filepath"}
+            if not post.post_publisher.__fields_set__:
+                exclude.add("post_publisher")
+            fields = json.loads(post.json(exclude=exclude))
+            fields["markdown_source"] = post.markdown_source
+            self.cache.set(key, json.dumps(fields))
+
+        return post
+
+    @contextmanager
+    def _frontmatter_errors(self) -> Iterator[None]:
         try:
-            metadata, content = frontmatter.parse(filepath.read_text(encoding="utf-8"))
+            yield
         except TomlDecodeError as e:
             raise PostDecodeError(f"Error in TOML Frontmatter: {e}")
         except ScannerError as e:
@@ -84,49 +599,316 @@ class IPostCodec(ABC):
         except JSONDecodeError as e:
             raise PostDecodeError(f"Error in JSON Frontmatter: {e}")
 
+    def _decode(self, filepath: Path, data: bytes, lazy: bool = False) -> Post:
+        with stage(self.recorder, "parse", filepath) as parse_stage:
+            parse_stage.nbytes = len(data)
+            with self._frontmatter_errors():
+                metadata, content = parse_frontmatter_bytes(data, self.parsers)
+
         if not metadata:
             raise PostDecodeError("Frontmatter not found.")
         if not content:
             raise PostDecodeError("Content not found.")
 
         post_publisher = metadata.get("post_publisher") or dict()
+        rendered_content = "" if lazy else self._render(filepath, content)
+
+        with stage(self.recorder, "validate", filepath):
+            post = self._get_post(
+                metadata,
+                {
+                    "filepath": filepath,
+                    "post_publisher": self._new(PostPublisher, **post_publisher),
+                    "content": rendered_content,
+                },
+            )
+        if lazy:
+            post.defer_content(partial(self._render, filepath, content))
+            post.set_markdown_source(content)
+        else:
+            post.set_markdown_source(content, post.content)
 
-        return self._get_post(
-            metadata,
-            {
-                "filepath": filepath,
-                "post_publisher": PostPublisher(**post_publisher),
-                "content": markdown(content),
-            },
+        return post
+
+    def _render(self, filepath: Path, content: str) -> str:
+        with stage(self.recorder, "render", filepath) as render_stage:
+            rendered_content = self.renderer.render(content)
+            render_stage.add_text(content)
+
+        return rendered_content
+
+    def load_metadata(self, filepath: Path) -> Post:
+        with stage(self.recorder, "parse_metadata", filepath):
+            with self._frontmatter_errors():
+                frontmatter_block = read_frontmatter(filepath)
+                metadata = (
+                    load_metadata(*frontmatter_block, self.parsers)
+                    if frontmatter_block
+                    else None
+                )
+
+        if not metadata or not isinstance(metadata, dict):
+            raise PostDecodeError("Frontmatter not found.")
+
+        post_publisher = metadata.get("post_publisher") or dict()
+
+        with stage(self.recorder, "validate", filepath):
+            post = self._get_post(
+                metadata,
+                {
+                    "filepath": filepath,
+                    "post_publisher": self._new(PostPublisher, **post_publisher),
+                    "content": "",
+                },
+            )
+        # The body is only read if the content is accessed
+        post.defer_content(partial(self._load_content, post, filepath))
+
+        return post
+
+    def _load_content(self, post: Post, filepath: Path) -> str:
+        loaded_post = self.load(filepath)
+        if (markdown_source := loaded_post.markdown_source) is not None:
+            post.set_markdown_source(markdown_source, loaded_post.content)
+
+        return loaded_post.content
+
+    def _try_load(self, filepath: Path) -> _LoadOutcome:
+        try:
+            return filepath, self.load(filepath), None
+        except PostDecodeError as e:
+            return filepath, None, e
+        except (ValidationError, UnicodeDecodeError) as e:
+            # Reported like the other decoding errors, as trusted codecs do
+            return filepath, None, PostDecodeError(str(e))
+
+    def load_many(
+        self,
+        filepaths: Iterable[Path],
+        workers: Optional[int] = None,
+        executor: str = "process",
+    ) -> PostsLoadResult:
+        filepaths = list(filepaths)
+        workers = workers or os.cpu_count() or 1
+
+        pool: Executor
+        if executor == "process":
+            pool = ProcessPoolExecutor(
+                workers, initializer=_init_load_worker, initargs=(self,)
+            )
+            load = _load_in_worker
+        elif executor == "thread":
+            pool = ThreadPoolExecutor(workers)
+            load = partial(_load_in_thread, self)
+        else:
+            raise ValueError(f"Unknown executor '{executor}'.")
+
+        # Big chunks amortize the inter-process round-trips
+        chunksize = max(1, len(filepaths) // (workers * 4))
+
+        result = PostsLoadResult(posts=list(), errors=dict())
+        with pool:
+            for outcome, records, cache_counts in pool.map(
+                load, filepaths, chunksize=chunksize
+            ):
+                filepath, post, error = outcome
+                if self.recorder is not None:
+                    for record in records:
+                        self.recorder.add(record)
+                if self.cache is not None and cache_counts != (0, 0):
+                    self.cache.add_counts(*cache_counts)
+                if error is not None:
+                    result.errors[filepath] = error
+                elif isinstance(post, bytes):
+                    result.posts.append(decode_post(post))
+                elif post is not None:
+                    result.posts.append(post)
+
+        # The process workers validate the trusted posts before encoding them
+        if self.trusted and executor != "process":
+            result.errors.update(validate_posts(result.posts))
+            result.posts[:] = [
+                post for post in result.posts if post.filepath not in result.errors
+            ]
+
+        return result
+
+    def _dump_app_data(self, modified_post: Post) -> bytes:
+        data = modified_post.filepath.read_bytes()
+        text = data.decode("utf-8")
+
+        block = find_frontmatter(text)
+        block_end = block.end if block else 0
+        new_text = set_metadata_entry(
+            text[:block_end],
+            "post_publisher",
+            json.loads(modified_post.post_publisher.json()),
         )
 
+        # The body bytes are written back untouched
+        body = data[len(text[:block_end].encode("utf-8")) :]
+        if block is None:
+            body = body.lstrip()
+
+        return new_text.encode("utf-8") + body
+
     def dump_app_data(self, modified_post: Post) -> None:
-        post = frontmatter.load(modified_post.filepath, encoding="utf-8")
+        atomic_write_bytes(modified_post.filepath, self._dump_app_data(modified_post))
 
-        post.metadata["post_publisher"] = post.post_publisher.dict()
+    def dump_app_data_many(self, modified_posts: Iterable[Post]) -> None:
+        # Every file or none is written
+        atomic_write_many(
+            {
+                modified_post.filepath: self._dump_app_data(modified_post)
+                for modified_post in modified_posts
+            }
+        )
+
+    @property
+    def ignore_matcher(self) -> IgnoreMatcher:
+        # ignore_globs is public and may have been changed since the last compilation
+        if self._ignore_matcher.patterns != tuple(self.ignore_globs):
+            self._ignore_matcher = IgnoreMatcher(self.ignore_globs)
+
+        return self._ignore_matcher
+
+    def _relpath(self, path: Path) -> Optional[str]:
+        relpath = os.path.relpath(Path(path).abspath(), Path(self.postsdir).abspath())
+        if relpath in (os.curdir, os.pardir) or relpath.startswith(os.pardir + os.sep):
+            return None
 
-        frontmatter.dump(post, modified_post.filepath)
+        return relpath.replace(os.sep, "/")
 
     def is_publishable(self, path: Path) -> bool:
-        files_to_ignore = []
-        for glob_pattern in self.ignore_globs:
-            for filepath in glob(self.postsdir / glob_pattern, recursive=True):
-                files_to_ignore.append(Path(filepath).abspath())
+        relpath = self._relpath(path)
 
-        return path.abspath() not in files_to_ignore
+        return relpath is None or not self.ignore_matcher.is_ignored(relpath)
 
-    def dump(self, post: Post) -> None:
-        metadata = json.loads(post.json(exclude={"canonical_url", "filepath"}))
+    def filter_publishable(self, paths: Iterable[Path]) -> List[Path]:
+        matcher = self.ignore_matcher
+
+        return [
+            path
+            for path in paths
+            if (relpath := self._relpath(path)) is None
+            or not matcher.is_ignored(relpath)
+        ]
+
+    def _dump_metadata(self, post: Post) -> Dict[str, Any]:
+        return {
+            name: _to_builtin(getattr(post, name))
+            for name in post.__fields__
+            if name not in {"canonical_url", "filepath", "content"}
+        }
 
-        content = markdownify(metadata.pop("content"))
+    def _dump_post(self, post: Post, markdown_content: str) -> bytes:
+        frontmatter_post = frontmatter.Post(markdown_content, **self._dump_metadata(post))
 
-        frontmatter_post = frontmatter.Post(content, **metadata)
+        return frontmatter.dumps(frontmatter_post).encode("utf-8")
 
-        frontmatter.dump(frontmatter_post, post.filepath, encoding="utf-8")
+    def _markdown_content(self, post: Post) -> str:
+        # The content is only converted back to Markdown if it has been changed
+        markdown_source = post.markdown_source
+        if markdown_source is not None:
+            return markdown_source
+
+        return markdownify(post.content)
+
+    def dump(self, post: Post) -> None:
+        data = self._dump_post(post, self._markdown_content(post))
+
+        atomic_write_bytes(post.filepath, data)
+
+    def dump_many(
+        self,
+        posts: Iterable[Post],
+        workers: Optional[int] = None,
+        executor: str = "process",
+    ) -> None:
+        posts = list(posts)
+        workers = workers or os.cpu_count() or 1
+
+        pool: Executor
+        if executor == "process":
+            pool = ProcessPoolExecutor(workers)
+        elif executor == "thread":
+            pool = ThreadPoolExecutor(workers)
+        else:
+            raise ValueError(f"Unknown executor '{executor}'.")
+
+        # Only the changed contents are converted back to Markdown
+        markdown_sources = [post.markdown_source for post in posts]
+        changed_contents = [
+            post.content
+            for post, markdown_source in zip(posts, markdown_sources)
+            if markdown_source is None
+        ]
+        chunksize = max(1, len(changed_contents) // (workers * 4))
+
+        with pool:
+            # A single worker would only add the round-trips to the pool
+            if workers == 1 or len(changed_contents) <= 1:
+                converted_contents = list(map(markdownify, changed_contents))
+            else:
+                converted_contents = list(
+                    pool.map(markdownify, changed_contents, chunksize=chunksize)
+                )
+
+        converted = iter(converted_contents)
+        markdown_contents = [
+            markdown_source if markdown_source is not None else next(converted)
+            for markdown_source in markdown_sources
+        ]
+
+        # Nothing is written if a conversion failed, and every file or none is written
+        atomic_write_many(
+            {
+                post.filepath: self._dump_post(post, markdown_content)
+                for post, markdown_content in zip(posts, markdown_contents)
+            }
+        )
+
+    def has_content_format(self, path: str) -> bool:
+        ext = os.path.splitext(path)[1]
+
+        return any(ext in cf.value for cf in self.CONTENT_FORMATS)
+
+    def iter_posts(self) -> Iterator[Path]:
+        matcher = self.ignore_matcher
+
+        # Hidden entries are skipped, like glob() does
+        dirs = [(Path(self.postsdir), "")]
+        while dirs:
+            dirpath, reldir = dirs.pop()
+            try:
+                with os.scandir(dirpath) as it:
+                    entries = sorted(
+                        (entry for entry in it if not entry.name.startswith(".")),
+                        key=lambda entry: entry.name,
+                    )
+            except (FileNotFoundError, NotADirectoryError):
+                if reldir:
+                    continue
+                raise
+
+            subdirs = []
+            for entry in entries:
+                relpath = reldir + entry.name
+                if entry.is_dir(follow_symlinks=False):
+                    if not matcher.is_tree_ignored(relpath):
+                        subdirs.append((dirpath / entry.name, relpath + "/"))
+                elif (
+                    self.has_content_format(entry.name)
+                    and entry.is_file()
+                    and not matcher.is_ignored(relpath)
+                ):
+                    yield dirpath / entry.name
+
+            dirs.extend(reversed(subdirs))
 
     def is_post(self, path: Path) -> bool:
         if path.exists() and path.isfile():
-            return any(path.ext in cf.value for cf in self.CONTENT_FORMATS)
+            return self.has_content_format(path)
         else:
             return False
 
@@ -136,32 +918,18 @@ class PostCodec(IPostCodec):
         ContentFormats.MARKDOWN,
     ]
 
-    def _get_post(self, metadata: Dict[str, Any], partial_dict: Dict[str, Any]) -> Post:
-        try:
-            return Post(
-                is_draft=metadata["is_draft"],
-                title=metadata["title"],
-                tags=metadata["tags"],
-                categories=metadata["categories"],
-                **partial_dict,
-            )
-        except KeyError as e:
-            raise PostDecodeError(f"'{e}' key is missing.")
-
 
 class HugoPostCodec(IPostCodec):
     CONTENT_FORMATS = [
         ContentFormats.MARKDOWN,
     ]
-
-    def _get_post(self, metadata: Dict[str, Any], partial_dict: Dict[str, Any]) -> Post:
-        try:
-            return Post(
-                is_draft=metadata["is_draft"],
-                title=metadata["title"],
-                tags=metadata["tags"],
-                categories=metadata["categories"],
-                **partial_dict,
-            )
-        except KeyError as e:
-            raise PostDecodeError(f"'{e}' key is missing.")
+    MARKDOWN_EXTENSIONS = [
+        "tables",
+        "fenced_code",
+        "toc",
+    ]
+    # Hugo's own key for drafts is "draft"
+    METADATA_FIELDS = [
+        MetadataField("is_draft", ("is_draft", "draft")),
+        *IPostCodec.METADATA_FIELDS[1:],
+    ]
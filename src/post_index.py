@@ -0,0 +1,187 @@
+import json
+from typing import Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Set
+from uuid import UUID
+
+from path import Path
+from pydantic import ValidationError
+
+from .post_codecs import IPostCodec, Post, PostDecodeError
+from .post_manifest import ChangeKind, PostChange
+from .utils.misc import atomic_write_bytes
+
+
+class IndexEntry(NamedTuple):
+    tags: FrozenSet[str]
+    categories: FrozenSet[str]
+    is_draft: bool
+    # None when the post has no app data, since its ID changes on each load
+    post_publisher_id: Optional[UUID]
+
+
+def _remove_from(
+    postings: Dict[str, Set[Path]], keys: Iterable[str], filepath: Path
+) -> None:
+    for key in keys:
+        postings[key].discard(filepath)
+        if not postings[key]:
+            del postings[key]
+
+
+class PostIndex:
+    VERSION = 1
+
+    def __init__(self) -> None:
+        self.clear()
+
+    def clear(self) -> None:
+        self.entries: Dict[Path, IndexEntry] = dict()
+
+        # Posting lists, each lookup only touches the posts it returns
+        self._tags: Dict[str, Set[Path]] = dict()
+        self._categories: Dict[str, Set[Path]] = dict()
+        self._drafts: Set[Path] = set()
+        self._non_drafts: Set[Path] = set()
+        self._post_publisher_ids: Dict[UUID, Path] = dict()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __contains__(self, filepath: object) -> bool:
+        return filepath in self.entries
+
+    def add(self, post: Post) -> None:
+        post_publisher_id = (
+            post.post_publisher.id if post.post_publisher.__fields_set__ else None
+        )
+        self._add_entry(
+            Path(post.filepath),
+            IndexEntry(post.tags, post.categories, post.is_draft, post_publisher_id),
+        )
+
+    def _add_entry(self, filepath: Path, entry: IndexEntry) -> None:
+        if filepath in self.entries:
+            self.remove(filepath)
+
+        self.entries[filepath] = entry
+        for tag in entry.tags:
+            self._tags.setdefault(tag, set()).add(filepath)
+        for category in entry.categories:
+            self._categories.setdefault(category, set()).add(filepath)
+        (self._drafts if entry.is_draft else self._non_drafts).add(filepath)
+        if entry.post_publisher_id is not None:
+            self._post_publisher_ids[entry.post_publisher_id] = filepath
+
+    def remove(self, filepath: Path) -> None:
+        entry = self.entries.pop(filepath)
+
+        _remove_from(self._tags, entry.tags, filepath)
+        _remove_from(self._categories, entry.categories, filepath)
+        (self._drafts if entry.is_draft else self._non_drafts).discard(filepath)
+        if (post_publisher_id := entry.post_publisher_id) is not None:
+            # Another post may have taken the ID over
+            if self._post_publisher_ids.get(post_publisher_id) == filepath:
+                del self._post_publisher_ids[post_publisher_id]
+
+    def rebuild(self, codec: IPostCodec) -> Dict[Path, PostDecodeError]:
+        self.clear()
+
+        return self.apply(
+            codec,
+            (PostChange(ChangeKind.ADDED, filepath) for filepath in codec.iter_posts()),
+        )
+
+    def apply(
+        self, codec: IPostCodec, changes: Iterable[PostChange]
+    ) -> Dict[Path, PostDecodeError]:
+        # Only the frontmatters are read, the index does not need the contents
+        errors: Dict[Path, PostDecodeError] = dict()
+        for change in changes:
+            if change.kind == ChangeKind.DELETED:
+                if change.filepath in self.entries:
+                    self.remove(change.filepath)
+                continue
+
+            try:
+                self.add(codec.load_metadata(change.filepath))
+                continue
+            except PostDecodeError as e:
+                errors[change.filepath] = e
+            except ValidationError as e:
+                errors[change.filepath] = PostDecodeError(str(e))
+
+            if change.filepath in self.entries:
+                self.remove(change.filepath)
+
+        return errors
+
+    def tags(self) -> List[str]:
+        return sorted(self._tags)
+
+    def categories(self) -> List[str]:
+        return sorted(self._categories)
+
+    def find(
+        self,
+        tags: Iterable[str] = (),
+        categories: Iterable[str] = (),
+        is_draft: Optional[bool] = None,
+    ) -> Set[Path]:
+        postings = [self._tags.get(tag, set()) for tag in tags]
+        postings += [self._categories.get(category, set()) for category in categories]
+        if is_draft is not None:
+            postings.append(self._drafts if is_draft else self._non_drafts)
+
+        if not postings:
+            return set(self.entries)
+
+        # Starting from the smallest list bounds the work by the size of the result
+        postings.sort(key=len)
+        result = set(postings[0])
+        for posting in postings[1:]:
+            if not result:
+                break
+            result.intersection_update(posting)
+
+        return result
+
+    def find_by_post_publisher_id(self, post_publisher_id: UUID) -> Optional[Path]:
+        return self._post_publisher_ids.get(post_publisher_id)
+
+    def save(self, filepath: Path) -> None:
+        index = {
+            "version": self.VERSION,
+            "posts": {
+                post_filepath: [
+                    sorted(entry.tags),
+                    sorted(entry.categories),
+                    entry.is_draft,
+                    str(entry.post_publisher_id) if entry.post_publisher_id else None,
+                ]
+                for post_filepath, entry in self.entries.items()
+            },
+        }
+        atomic_write_bytes(filepath, json.dumps(index).encode("utf-8"))
+
+    @classmethod
+    def load(cls, filepath: Path) -> "PostIndex":
+        post_index = cls()
+        if not Path(filepath).isfile():
+            return post_index
+
+        index = json.loads(Path(filepath).read_text(encoding="utf-8"))
+        if index.get("version") != cls.VERSION:
+            return post_index
+
+        for post_filepath, entry in index["posts"].items():
+            tags, categories, is_draft, post_publisher_id = entry
+            post_index._add_entry(
+                Path(post_filepath),
+                IndexEntry(
+                    frozenset(tags),
+                    frozenset(categories),
+                    is_draft,
+                    UUID(post_publisher_id) if post_publisher_id else None,
+                ),
+            )
+
+        return post_index
@@ -0,0 +1,90 @@
+import hashlib
+import json
+import os
+from enum import Enum, unique
+from typing import Dict, Iterator, NamedTuple, Optional
+
+from path import Path
+
+from .post_codecs import IPostCodec
+from .utils.misc import atomic_write_bytes
+
+
+@unique
+class ChangeKind(Enum):
+    ADDED = "added"
+    MODIFIED = "modified"
+    DELETED = "deleted"
+
+
+class PostChange(NamedTuple):
+    kind: ChangeKind
+    filepath: Path
+
+
+class ManifestEntry(NamedTuple):
+    mtime_ns: int
+    size: int
+    digest: str
+
+
+class PostManifest:
+    VERSION = 1
+
+    def __init__(self, filepath: Path, codec: IPostCodec):
+        self.filepath = Path(filepath)
+        self.codec = codec
+
+        self.entries: Dict[str, ManifestEntry] = self._read()
+        self._pending: Optional[Dict[str, ManifestEntry]] = None
+
+    def _read(self) -> Dict[str, ManifestEntry]:
+        if not self.filepath.isfile():
+            return dict()
+
+        manifest = json.loads(self.filepath.read_text(encoding="utf-8"))
+        if manifest.get("version") != self.VERSION:
+            return dict()
+
+        return {
+            relpath: ManifestEntry(*entry) for relpath, entry in manifest["posts"].items()
+        }
+
+    def changes(self) -> Iterator[PostChange]:
+        postsdir = Path(self.codec.postsdir)
+        pending: Dict[str, ManifestEntry] = dict()
+
+        for filepath in self.codec.iter_posts():
+            relpath = filepath.relpath(postsdir).replace(os.sep, "/")
+            stat = filepath.stat()
+            entry = self.entries.get(relpath)
+
+            # An unchanged stat is trusted, the file is not read
+            if entry and (entry.mtime_ns, entry.size) == (stat.st_mtime_ns, stat.st_size):
+                pending[relpath] = entry
+                continue
+
+            digest = hashlib.sha256(filepath.read_bytes()).hexdigest()
+            pending[relpath] = ManifestEntry(stat.st_mtime_ns, stat.st_size, digest)
+
+            if entry is None:
+                yield PostChange(ChangeKind.ADDED, filepath)
+            elif entry.digest != digest:
+                yield PostChange(ChangeKind.MODIFIED, filepath)
+
+        for relpath in sorted(self.entries.keys() - pending.keys()):
+            yield PostChange(ChangeKind.DELETED, postsdir / relpath)
+
+        self._pending = pending
+
+    def commit(self) -> None:
+        if self._pending is None:
+            raise RuntimeError("changes() must be fully iterated before commit().")
+
+        manifest = {
+            "version": self.VERSION,
+            "posts": {relpath: list(entry) for relpath, entry in self._pending.items()},
+        }
+        atomic_write_bytes(self.filepath, json.dumps(manifest).encode("utf-8"))
+
+        self.entries, self._pending = self._pending, None
@@ -0,0 +1,170 @@
+import mmap
+import sys
+import tempfile
+from array import array
+from functools import partial
+from typing import IO, Any, Dict, FrozenSet, Iterable, Iterator, List, Optional, Tuple
+from uuid import UUID
+
+from path import Path
+
+from .post_codecs import Post, PostPublisher
+from .utils.trusted_models import construct_exact
+
+
+# Posts are stored by columns, with the tag and category sets interned into IDs and the
+# contents in a memory-mapped file. Posts are handed out as views, read on demand.
+class PostStore:
+    def __init__(self, content_filepath: Optional[Path] = None):
+        self._file: IO[bytes] = (
+            open(content_filepath, "w+b")
+            if content_filepath is not None
+            else tempfile.TemporaryFile()
+        )
+        self._file_size = 0
+        self._mmap: Optional[mmap.mmap] = None
+
+        # Filepath -> row, a replaced or removed post leaves an unused row
+        self._rows: Dict[str, int] = dict()
+
+        self._string_sets: List[FrozenSet[str]] = list()
+        self._string_set_ids: Dict[FrozenSet[str], int] = dict()
+
+        self._filepaths: List[str] = list()
+        self._titles: List[str] = list()
+        self._canonical_urls: List[Optional[str]] = list()
+        self._post_publisher_ids = bytearray()
+        # Whether the ID was set, a post without app data gets a new ID on each load
+        self._has_post_publisher_ids = bytearray()
+        self._tags = array("L")
+        self._categories = array("L")
+        self._is_drafts = bytearray()
+        # Contents and Markdown sources in the file, -1 when there is no source
+        self._content_offsets = array("q")
+        self._content_lengths = array("q")
+        self._source_offsets = array("q")
+        self._source_lengths = array("q")
+
+    def __enter__(self) -> "PostStore":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        self._file.close()
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, filepath: object) -> bool:
+        return filepath in self._rows
+
+    def __iter__(self) -> Iterator[Post]:
+        return (self._view(row) for row in list(self._rows.values()))
+
+    def __getitem__(self, filepath: str) -> Post:
+        return self._view(self._rows[filepath])
+
+    def get(self, filepath: str) -> Optional[Post]:
+        row = self._rows.get(filepath)
+
+        return self._view(row) if row is not None else None
+
+    def filepaths(self) -> List[Path]:
+        return [Path(filepath) for filepath in self._rows]
+
+    def _intern(self, strings: FrozenSet[str]) -> int:
+        if (string_set_id := self._string_set_ids.get(strings)) is None:
+            string_set_id = len(self._string_sets)
+            self._string_sets.append(frozenset(sys.intern(string) for string in strings))
+            self._string_set_ids[self._string_sets[-1]] = string_set_id
+
+        return string_set_id
+
+    def _write(self, text: Optional[str]) -> Tuple[int, int]:
+        if text is None:
+            return -1, 0
+
+        data = text.encode("utf-8")
+        offset = self._file_size
+        self._file.seek(offset)
+        self._file.write(data)
+        self._file_size += len(data)
+
+        return offset, len(data)
+
+    def _read(self, offset: int, length: int) -> str:
+        if length == 0:
+            return ""
+
+        # The file is mapped again once it has grown past the mapping
+        if self._mmap is None or len(self._mmap) < offset + length:
+            self._file.flush()
+            if self._mmap is not None:
+                self._mmap.close()
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        return self._mmap[offset : offset + length].decode("utf-8")
+
+    def add(self, post: Post) -> None:
+        content_offset, content_length = self._write(post.content)
+        self._content_offsets.append(content_offset)
+        self._content_lengths.append(content_length)
+        source_offset, source_length = self._write(post.markdown_source)
+        self._source_offsets.append(source_offset)
+        self._source_lengths.append(source_length)
+
+        filepath = sys.intern(str(post.filepath))
+        self._filepaths.append(filepath)
+        self._titles.append(post.title)
+        self._canonical_urls.append(post.canonical_url)
+        self._post_publisher_ids += post.post_publisher.id.bytes
+        self._has_post_publisher_ids.append("id" in post.post_publisher.__fields_set__)
+        self._tags.append(self._intern(post.tags))
+        self._categories.append(self._intern(post.categories))
+        self._is_drafts.append(post.is_draft)
+
+        self._rows[filepath] = len(self._filepaths) - 1
+
+    def extend(self, posts: Iterable[Post]) -> None:
+        for post in posts:
+            self.add(post)
+
+    def remove(self, filepath: str) -> None:
+        del self._rows[filepath]
+
+    def _view(self, row: int) -> Post:
+        # The fields were validated when the post was added
+        post_publisher = construct_exact(
+            PostPublisher,
+            {"id": UUID(bytes=bytes(self._post_publisher_ids[row * 16 : row * 16 + 16]))},
+            {"id"} if self._has_post_publisher_ids[row] else set(),
+        )
+        fields = {
+            "filepath": Path(self._filepaths[row]),
+            "post_publisher": post_publisher,
+            "title": self._titles[row],
+            "content": "",
+            "canonical_url": self._canonical_urls[row],
+            "tags": self._string_sets[self._tags[row]],
+            "categories": self._string_sets[self._categories[row]],
+            "is_draft": bool(self._is_drafts[row]),
+        }
+        post = construct_exact(Post, fields, set(fields))
+        # The Markdown source is read with the content, on first access
+        post.defer_content(partial(self._load_content, post, row))
+
+        return post
+
+    def _load_content(self, post: Post, row: int) -> str:
+        content = self._read(self._content_offsets[row], self._content_lengths[row])
+        if (source_offset := self._source_offsets[row]) != -1:
+            post.set_markdown_source(
+                self._read(source_offset, self._source_lengths[row]), content
+            )
+
+        return content
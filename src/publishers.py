@@ -0,0 +1,283 @@
+import asyncio
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import Executor, ThreadPoolExecutor
+from contextlib import suppress
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional
+
+import requests
+from path import Path
+from requests.adapters import HTTPAdapter
+
+from .post_codecs import Post
+
+
+class PublishError(Exception):
+    pass
+
+
+class RetryablePublishError(PublishError):
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class PublishResult(NamedTuple):
+    filepath: Path
+    platform: str
+    # The ID given by the platform, None when the publication failed
+    remote_id: Optional[str]
+    error: Optional[Exception]
+    attempts: int
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: int = 1):
+        if rate <= 0:
+            raise ValueError("The rate must be positive.")
+
+        self.rate = rate
+        self.capacity = capacity
+
+        self._tokens = float(capacity)
+        self._updated_at = time.monotonic()
+        self._lock: Optional[asyncio.Lock] = None
+
+    async def acquire(self) -> None:
+        # The lock is created lazily, since it is bound to the running loop on Python 3.8
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.capacity, self._tokens + (now - self._updated_at) * self.rate
+                )
+                self._updated_at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class IPlatformClient(ABC):
+    def __init__(
+        self,
+        name: str,
+        max_concurrency: int = 4,
+        rate: Optional[float] = None,
+        burst: int = 1,
+    ):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.rate = rate
+        self.burst = burst
+
+        # One keep-alive connection per concurrent request, reused between the posts
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_concurrency)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def close(self) -> None:
+        self.session.close()
+
+    # Called from a worker thread, must raise RetryablePublishError for transient errors
+    @abstractmethod
+    def publish(self, post: Post) -> Optional[str]:
+        pass
+
+
+class HttpPlatformClient(IPlatformClient):
+    RETRYABLE_STATUS_CODES = {408, 425, 429, 500, 502, 503, 504}
+
+    def __init__(
+        self,
+        name: str,
+        endpoint: str,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: float = 30,
+        **kwargs: Any,
+    ):
+        super().__init__(name, **kwargs)
+        self.endpoint = endpoint
+        self.timeout = timeout
+        if headers:
+            self.session.headers.update(headers)
+
+    def _payload(self, post: Post) -> Dict[str, Any]:
+        return {
+            "id": str(post.post_publisher.id),
+            "title": post.title,
+            "content": post.content,
+            "canonical_url": post.canonical_url,
+            "tags": sorted(post.tags),
+            "categories": sorted(post.categories),
+        }
+
+    def publish(self, post: Post) -> Optional[str]:
+        try:
+            response = self.session.post(
+                self.endpoint, json=self._payload(post), timeout=self.timeout
+            )
+        except (requests.ConnectionError, requests.Timeout) as e:
+            raise RetryablePublishError(str(e))
+
+        if response.status_code in self.RETRYABLE_STATUS_CODES:
+            retry_after = response.headers.get("Retry-After")
+            raise RetryablePublishError(
+                f"{self.name} answered {response.status_code}.",
+                float(retry_after) if retry_after and retry_after.isdigit() else None,
+            )
+        if not response.ok:
+            raise PublishError(f"{self.name} answered {response.status_code}.")
+
+        remote_id = response.json().get("id") if response.content else None
+
+        return str(remote_id) if remote_id is not None else None
+
+
+_END = object()
+
+
+def _next_post(posts: Iterator[Post]) -> Any:
+    post: Any = next(posts, _END)
+    # A lazy content is rendered once, before the platforms read it concurrently.
+    # Its errors are reported by each platform.
+    if post is not _END:
+        with suppress(Exception):
+            post.content
+
+    return post
+
+
+class Publisher:
+    def __init__(
+        self,
+        clients: Iterable[IPlatformClient],
+        max_retries: int = 3,
+        backoff: float = 0.5,
+        max_backoff: float = 30,
+    ):
+        self.clients = list(clients)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+        names = [client.name for client in self.clients]
+        if len(set(names)) != len(names):
+            raise ValueError("The platform names must be unique.")
+
+    def close(self) -> None:
+        for client in self.clients:
+            client.close()
+
+    def __enter__(self) -> "Publisher":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def publish(self, posts: Iterable[Post]) -> List[PublishResult]:
+        return asyncio.run(self.publish_async(posts))
+
+    async def publish_async(self, posts: Iterable[Post]) -> List[PublishResult]:
+        loop = asyncio.get_running_loop()
+        results: List[PublishResult] = list()
+
+        # Each platform has its own queue and workers, a slow platform does not hold
+        # the others back until its queue is full
+        queues: Dict[str, "asyncio.Queue[Any]"] = {
+            client.name: asyncio.Queue(maxsize=2 * client.max_concurrency)
+            for client in self.clients
+        }
+        buckets = {
+            client.name: TokenBucket(client.rate, client.burst)
+            for client in self.clients
+            if client.rate is not None
+        }
+
+        max_workers = sum(client.max_concurrency for client in self.clients) + 1
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            workers = [
+                asyncio.ensure_future(
+                    self._worker(
+                        client,
+                        queues[client.name],
+                        buckets.get(client.name),
+                        executor,
+                        results,
+                    )
+                )
+                for client in self.clients
+                for _ in range(client.max_concurrency)
+            ]
+
+            try:
+                # Posts are pulled one at a time, the codecs may load them lazily
+                iterator = iter(posts)
+                while True:
+                    post = await loop.run_in_executor(executor, _next_post, iterator)
+                    if post is _END:
+                        break
+                    for queue in queues.values():
+                        await queue.put(post)
+
+                for client in self.clients:
+                    for _ in range(client.max_concurrency):
+                        await queues[client.name].put(_END)
+
+                await asyncio.gather(*workers)
+            finally:
+                for worker in workers:
+                    worker.cancel()
+
+        return results
+
+    async def _worker(
+        self,
+        client: IPlatformClient,
+        queue: "asyncio.Queue[Any]",
+        bucket: Optional[TokenBucket],
+        executor: Executor,
+        results: List[PublishResult],
+    ) -> None:
+        while True:
+            post = await queue.get()
+            if post is _END:
+                return
+
+            results.append(await self._publish_post(client, bucket, executor, post))
+
+    async def _publish_post(
+        self,
+        client: IPlatformClient,
+        bucket: Optional[TokenBucket],
+        executor: Executor,
+        post: Post,
+    ) -> PublishResult:
+        loop = asyncio.get_running_loop()
+
+        attempt = 0
+        while True:
+            attempt += 1
+            if bucket is not None:
+                await bucket.acquire()
+
+            try:
+                remote_id = await loop.run_in_executor(executor, client.publish, post)
+            except RetryablePublishError as e:
+                if attempt > self.max_retries:
+                    return PublishResult(post.filepath, client.name, None, e, attempt)
+
+                delay = self.backoff * 2 ** (attempt - 1)
+                if e.retry_after is not None:
+                    delay = e.retry_after
+                # A server asking for a long wait must not hold the worker back
+                await asyncio.sleep(min(self.max_backoff, delay))
+            except Exception as e:
+                return PublishResult(post.filepath, client.name, None, e, attempt)
+            else:
+                return PublishResult(post.filepath, client.name, remote_id, None, attempt)
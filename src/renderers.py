@@ -0,0 +1,42 @@
+import threading
+from typing import Any, Dict, Optional, Sequence
+
+from markdown import Markdown
+
+
+class MarkdownRenderer:
+    def __init__(
+        self,
+        extensions: Sequence[str] = (),
+        extension_configs: Optional[Dict[str, Dict[str, Any]]] = None,
+    ):
+        self.extensions = tuple(extensions)
+        self.extension_configs = extension_configs or dict()
+
+        # A Markdown instance is not thread-safe, so each thread gets its own
+        self._local = threading.local()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        del state["_local"]
+
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._local = threading.local()
+
+    def _get_markdown(self) -> Markdown:
+        if (md := getattr(self._local, "markdown", None)) is None:
+            md = self._local.markdown = Markdown(
+                extensions=list(self.extensions), extension_configs=self.extension_configs
+            )
+
+        return md
+
+    def render(self, text: str) -> str:
+        md = self._get_markdown()
+        try:
+            return md.convert(text)
+        finally:
+            md.reset()
@@ -0,0 +1,148 @@
+import hashlib
+import re
+from difflib import SequenceMatcher
+from typing import List, NamedTuple, Tuple
+
+_TAG_PATTERN = re.compile(r"<!--.*?-->|<(/?)([A-Za-z][A-Za-z0-9-]*)\b[^>]*?(/?)>", re.S)
+_VOID_ELEMENTS = frozenset(
+    [
+        "area",
+        "base",
+        "br",
+        "col",
+        "embed",
+        "hr",
+        "img",
+        "input",
+        "link",
+        "meta",
+        "source",
+        "track",
+        "wbr",
+    ]
+)
+# Their text is not parsed, it may contain tags
+_RAW_TEXT_ELEMENTS = frozenset(["pre", "script", "style", "textarea"])
+
+
+class ContentBlocks(NamedTuple):
+    blocks: List[str]
+    hashes: List[bytes]
+
+
+class BlockEdit(NamedTuple):
+    # Replaces the old blocks [start, end) with the new blocks
+    start: int
+    end: int
+    blocks: Tuple[str, ...]
+
+
+class ContentPatch(NamedTuple):
+    # The hash of the old blocks, the patch only applies to them
+    base_hash: bytes
+    edits: Tuple[BlockEdit, ...]
+
+
+def _append_block(blocks: List[str], text: str) -> None:
+    # Whitespace between the blocks is not significant
+    if block := text.strip():
+        blocks.append(block)
+
+
+def split_blocks(html: str) -> List[str]:
+    # The top-level elements of the HTML, and the text between them
+    blocks: List[str] = list()
+    depth = 0
+    start = position = 0
+    while match := _TAG_PATTERN.search(html, position):
+        position = match.end()
+        if depth == 0 and match.start() > start:
+            _append_block(blocks, html[start : match.start()])
+            start = match.start()
+
+        closing, name, self_closing = match.groups()
+        name = name.lower() if name else None
+        if name is None or self_closing or name in _VOID_ELEMENTS:
+            pass
+        elif closing:
+            depth = max(depth - 1, 0)
+        elif name in _RAW_TEXT_ELEMENTS:
+            end = re.compile(rf"</{name}\s*>", re.I).search(html, position)
+            position = end.end() if end else len(html)
+        else:
+            depth += 1
+
+        if depth == 0:
+            _append_block(blocks, html[start:position])
+            start = position
+    _append_block(blocks, html[start:])
+
+    return blocks
+
+
+def _hash_block(block: str) -> bytes:
+    return hashlib.blake2b(block.encode("utf-8"), digest_size=8).digest()
+
+
+def _hash_blocks(hashes: List[bytes]) -> bytes:
+    return hashlib.blake2b(b"".join(hashes), digest_size=16).digest()
+
+
+def index_blocks(html: str) -> ContentBlocks:
+    blocks = split_blocks(html)
+
+    return ContentBlocks(blocks, [_hash_block(block) for block in blocks])
+
+
+def diff_blocks(old: ContentBlocks, new: ContentBlocks) -> ContentPatch:
+    old_hashes, new_hashes = old.hashes, new.hashes
+
+    # Most edits touch a few blocks, the common ends are skipped before matching
+    prefix = 0
+    max_prefix = min(len(old_hashes), len(new_hashes))
+    while prefix < max_prefix and old_hashes[prefix] == new_hashes[prefix]:
+        prefix += 1
+    suffix = 0
+    max_suffix = max_prefix - prefix
+    while suffix < max_suffix and old_hashes[-suffix - 1] == new_hashes[-suffix - 1]:
+        suffix += 1
+
+    # Repeated blocks, like separators, must not be ignored as junk
+    matcher = SequenceMatcher(
+        None,
+        old_hashes[prefix : len(old_hashes) - suffix],
+        new_hashes[prefix : len(new_hashes) - suffix],
+        autojunk=False,
+    )
+    edits = tuple(
+        BlockEdit(
+            prefix + old_start,
+            prefix + old_end,
+            tuple(new.blocks[prefix + new_start : prefix + new_end]),
+        )
+        for tag, old_start, old_end, new_start, new_end in matcher.get_opcodes()
+        if tag != "equal"
+    )
+
+    return ContentPatch(_hash_blocks(old_hashes), edits)
+
+
+def diff_content(old_html: str, new_html: str) -> ContentPatch:
+    return diff_blocks(index_blocks(old_html), index_blocks(new_html))
+
+
+def apply_patch(old: ContentBlocks, patch: ContentPatch) -> str:
+    # An empty patch is built without the old blocks, it applies to any content
+    if patch.edits and _hash_blocks(old.hashes) != patch.base_hash:
+        raise ValueError("The patch does not apply to the content.")
+
+    blocks: List[str] = list()
+    position = 0
+    for edit in patch.edits:
+        blocks.extend(old.blocks[position : edit.start])
+        blocks.extend(edit.blocks)
+        position = edit.end
+    blocks.extend(old.blocks[position:])
+
+    # Python-Markdown separates the top-level blocks with a newline
+    return "\n".join(blocks)
@@ -0,0 +1,53 @@
+from typing import Any, Callable, Dict, Iterable, Mapping, NamedTuple, Optional, Tuple
+
+_MISSING = object()
+
+
+class MetadataField(NamedTuple):
+    name: str
+    # The metadata keys the field is read from, the first present one wins
+    keys: Tuple[str, ...]
+    # Without a default, a missing field raises a KeyError of its first key
+    default: Any = _MISSING
+    transform: Optional[Callable[[Any], Any]] = None
+
+
+def compile_field_map(
+    fields: Iterable[MetadataField],
+) -> Callable[[Mapping[str, Any]], Dict[str, Any]]:
+    # The fields are compiled into a single function, with one expression per field:
+    #   def extract(metadata):
+    #       return {"title": metadata["title"], "is_draft": metadata.get(...), ...}
+    namespace: Dict[str, Any] = dict()
+    items = []
+    for i, field in enumerate(fields):
+        if not field.keys:
+            raise ValueError(f"Field '{field.name}' has no key.")
+
+        if field.default is not _MISSING:
+            namespace[f"default_{i}"] = field.default
+
+        if len(field.keys) == 1 and field.default is _MISSING:
+            expression = f"metadata[{field.keys[0]!r}]"
+        elif len(field.keys) == 1:
+            expression = f"metadata.get({field.keys[0]!r}, default_{i})"
+        else:
+            # A missing field is reported by its first key
+            expression = (
+                f"metadata[{field.keys[0]!r}]"
+                if field.default is _MISSING
+                else f"default_{i}"
+            )
+            for key in reversed(field.keys):
+                expression = f"metadata[{key!r}] if {key!r} in metadata else {expression}"
+
+        if field.transform is not None:
+            namespace[f"transform_{i}"] = field.transform
+            expression = f"transform_{i}({expression})"
+
+        items.append(f"{field.name!r}: {expression}")
+
+    source = "def extract(metadata):\n    return {" + ", ".join(items) + "}\n"
+    exec(source, namespace)
+
+    return namespace["extract"]
@@ -0,0 +1,264 @@
+import io
+import re
+from typing import IO, Any, Dict, NamedTuple, Optional, Pattern, Tuple
+
+import frontmatter
+from frontmatter.default_handlers import (
+    BaseHandler,
+    JSONHandler,
+    TOMLHandler,
+    YAMLHandler,
+)
+
+from .parsers import FAST_PARSERS, Parsers
+
+
+class FrontmatterBlock(NamedTuple):
+    handler: BaseHandler
+    # Block with its delimiters
+    start: int
+    end: int
+    # Metadata between the delimiters
+    metadata_start: int
+    metadata_end: int
+
+
+def find_frontmatter(text: str) -> Optional[FrontmatterBlock]:
+    # Same detection and splitting as frontmatter.parse(), but with offsets
+    stripped_text = text.lstrip()
+    start = len(text) - len(stripped_text)
+
+    for pattern, handler in frontmatter.handlers.items():
+        if opening := pattern.match(stripped_text):
+            if closing := pattern.search(stripped_text, opening.end()):
+                return FrontmatterBlock(
+                    handler=handler,
+                    start=start,
+                    end=start + closing.start() + len(closing.group().rstrip()),
+                    metadata_start=start + opening.end(),
+                    metadata_end=start + closing.start(),
+                )
+            return None
+
+    return None
+
+
+class FrontmatterSplit(NamedTuple):
+    handler: BaseHandler
+    metadata_text: str
+    # Offset of the body in the file, right after the closing delimiter
+    body_offset: int
+
+
+# The delimiter lines of the handlers, as bytes patterns. They stop at the end of the
+# line, so that the split does not depend on the chunks.
+_DELIMITER_PATTERNS: Dict[type, Pattern[bytes]] = {
+    YAMLHandler: re.compile(rb"^-{3,}[^\S\n]*$", re.M),
+    JSONHandler: re.compile(rb"^(?:{|})\r?$", re.M),
+    TOMLHandler: re.compile(rb"^\+{3,}[^\S\n]*$", re.M),
+}
+_DELIMITER_STARTS = (b"-", b"{", b"+")
+
+
+def _read_chunk(file: IO[bytes], buffer: bytearray, chunk_size: int) -> bool:
+    # The chunks grow with the buffer, so that long lines are searched in linear time
+    chunk = file.read(max(chunk_size, len(buffer)))
+    buffer += chunk
+
+    return bool(chunk)
+
+
+def _skip_blank_lines(metadata: bytes) -> bytes:
+    # The "\s*$" delimiters of frontmatter also match the blank lines after them, up
+    # to the last newline
+    blank = len(metadata) - len(metadata.lstrip())
+
+    return metadata[max(metadata.rfind(b"\n", 0, blank), 0) :]
+
+
+def scan_frontmatter(
+    file: IO[bytes], chunk_size: int = 4096
+) -> Optional[FrontmatterSplit]:
+    # Reads the file by chunks, and stops at the closing delimiter, the body is not read
+    buffer = bytearray()
+    offset = 0
+    while not buffer:
+        if not _read_chunk(file, buffer, chunk_size):
+            return None
+        # The delimiter is the first non whitespace character
+        stripped = len(buffer) - len(buffer.lstrip())
+        del buffer[:stripped]
+        offset += stripped
+
+    if not buffer.startswith(_DELIMITER_STARTS):
+        return None
+
+    eof = False
+    while buffer.find(b"\n") == -1 and not eof:
+        eof = not _read_chunk(file, buffer, chunk_size)
+
+    for handler in frontmatter.handlers.values():
+        pattern = _DELIMITER_PATTERNS.get(type(handler))
+        if pattern is not None and (opening := pattern.match(buffer)):
+            break
+    else:
+        return None
+
+    search_start = opening.end()
+    while True:
+        closing = pattern.search(buffer, search_start)
+        if closing and (eof or closing.end() < len(buffer)):
+            metadata = bytes(buffer[opening.end() : closing.start()])
+            if not isinstance(handler, JSONHandler):
+                metadata = _skip_blank_lines(metadata)
+            return FrontmatterSplit(
+                handler=handler,
+                metadata_text=metadata.decode("utf-8"),
+                body_offset=offset + closing.end(),
+            )
+        if eof:
+            return None
+
+        # The last line may be incomplete, it is searched again with the next chunk
+        search_start = max(search_start, buffer.rfind(b"\n") + 1)
+        eof = not _read_chunk(file, buffer, chunk_size)
+
+
+def read_frontmatter(filepath: str) -> Optional[Tuple[BaseHandler, str]]:
+    with open(filepath, "rb") as file:
+        split = scan_frontmatter(file)
+
+    return (split.handler, split.metadata_text) if split is not None else None
+
+
+def _entry_pattern(handler: BaseHandler, key: str) -> Optional[Pattern[str]]:
+    if isinstance(handler, YAMLHandler):
+        # The key line and its indented continuation lines
+        return re.compile(rf"^{re.escape(key)}[ \t]*:[^\n]*(?:\n[ \t]+[^\n]*)*", re.M)
+    elif isinstance(handler, TOMLHandler):
+        # The table header and every line until the next table
+        return re.compile(rf"^\[{re.escape(key)}\][^\n]*(?:\n(?![ \t]*\[)[^\n]*)*", re.M)
+    else:
+        return None
+
+
+def _load(handler: BaseHandler, text: str, parsers: Parsers) -> Any:
+    if isinstance(handler, YAMLHandler):
+        return parsers.load_yaml(text)
+    elif isinstance(handler, TOMLHandler):
+        return parsers.load_toml(text)
+    elif isinstance(handler, JSONHandler):
+        return parsers.load_json(text)
+    else:
+        return handler.load(text)
+
+
+def load_metadata(
+    handler: BaseHandler, metadata_text: str, parsers: Parsers = FAST_PARSERS
+) -> Any:
+    # JSONHandler.split() keeps the braces, which are the delimiters
+    if isinstance(handler, JSONHandler):
+        metadata_text = "{" + metadata_text + "}"
+
+    return _load(handler, metadata_text, parsers)
+
+
+def parse_frontmatter(
+    text: str, parsers: Parsers = FAST_PARSERS
+) -> Tuple[Dict[str, Any], str]:
+    # Same as frontmatter.parse(), with the given parsers
+    text = text.strip()
+    handler = frontmatter.detect_format(text, frontmatter.handlers)
+    if handler is None:
+        return dict(), text
+
+    try:
+        metadata_text, content = handler.split(text)
+    except ValueError:
+        return dict(), text
+
+    metadata = _load(handler, metadata_text, parsers)
+
+    return metadata if isinstance(metadata, dict) else dict(), content.strip()
+
+
+def _translate_newlines(text: str) -> str:
+    # Same newline translation as Path.read_text()
+    return text.replace("\r\n", "\n").replace("\r", "\n")
+
+
+def parse_frontmatter_bytes(
+    data: bytes, parsers: Parsers = FAST_PARSERS
+) -> Tuple[Dict[str, Any], str]:
+    # Same as parse_frontmatter() on the decoded data, only the body is decoded as a
+    # whole, and it is sliced from the data without a copy
+    split = scan_frontmatter(io.BytesIO(data))
+    if split is None:
+        return parse_frontmatter(_translate_newlines(str(data, "utf-8")), parsers)
+
+    metadata = load_metadata(
+        split.handler, _translate_newlines(split.metadata_text), parsers
+    )
+    body = memoryview(data)[split.body_offset :]
+    content = _translate_newlines(str(body, "utf-8")).strip()
+
+    return metadata if isinstance(metadata, dict) else dict(), content
+
+
+def _render_block(handler: BaseHandler, metadata: Dict[str, Any]) -> str:
+    exported_metadata = handler.export(metadata)
+    if isinstance(handler, JSONHandler):
+        return exported_metadata
+
+    return f"{handler.START_DELIMITER}\n{exported_metadata}\n{handler.END_DELIMITER}"
+
+
+def _newline(text: str) -> str:
+    # The newline of the first line, the exported metadata only has "\n" newlines
+    end = text.find("\n")
+
+    return "\r\n" if end > 0 and text[end - 1] == "\r" else "\n"
+
+
+def set_metadata_entry(text: str, key: str, value: Any) -> str:
+    newline = _newline(text)
+    block = find_frontmatter(text)
+    if block is None:
+        block_text = _render_block(YAMLHandler(), {key: value})
+        return block_text.replace("\n", newline) + 2 * newline + text
+
+    metadata_text = text[block.metadata_start : block.metadata_end]
+    metadata = load_metadata(block.handler, metadata_text) or dict()
+    expected_metadata = dict(metadata, **{key: value})
+
+    # Rewrite only the entry, as long as the result parses to the expected metadata
+    if (pattern := _entry_pattern(block.handler, key)) is not None:
+        entry = block.handler.export({key: value}).strip().replace("\n", newline)
+        if match := pattern.search(metadata_text):
+            entry_end = match.start() + len(match.group().rstrip())
+            new_metadata_text = (
+                metadata_text[: match.start()] + entry + metadata_text[entry_end:]
+            )
+        else:
+            content_end = len(metadata_text.rstrip())
+            new_metadata_text = (
+                metadata_text[:content_end] + newline + entry + metadata_text[content_end:]
+            )
+
+        try:
+            new_metadata = load_metadata(block.handler, new_metadata_text)
+        except Exception:
+            new_metadata = None
+
+        if new_metadata == expected_metadata:
+            return (
+                text[: block.metadata_start]
+                + new_metadata_text
+                + text[block.metadata_end :]
+            )
+
+    return (
+        text[: block.start]
+        + _render_block(block.handler, expected_metadata).replace("\n", newline)
+        + text[block.end :]
+    )
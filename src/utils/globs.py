@@ -0,0 +1,123 @@
+import re
+from typing import Iterable, List, Pattern, Sequence
+
+# A path segment that glob() does not consider hidden
+_VISIBLE_SEGMENT: str = r"[^/.][^/]*"
+
+
+def _translate_segment(segment: str) -> str:
+    regex, i, n = "", 0, len(segment)
+    while i < n:
+        char = segment[i]
+        i += 1
+        if char == "*":
+            regex += "[^/]*"
+        elif char == "?":
+            regex += "[^/]"
+        elif char == "[":
+            j = i
+            if j < n and segment[j] in "!^":
+                j += 1
+            if j < n and segment[j] == "]":
+                j += 1
+            while j < n and segment[j] != "]":
+                j += 1
+            if j >= n:
+                regex += re.escape(char)
+            else:
+                stuff = segment[i:j].replace("\\", "\\\\")
+                if stuff[0] in "!^":
+                    stuff = "^" + stuff[1:]
+                regex += f"[{stuff}]"
+                i = j + 1
+        elif char == "\\" and i < n:
+            regex += re.escape(segment[i])
+            i += 1
+        else:
+            regex += re.escape(char)
+
+    # Like glob(), wildcards never match a leading dot
+    if re.search(r"[*?[]", segment) and not segment.startswith("."):
+        regex = r"(?!\.)" + regex
+
+    return regex
+
+
+def translate_glob(pattern: str) -> str:
+    segments = [segment for segment in pattern.strip("/").split("/") if segment]
+
+    regex: List[str] = []
+    need_separator = False
+    for i, segment in enumerate(segments):
+        if segment == "**":
+            if i == len(segments) - 1:
+                if need_separator:
+                    regex.append(f"(?:/{_VISIBLE_SEGMENT})*")
+                else:
+                    regex.append(f"{_VISIBLE_SEGMENT}(?:/{_VISIBLE_SEGMENT})*")
+            else:
+                if need_separator:
+                    regex.append("/")
+                regex.append(f"(?:{_VISIBLE_SEGMENT}/)*")
+                need_separator = False
+        else:
+            if need_separator:
+                regex.append("/")
+            regex.append(_translate_segment(segment))
+            need_separator = True
+
+    return "".join(regex)
+
+
+class IgnoreMatcher:
+    def __init__(self, patterns: Sequence[str]):
+        self.patterns = tuple(patterns)
+
+        alternatives: List[str] = []
+        self._negated: List[bool] = []
+        tree_alternatives: List[str] = []
+        for pattern in self.patterns:
+            pattern = pattern.strip()
+            if not pattern or pattern.startswith("#"):
+                continue
+
+            negated = pattern.startswith("!")
+            if negated:
+                pattern = pattern[1:]
+                # A negation may re-include files below any previous pattern
+                tree_alternatives.clear()
+            elif pattern.startswith("\\!") or pattern.startswith("\\#"):
+                pattern = pattern[1:]
+
+            if regex := translate_glob(pattern):
+                alternatives.append(regex)
+                self._negated.append(negated)
+                # 'dir/**' also matches every visible path below 'dir'
+                if not negated and pattern.rstrip("/").split("/")[-1] == "**":
+                    tree_alternatives.append(regex)
+
+        # The last matching pattern wins, so alternatives are tried in reverse order
+        self._regex: Pattern[str] = re.compile(
+            "|".join(
+                f"(?P<_{i}>{regex})"
+                for i, regex in reversed(list(enumerate(alternatives)))
+            )
+            or r"(?!)"
+        )
+        self._tree_regex: Pattern[str] = re.compile(
+            "|".join(f"(?:{regex})" for regex in tree_alternatives) or r"(?!)"
+        )
+
+    def is_ignored(self, relpath: str) -> bool:
+        match = self._regex.fullmatch(relpath)
+        if match is None or match.lastgroup is None:
+            return False
+
+        return not self._negated[int(match.lastgroup[1:])]
+
+    def is_tree_ignored(self, reldir: str) -> bool:
+        # True when the directory and every visible path below it are ignored
+        return self._tree_regex.fullmatch(reldir) is not None
+
+    def filter(self, relpaths: Iterable[str]) -> List[str]:
+        return [relpath for relpath in relpaths if not self.is_ignored(relpath)]
@@ -1,6 +1,35 @@
-from typing import Any, Dict, Sequence
+import os
+import tempfile
+import threading
+from types import MappingProxyType
+from typing import Any, Dict, Mapping, Optional, Sequence
 from urllib.parse import urlparse
 
+_umask: Optional[int] = None
+_umask_lock = threading.Lock()
+
+
+def _get_umask() -> int:
+    global _umask
+    # Read once, on the first write instead of on import
+    with _umask_lock:
+        if _umask is None:
+            try:
+                with open("/proc/self/status", encoding="ascii") as status:
+                    for line in status:
+                        if line.startswith("Umask:"):
+                            _umask = int(line.split()[1], 8)
+            except OSError:
+                pass
+
+            if _umask is None:
+                # Elsewhere, the umask can only be read by changing it. A restrictive
+                # mask keeps the files created meanwhile by other threads private.
+                _umask = os.umask(0o077)
+                os.umask(_umask)
+
+        return _umask
+
 
 def is_absolute_url(maybe_url: str) -> bool:
     url_parsed = urlparse(maybe_url)
@@ -24,3 +53,76 @@ def merge_nested_dicts(a: Dict[Any, Any], b: Dict[Any, Any]) -> Dict[Any, Any]:
             a[key] = b[key]
 
     return a
+
+
+def get_nested_value(a: Dict[Any, Any], keys: Sequence[Any], default: Any = None) -> Any:
+    value: Any = a
+    for key in keys:
+        if not isinstance(value, dict) or key not in value:
+            return default
+        value = value[key]
+
+    return value
+
+
+def freeze_nested(value: Any) -> Any:
+    if isinstance(value, dict):
+        return MappingProxyType({key: freeze_nested(item) for key, item in value.items()})
+    elif isinstance(value, list):
+        return tuple(freeze_nested(item) for item in value)
+    else:
+        return value
+
+
+def _write_temp_file(filepath: str, data: bytes) -> str:
+    # Written next to the file, so that it can be renamed over it
+    dirname, basename = os.path.split(os.path.abspath(filepath))
+    fd, tmp_filepath = tempfile.mkstemp(prefix=f".{basename}.", dir=dirname)
+    try:
+        with os.fdopen(fd, "wb") as file:
+            file.write(data)
+        if os.path.exists(filepath):
+            os.chmod(tmp_filepath, os.stat(filepath).st_mode)
+        else:
+            os.chmod(tmp_filepath, 0o666 & ~_get_umask())
+    except BaseException:
+        os.unlink(tmp_filepath)
+        raise
+
+    return tmp_filepath
+
+
+def atomic_write_bytes(filepath: str, data: bytes) -> None:
+    tmp_filepath = _write_temp_file(filepath, data)
+    try:
+        os.replace(tmp_filepath, filepath)
+    except BaseException:
+        os.unlink(tmp_filepath)
+        raise
+
+
+def atomic_write_many(files: Mapping[str, bytes]) -> None:
+    # Every file is written, or the files written so far are restored
+    tmp_filepaths: Dict[str, str] = dict()
+    originals: Dict[str, Optional[bytes]] = dict()
+    try:
+        for filepath, data in files.items():
+            tmp_filepaths[filepath] = _write_temp_file(filepath, data)
+
+        for filepath, tmp_filepath in tmp_filepaths.items():
+            try:
+                with open(filepath, "rb") as file:
+                    originals[filepath] = file.read()
+            except FileNotFoundError:
+                originals[filepath] = None
+            os.replace(tmp_filepath, filepath)
+    except BaseException:
+        for filepath, original in originals.items():
+            if original is not None:
+                atomic_write_bytes(filepath, original)
+            elif os.path.isfile(filepath):
+                os.unlink(filepath)
+        for tmp_filepath in tmp_filepaths.values():
+            if os.path.exists(tmp_filepath):
+                os.unlink(tmp_filepath)
+        raise
@@ -0,0 +1,89 @@
+import json
+from typing import Any, Callable, Dict, NamedTuple
+
+import toml
+import yaml
+
+try:
+    from yaml import CSafeLoader
+except ImportError:  # PyYAML built without libyaml
+    CSafeLoader = None  # type: ignore
+
+try:
+    import orjson
+except ImportError:
+    orjson = None  # type: ignore
+
+try:
+    import tomllib
+except ImportError:  # Python < 3.11
+    try:
+        import tomli as tomllib  # type: ignore
+    except ImportError:
+        tomllib = None  # type: ignore
+
+
+class Parsers(NamedTuple):
+    name: str
+    load_yaml: Callable[[str], Any]
+    load_toml: Callable[[str], Dict[str, Any]]
+    load_json: Callable[[str], Any]
+
+
+def _load_yaml(text: str) -> Any:
+    return yaml.safe_load(text)
+
+
+def _load_toml(text: str) -> Dict[str, Any]:
+    return toml.loads(text)
+
+
+def _load_json(text: str) -> Any:
+    return json.loads(text)
+
+
+# The accelerated parsers give way to the pure ones on invalid documents,
+# so errors are raised, and worded, as with the pure parsers. tomllib follows
+# TOML 1.0 and toml TOML 0.5, so the fast backend also accepts the 1.0 documents
+# that toml rejects, like mixed-type arrays.
+
+
+def _fast_load_yaml(text: str) -> Any:
+    try:
+        return yaml.load(text, Loader=CSafeLoader)
+    except yaml.YAMLError:
+        return _load_yaml(text)
+
+
+def _fast_load_toml(text: str) -> Dict[str, Any]:
+    try:
+        return tomllib.loads(text)
+    except tomllib.TOMLDecodeError:
+        return _load_toml(text)
+
+
+def _fast_load_json(text: str) -> Any:
+    try:
+        return orjson.loads(text)
+    except orjson.JSONDecodeError:
+        # Also covers what orjson does not support, like NaN or 64+ bit integers
+        return _load_json(text)
+
+
+PURE_PARSERS = Parsers("pure", _load_yaml, _load_toml, _load_json)
+
+FAST_PARSERS = Parsers(
+    "fast",
+    _fast_load_yaml if CSafeLoader is not None else _load_yaml,
+    _fast_load_toml if tomllib is not None else _load_toml,
+    _fast_load_json if orjson is not None else _load_json,
+)
+
+PARSER_BACKENDS = {parsers.name: parsers for parsers in [FAST_PARSERS, PURE_PARSERS]}
+
+
+def get_parsers(backend: str) -> Parsers:
+    try:
+        return PARSER_BACKENDS[backend]
+    except KeyError:
+        raise ValueError(f"Unknown parser backend '{backend}'.")
@@ -0,0 +1,226 @@
+from enum import Enum
+from functools import partial
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+    Type,
+    TypeVar,
+)
+from uuid import UUID
+
+from pydantic import BaseModel, ValidationError, validate_model
+from pydantic.error_wrappers import ErrorWrapper
+from pydantic.fields import SHAPE_FROZENSET, SHAPE_SINGLETON, ModelField
+from pydantic.utils import IMMUTABLE_NON_COLLECTIONS_TYPES, lenient_issubclass
+
+Model = TypeVar("Model", bound=BaseModel)
+
+_Coercion = Callable[[Any], Any]
+# Whether validating the value would leave it unchanged
+_Check = Callable[[Any], bool]
+
+
+class _CompiledModel(NamedTuple):
+    coercions: Dict[str, _Coercion]
+    # The factories of the default values of the optional fields
+    defaults: Dict[str, Callable[[], Any]]
+    private_defaults: Dict[str, Callable[[], Any]]
+    # None when the field is always validated
+    checks: Dict[str, Optional[_Check]]
+    # The fields holding a single nested model
+    nested_models: Dict[str, Type[BaseModel]]
+
+
+_compiled_models: Dict[type, _CompiledModel] = dict()
+
+
+def _identity(value: Any) -> Any:
+    return value
+
+
+def _to_frozenset(value: Any) -> Any:
+    return frozenset(value) if isinstance(value, (list, tuple, set)) else value
+
+
+def _to_uuid(value: Any) -> Any:
+    # A value that cannot be converted is left to the validation
+    try:
+        return UUID(value) if isinstance(value, str) else value
+    except ValueError:
+        return value
+
+
+def _construct_nested(model_class: type, value: Any) -> Any:
+    return construct_trusted(model_class, value) if isinstance(value, dict) else value
+
+
+def _is_type(type_: type, value: Any) -> bool:
+    return type(value) is type_
+
+
+def _is_instance(type_: type, value: Any) -> bool:
+    return isinstance(value, type_)
+
+
+def _is_string(value: Any) -> bool:
+    return isinstance(value, str) and not isinstance(value, Enum)
+
+
+def _is_exact_model(model_class: type, value: Any) -> bool:
+    return isinstance(value, model_class) and is_exact(model_class, value.__dict__)
+
+
+def _is_frozenset_of(item_check: _Check, value: Any) -> bool:
+    return type(value) is frozenset and all(map(item_check, value))
+
+
+def _is_none_or(check: _Check, value: Any) -> bool:
+    return value is None or check(value)
+
+
+def _exact_type_check(type_: Any) -> Optional[_Check]:
+    if type_ in (str, bool, int, float, UUID):
+        return partial(_is_type, type_)
+    elif lenient_issubclass(type_, BaseModel):
+        return partial(_is_exact_model, type_)
+    elif hasattr(type_, "__get_validators__"):
+        # Constrained strings, like HttpUrl, are only built by the validation
+        return partial(_is_instance, type_)
+    elif lenient_issubclass(type_, str):
+        # Validated as strings, like path.Path
+        return _is_string
+    else:
+        return None
+
+
+def _compile_field(field: ModelField) -> Tuple[_Coercion, Optional[_Check]]:
+    type_ = field.type_
+    coercion: _Coercion = _identity
+    check = _exact_type_check(type_)
+
+    if field.shape == SHAPE_FROZENSET:
+        coercion = _to_frozenset
+        if check is not None:
+            check = partial(_is_frozenset_of, check)
+    elif field.shape != SHAPE_SINGLETON:
+        check = None
+    elif type_ is UUID:
+        coercion = _to_uuid
+    elif lenient_issubclass(type_, BaseModel):
+        coercion = partial(_construct_nested, type_)
+
+    if check is not None and field.allow_none:
+        check = partial(_is_none_or, check)
+
+    return coercion, check
+
+
+def _compile(model_class: type) -> _CompiledModel:
+    if (compiled_model := _compiled_models.get(model_class)) is None:
+        coercions, defaults, checks, nested_models = dict(), dict(), dict(), dict()
+        for name, field in model_class.__fields__.items():  # type: ignore
+            coercions[name], checks[name] = _compile_field(field)
+            if not field.required:
+                defaults[name] = field.get_default
+            if field.shape == SHAPE_SINGLETON and lenient_issubclass(
+                field.type_, BaseModel
+            ):
+                nested_models[name] = field.type_
+
+        private_attrs = model_class.__private_attributes__  # type: ignore
+        private_defaults: Dict[str, Callable[[], Any]] = dict()
+        for name, private_attr in private_attrs.items():
+            default = private_attr.default
+            # Immutable defaults are shared, instead of copied each time
+            if private_attr.default_factory is None and (
+                type(default) in IMMUTABLE_NON_COLLECTIONS_TYPES
+            ):
+                private_defaults[name] = partial(_identity, default)
+            else:
+                private_defaults[name] = private_attr.get_default
+
+        compiled_model = _compiled_models[model_class] = _CompiledModel(
+            coercions, defaults, private_defaults, checks, nested_models
+        )
+
+    return compiled_model
+
+
+def construct_trusted(model_class: Type[Model], values: Dict[str, Any]) -> Model:
+    # Like model_class(**values), with the common coercions only and no validation.
+    # Same as model_class.construct(), without going through every field.
+    compiled_model = _compile(model_class)
+    coercions = compiled_model.coercions
+
+    fields = {
+        name: coercions[name](value) if name in coercions else value
+        for name, value in values.items()
+    }
+    fields_set = set(fields)
+    for name, default in compiled_model.defaults.items():
+        if name not in fields:
+            fields[name] = default()
+
+    return construct_exact(model_class, fields, fields_set)
+
+
+def construct_exact(
+    model_class: Type[Model], fields: Dict[str, Any], fields_set: Set[str]
+) -> Model:
+    # Every field is given, with its exact type
+    model = model_class.__new__(model_class)
+    object.__setattr__(model, "__dict__", fields)
+    object.__setattr__(model, "__fields_set__", fields_set)
+    for name, default in _compile(model_class).private_defaults.items():
+        object.__setattr__(model, name, default())
+
+    return model
+
+
+def is_exact(model_class: type, values: Dict[str, Any]) -> bool:
+    checks = _compile(model_class).checks
+    if values.keys() != checks.keys():
+        return False
+
+    for name, check in checks.items():
+        if check is None or not check(values[name]):
+            return False
+
+    return True
+
+
+def validate_values(
+    model_class: type, values: Dict[str, Any]
+) -> Tuple[Dict[str, Any], Optional[ValidationError]]:
+    # Most trusted values are already exact, only the others go through pydantic
+    if is_exact(model_class, values):
+        return values, None
+
+    # pydantic keeps the nested model instances as they are, they are validated here
+    values = dict(values)
+    nested_errors: List[Any] = list()
+    for name, nested_model in _compile(model_class).nested_models.items():
+        if not isinstance(value := values.get(name), nested_model):
+            continue
+
+        nested_values, nested_error = validate_values(type(value), value.__dict__)
+        if nested_error is not None:
+            nested_errors.append(ErrorWrapper(nested_error, loc=name))
+        elif nested_values is not value.__dict__:
+            values[name] = construct_exact(
+                type(value), nested_values, set(value.__fields_set__)
+            )
+
+    validated_values, _, error = validate_model(model_class, values)  # type: ignore
+    if nested_errors:
+        if error is not None:
+            nested_errors.extend(error.raw_errors)
+        error = ValidationError(nested_errors, model_class)
+
+    return validated_values, error
@@ -0,0 +1,366 @@
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import sys
+import time
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Set, Tuple, Union
+
+from path import Path
+
+from .config_loaders import IConfigLoader
+from .post_codecs import IPostCodec, Post
+
+# From <sys/inotify.h>
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_DELETE_SELF = 0x00000400
+_IN_MOVE_SELF = 0x00000800
+_IN_Q_OVERFLOW = 0x00004000
+_IN_IGNORED = 0x00008000
+_IN_ONLYDIR = 0x01000000
+_IN_ISDIR = 0x40000000
+
+_IN_WATCH_MASK = (
+    _IN_CLOSE_WRITE
+    | _IN_MOVED_FROM
+    | _IN_MOVED_TO
+    | _IN_CREATE
+    | _IN_DELETE
+    | _IN_DELETE_SELF
+    | _IN_MOVE_SELF
+    | _IN_ONLYDIR
+)
+
+_INOTIFY_EVENT = struct.Struct("iIII")
+
+
+class WatchEvent(NamedTuple):
+    changed: List[Post]
+    removed: List[Path]
+    errors: Dict[Path, Exception]
+    # The reloaded config, when a config file has changed
+    config: Optional[Dict[Any, Any]]
+
+
+class _InotifyBackend:
+    def __init__(self) -> None:
+        if not sys.platform.startswith("linux"):
+            raise OSError(errno.ENOSYS, "inotify is only available on Linux")
+
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error))
+
+        # Watch descriptor -> (directory, whether its subdirectories are watched)
+        self._watches: Dict[int, Tuple[str, bool]] = dict()
+
+    def add_watch(self, dirpath: str, recursive: bool) -> None:
+        wd = self._libc.inotify_add_watch(
+            self._fd, os.fsencode(dirpath), _IN_WATCH_MASK
+        )
+        if wd < 0:
+            error = ctypes.get_errno()
+            # The directory may have been removed since it was listed
+            if error in (errno.ENOENT, errno.ENOTDIR):
+                return
+            raise OSError(error, os.strerror(error), dirpath)
+
+        self._watches[wd] = (dirpath, recursive)
+
+        if recursive:
+            try:
+                with os.scandir(dirpath) as it:
+                    subdirs = [
+                        entry.path for entry in it if entry.is_dir(follow_symlinks=False)
+                    ]
+            except (FileNotFoundError, NotADirectoryError):
+                return
+            for subdir in subdirs:
+                self.add_watch(subdir, recursive)
+
+    def read(self, timeout: Optional[float]) -> Set[str]:
+        if not select.select([self._fd], [], [], timeout)[0]:
+            return set()
+
+        data = b""
+        while True:
+            try:
+                data += os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                break
+
+        paths: Set[str] = set()
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = _INOTIFY_EVENT.unpack_from(data, offset)
+            offset += _INOTIFY_EVENT.size
+            name = data[offset : offset + length]
+            offset += length
+
+            if mask & _IN_Q_OVERFLOW:
+                # Events were lost, every watched directory must be checked again
+                paths.update(dirpath for dirpath, _ in self._watches.values())
+                continue
+            if mask & _IN_IGNORED:
+                self._watches.pop(wd, None)
+                continue
+            if wd not in self._watches:
+                continue
+
+            dirpath, recursive = self._watches[wd]
+            if mask & (_IN_DELETE_SELF | _IN_MOVE_SELF):
+                paths.add(dirpath)
+                continue
+
+            path = os.path.join(dirpath, os.fsdecode(name.rstrip(b"\0")))
+            if mask & _IN_ISDIR:
+                if recursive and mask & (_IN_CREATE | _IN_MOVED_TO):
+                    self.add_watch(path, recursive)
+            elif mask & _IN_CREATE:
+                # The file is reported when it is closed after writing
+                continue
+            paths.add(path)
+
+        return paths
+
+    def close(self) -> None:
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+class _PollingBackend:
+    def __init__(self, interval: float) -> None:
+        self.interval = interval
+
+        self._watches: Dict[str, bool] = dict()
+        self._stats: Dict[str, Tuple[int, int]] = dict()
+
+    def _scan(
+        self, dirpath: str, recursive: bool, stats: Dict[str, Tuple[int, int]]
+    ) -> None:
+        try:
+            with os.scandir(dirpath) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if recursive:
+                                self._scan(entry.path, recursive, stats)
+                        else:
+                            stat = entry.stat()
+                            stats[entry.path] = (stat.st_mtime_ns, stat.st_size)
+                    except FileNotFoundError:
+                        continue
+        except (FileNotFoundError, NotADirectoryError):
+            return
+
+    def _scan_all(self) -> Dict[str, Tuple[int, int]]:
+        stats: Dict[str, Tuple[int, int]] = dict()
+        for dirpath, recursive in self._watches.items():
+            self._scan(dirpath, recursive, stats)
+
+        return stats
+
+    def add_watch(self, dirpath: str, recursive: bool) -> None:
+        self._watches[dirpath] = self._watches.get(dirpath, False) or recursive
+        self._stats = self._scan_all()
+
+    def read(self, timeout: Optional[float]) -> Set[str]:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            interval = self.interval
+            if deadline is not None:
+                interval = max(0, min(interval, deadline - time.monotonic()))
+            time.sleep(interval)
+
+            stats = self._scan_all()
+            paths = {
+                path
+                for path in stats.keys() | self._stats.keys()
+                if stats.get(path) != self._stats.get(path)
+            }
+            self._stats = stats
+
+            if paths or (deadline is not None and time.monotonic() >= deadline):
+                return paths
+
+    def close(self) -> None:
+        self._watches.clear()
+        self._stats.clear()
+
+
+_Backend = Union[_InotifyBackend, _PollingBackend]
+
+
+class PostWatcher:
+    def __init__(
+        self,
+        codec: IPostCodec,
+        config_loader: Optional[IConfigLoader] = None,
+        debounce: float = 0.05,
+        backend: str = "auto",
+        poll_interval: float = 0.1,
+    ):
+        self.codec = codec
+        self.config_loader = config_loader
+        self.debounce = debounce
+
+        self.posts: Dict[Path, Post] = dict()
+        self.config: Optional[Dict[Any, Any]] = None
+
+        self._postsdir = Path(codec.postsdir)
+        self._configdir = (
+            config_loader.workdir / "config" if config_loader is not None else None
+        )
+
+        if backend == "auto":
+            try:
+                self._backend: _Backend = self._watch(_InotifyBackend())
+            except (OSError, AttributeError):
+                # No inotify, or not enough inotify watches for the site
+                self._backend = self._watch(_PollingBackend(poll_interval))
+        elif backend == "inotify":
+            self._backend = self._watch(_InotifyBackend())
+        elif backend == "polling":
+            self._backend = self._watch(_PollingBackend(poll_interval))
+        else:
+            raise ValueError(f"Unknown watch backend '{backend}'.")
+
+    def _watch(self, backend: _Backend) -> _Backend:
+        try:
+            backend.add_watch(self._postsdir, recursive=True)
+            if self.config_loader is not None and self._configdir is not None:
+                backend.add_watch(self.config_loader.workdir, recursive=False)
+                backend.add_watch(self._configdir, recursive=True)
+        except BaseException:
+            backend.close()
+            raise
+
+        return backend
+
+    def __enter__(self) -> "PostWatcher":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._backend.close()
+
+    def load(self) -> WatchEvent:
+        result = self.codec.load_many(self.codec.iter_posts())
+        self.posts = {post.filepath: post for post in result.posts}
+
+        errors: Dict[Path, Exception] = dict(result.errors)
+        config = self._load_config(errors) if self.config_loader is not None else None
+
+        return WatchEvent(
+            changed=result.posts, removed=list(), errors=errors, config=config
+        )
+
+    def _load_config(self, errors: Dict[Path, Exception]) -> Optional[Dict[Any, Any]]:
+        assert self.config_loader is not None
+        # Only the changed config files are parsed again by HugoConfigLoader
+        try:
+            self.config = self.config_loader.load()
+        except Exception as e:
+            errors[self.config_loader.workdir / "config"] = e
+            return None
+
+        return self.config
+
+    def _is_post(self, path: Path) -> bool:
+        relpath = path.relpath(self._postsdir)
+        # Hidden entries are skipped, like iter_posts() does
+        if relpath.startswith(os.pardir) or any(
+            part.startswith(".") for part in relpath.splitall()[1:]
+        ):
+            return False
+
+        return self.codec.has_content_format(path) and self.codec.is_publishable(path)
+
+    def _is_config(self, path: Path) -> bool:
+        if self.config_loader is None or self._configdir is None:
+            return False
+
+        return (
+            (path.parent == self.config_loader.workdir and path.stem == "config")
+            or path == self._configdir
+            or path.startswith(self._configdir + os.sep)
+        )
+
+    def _affected_posts(self, path: Path) -> Set[Path]:
+        # A directory stands for every post below it, old and new
+        prefix = path + os.sep
+        affected = {filepath for filepath in self.posts if filepath.startswith(prefix)}
+        if path.isdir():
+            affected.update(
+                Path(dirpath) / filename
+                for dirpath, _, filenames in os.walk(path)
+                for filename in filenames
+            )
+        else:
+            affected.add(path)
+
+        return {filepath for filepath in affected if self._is_post(filepath)}
+
+    def _apply(self, paths: Set[str]) -> WatchEvent:
+        event = WatchEvent(changed=list(), removed=list(), errors=dict(), config=None)
+
+        affected_posts: Set[Path] = set()
+        config_changed = False
+        for path in map(Path, paths):
+            if self._is_config(path):
+                config_changed = True
+                # config/ may have been created after the watch started
+                if path == self._configdir and path.isdir():
+                    self._backend.add_watch(path, recursive=True)
+            elif path == self._postsdir or path.startswith(self._postsdir + os.sep):
+                affected_posts.update(self._affected_posts(path))
+
+        for filepath in sorted(affected_posts):
+            try:
+                post = self.codec.load(filepath)
+            except (FileNotFoundError, IsADirectoryError):
+                if self.posts.pop(filepath, None) is not None:
+                    event.removed.append(filepath)
+            except Exception as e:
+                # A post being saved may be invalid, it must not stop the watch
+                self.posts.pop(filepath, None)
+                event.errors[filepath] = e
+            else:
+                self.posts[filepath] = post
+                event.changed.append(post)
+
+        if config_changed:
+            event = event._replace(config=self._load_config(event.errors))
+
+        return event
+
+    def poll(self, timeout: Optional[float] = None) -> Optional[WatchEvent]:
+        paths = self._backend.read(timeout)
+        if not paths:
+            return None
+
+        # Editors save in bursts of events, which are handled once quiet
+        while more_paths := self._backend.read(self.debounce):
+            paths |= more_paths
+
+        event = self._apply(paths)
+        if not (event.changed or event.removed or event.errors or event.config):
+            return None
+
+        return event
+
+    def watch(self) -> Iterator[WatchEvent]:
+        while True:
+            if (event := self.poll()) is not None:
+                yield event
@@ -1,3 +1,23 @@
+from uuid import uuid4
+
+import pytest
 import requests_cache
+from path import Path
+
+from src.post_codecs import Post, PostPublisher
 
 requests_cache.install_cache()
+
+
+@pytest.fixture
+def expected_post(scope="function"):
+    return Post(
+        filepath=Path(),
+        post_publisher=PostPublisher(id=uuid4()),
+        title="My First Post",
+        canonical_url=None,
+        content="<h1>Content</h1><p>paragraph</p>",
+        tags=frozenset(["tag1", "tag2"]),
+        categories=frozenset(["cat1", "cat2"]),
+        is_draft=True,
+    )
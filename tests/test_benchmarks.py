@@ -0,0 +1,129 @@
+import json
+
+from path import Path
+
+from benchmarks.run import find_regressions, main, run_benchmarks
+from benchmarks.sites import generate_hugo_site
+from src.config_loaders import HugoConfigLoader
+from src.post_codecs import HugoPostCodec
+
+
+class TestSyntheticSite:
+    def test_posts_can_be_loaded(self, tmpdir):
+        site = generate_hugo_site(Path(tmpdir), posts=6, paragraphs=3)
+        codec = HugoPostCodec(site.postsdir)
+
+        posts = [codec.load(filepath) for filepath in site.posts]
+
+        assert len(posts) == 6
+        assert [post.is_draft for post in posts] == [False, True, False] * 2
+        assert sorted(codec.iter_posts()) == sorted(site.posts)
+
+    def test_frontmatter_formats(self, tmpdir):
+        site = generate_hugo_site(Path(tmpdir), posts=3, frontmatter_formats=["toml"])
+
+        assert all(filepath.read_text().startswith("+++") for filepath in site.posts)
+
+    def test_config(self, tmpdir):
+        split_site = generate_hugo_site(Path(tmpdir) / "split", posts=0)
+        single_site = generate_hugo_site(
+            Path(tmpdir) / "single", posts=0, split_config=False
+        )
+
+        split_config = HugoConfigLoader(split_site.workdir).load()
+        single_config = HugoConfigLoader(single_site.workdir).load()
+
+        assert split_config["params"] == single_config["params"]
+        assert split_config["menus"] == single_config["menus"]
+
+    def test_reproducible(self, tmpdir):
+        first_site = generate_hugo_site(Path(tmpdir) / "first", posts=3)
+        second_site = generate_hugo_site(Path(tmpdir) / "second", posts=3)
+
+        assert [filepath.read_bytes() for filepath in first_site.posts] == [
+            filepath.read_bytes() for filepath in second_site.posts
+        ]
+
+
+class TestBenchmarks:
+    def test_run_benchmarks(self):
+        report = run_benchmarks(posts=3, paragraphs=1, repeat=1)
+
+        assert report["meta"]["posts"] == 3
+        assert set(report["results"]) == {
+            "PostCodec.load",
+            "PostCodec.dump",
+            "PostCodec.dump_many",
+            "PostCodec.dump_app_data",
+            "PostCodec.is_publishable",
+            "HugoConfigLoader.load",
+        }
+        assert all(result["throughput"] > 0 for result in report["results"].values())
+
+    def test_run_benchmarks_with_pure_parsers(self):
+        report = run_benchmarks(
+            posts=3,
+            paragraphs=1,
+            repeat=1,
+            only=["PostCodec.load"],
+            parser_backend="pure",
+        )
+
+        assert report["meta"]["parser_backend"] == "pure"
+        assert list(report["results"]) == ["PostCodec.load"]
+
+    def test_find_regressions(self):
+        baseline = {"results": {"a": {"throughput": 100.0}, "b": {"throughput": 100.0}}}
+        report = {
+            "results": {
+                "a": {"throughput": 95.0},
+                "b": {"throughput": 50.0},
+                "c": {"throughput": 1.0},
+            }
+        }
+
+        regressions = find_regressions(report, baseline, threshold=0.1)
+
+        assert len(regressions) == 1
+        assert regressions[0].startswith("b: 50.0 ops/s, 50% slower")
+
+    def test_main(self, tmpdir, capsys):
+        output = Path(tmpdir) / "results.json"
+
+        assert (
+            main(
+                [
+                    "--posts",
+                    "2",
+                    "--repeat",
+                    "1",
+                    "--only",
+                    "PostCodec.load",
+                    "--output",
+                    output,
+                ]
+            )
+            == 0
+        )
+        assert list(json.loads(output.read_text())["results"]) == ["PostCodec.load"]
+
+        baseline = json.loads(output.read_text())
+        baseline["results"]["PostCodec.load"]["throughput"] *= 1000
+        output.write_text(json.dumps(baseline))
+
+        assert (
+            main(
+                [
+                    "--posts",
+                    "2",
+                    "--repeat",
+                    "1",
+                    "--only",
+                    "PostCodec.load",
+                    "--baseline",
+                    output,
+                ]
+            )
+            == 1
+        )
+        assert "Regression: PostCodec.load" in capsys.readouterr().err
@@ -5,7 +5,7 @@ import toml
 import yaml
 from path import Path
 
-from src.config_loaders import HugoConfigLoader
+from src.config_loaders import HugoConfigLoader, MergePlanEntry
 
 
 class TestHugoConfigLoader:
@@ -119,3 +119,194 @@ integer = 1
             FileNotFoundError, match=f"No Hugo Configuration Found in {hugo._workdir}"
         ):
             hugo.load()
+
+    def test_fragments_are_memoized(self, tmpdir, monkeypatch):
+        tmpdir = Path(tmpdir)
+        (tmpdir / "config").mkdir()
+        (tmpdir / "config/config.toml").write_text('title = "Title"')
+        (tmpdir / "config/params.toml").write_text('key = "value"')
+        (tmpdir / "config/menus.yaml").write_text("main: []")
+
+        hugo = HugoConfigLoader(workdir=tmpdir)
+        loaded_files = []
+        load_file = hugo._load_file
+        monkeypatch.setattr(
+            hugo, "_load_file", lambda file: loaded_files.append(file) or load_file(file)
+        )
+
+        config = hugo.load()
+
+        assert config == {
+            "title": "Title",
+            "params": {"key": "value"},
+            "menus": {"main": []},
+        }
+        assert len(loaded_files) == 3
+
+        config["params"]["key"] = "changed"
+        loaded_files.clear()
+
+        assert hugo.load()["params"] == {"key": "value"}
+        assert loaded_files == []
+
+        (tmpdir / "config/params.toml").write_text('key = "new value"')
+
+        assert hugo.load()["params"] == {"key": "new value"}
+        assert loaded_files == [tmpdir / "config/params.toml"]
+
+        (tmpdir / "config/menus.yaml").remove()
+
+        assert "menus" not in hugo.load()
+
+    def test_deterministic_merge_order(self, tmpdir):
+        tmpdir = Path(tmpdir)
+        (tmpdir / "config/a").makedirs()
+        (tmpdir / "config/b").makedirs()
+        (tmpdir / "config/a/config.toml").write_text('key = "a"')
+        (tmpdir / "config/b/config.toml").write_text('key = "b"')
+        (tmpdir / "config/config.toml").write_text('key = "root"')
+
+        assert HugoConfigLoader(workdir=tmpdir, max_workers=4).load() == {"key": "b"}
+
+    def test_snapshot(self, tmpdir):
+        tmpdir = Path(tmpdir)
+        (tmpdir / "config").mkdir()
+        (tmpdir / "config/config.json").write_text('{"list": [1, 2], "dict": {"a": 1}}')
+
+        hugo = HugoConfigLoader(workdir=tmpdir)
+        snapshot = hugo.snapshot()
+
+        assert snapshot["list"] == (1, 2)
+        assert snapshot["dict"]["a"] == 1
+        with pytest.raises(TypeError):
+            snapshot["dict"]["a"] = 2  # type: ignore
+        assert hugo.snapshot() is snapshot
+
+        (tmpdir / "config/config.json").write_text('{"list": [1, 2, 3]}')
+
+        assert hugo.snapshot()["list"] == (1, 2, 3)
+
+    def test_unchanged_snapshot_is_not_merged(self, tmpdir, monkeypatch):
+        tmpdir = Path(tmpdir)
+        (tmpdir / "config").mkdir()
+        (tmpdir / "config/config.json").write_text('{"key": "a"}')
+        (tmpdir / "config/params.json").write_text('{"author": "a"}')
+
+        hugo = HugoConfigLoader(workdir=tmpdir)
+        snapshot = hugo.snapshot()
+        merged = []
+        merge = hugo._merge
+        monkeypatch.setattr(
+            hugo, "_merge", lambda fragments: merged.append(1) or merge(fragments)
+        )
+
+        assert hugo.snapshot() is snapshot
+        assert merged == []
+
+        (tmpdir / "config/params.json").write_text('{"author": "bb"}')
+
+        assert hugo.snapshot()["params"]["author"] == "bb"
+        assert merged == [1]
+
+    def test_empty_one_file(self, tmpdir):
+        tmpdir = Path(tmpdir)
+        (tmpdir / "config.yaml").write_text("")
+
+        assert HugoConfigLoader(workdir=tmpdir).load() == dict()
+
+
+class TestHugoConfigLoaderEnvironments:
+    @pytest.fixture
+    def workdir(self, tmpdir):
+        workdir = Path(tmpdir)
+        for dirname in ["_default", "production", "staging"]:
+            (workdir / "config" / dirname).makedirs()
+        (workdir / "config/_default/config.toml").write_text(
+            'baseURL = "http://localhost/"\ntitle = "Title"'
+        )
+        (workdir / "config/_default/params.toml").write_text(
+            'author = "Goldie"\ndescription = "Default"'
+        )
+        (workdir / "config/_default/menus.yaml").write_text("main: []")
+        (workdir / "config/production/config.toml").write_text(
+            'baseURL = "https://example.com/"'
+        )
+        (workdir / "config/production/params.toml").write_text('description = "Prod"')
+        (workdir / "config/staging/config.toml").write_text(
+            'baseURL = "https://staging.example.com/"'
+        )
+
+        return workdir
+
+    def test_default_only(self, workdir):
+        config = HugoConfigLoader(workdir=workdir).load()
+
+        assert config == {
+            "baseURL": "http://localhost/",
+            "title": "Title",
+            "params": {"author": "Goldie", "description": "Default"},
+            "menus": {"main": []},
+        }
+
+    def test_environment_overrides_default(self, workdir):
+        production = HugoConfigLoader(workdir=workdir, environment="production").load()
+        staging = HugoConfigLoader(workdir=workdir, environment="staging").load()
+
+        assert production["baseURL"] == "https://example.com/"
+        assert production["params"] == {"author": "Goldie", "description": "Prod"}
+        assert staging["baseURL"] == "https://staging.example.com/"
+        assert staging["params"] == {"author": "Goldie", "description": "Default"}
+
+    def test_unknown_environment(self, workdir):
+        assert HugoConfigLoader(workdir=workdir, environment="dev").load() == (
+            HugoConfigLoader(workdir=workdir).load()
+        )
+
+    def test_merge_plan(self, workdir):
+        plan = HugoConfigLoader(workdir=workdir, environment="production").merge_plan()
+
+        assert plan == [
+            MergePlanEntry(workdir / "config/_default/config.toml", ()),
+            MergePlanEntry(workdir / "config/_default/menus.yaml", ("menus",)),
+            MergePlanEntry(workdir / "config/_default/params.toml", ("params",)),
+            MergePlanEntry(workdir / "config/production/config.toml", ()),
+            MergePlanEntry(workdir / "config/production/params.toml", ("params",)),
+        ]
+
+    def test_get(self, workdir):
+        hugo = HugoConfigLoader(workdir=workdir, environment="production")
+
+        assert hugo.get("baseURL") == "https://example.com/"
+        assert hugo.get("params.description") == "Prod"
+        assert hugo.get("params") == {"author": "Goldie", "description": "Prod"}
+        assert hugo.get("params.missing") is None
+        assert hugo.get("title.missing", "default") == "default"
+
+    def test_get_only_parses_contributing_files(self, workdir, monkeypatch):
+        hugo = HugoConfigLoader(workdir=workdir, environment="production")
+        loaded_files = []
+        load_file = hugo._load_file
+        monkeypatch.setattr(
+            hugo, "_load_file", lambda file: loaded_files.append(file) or load_file(file)
+        )
+
+        hugo.get("params.author")
+
+        assert sorted(loaded_files) == [
+            workdir / "config/_default/config.toml",
+            workdir / "config/_default/params.toml",
+            workdir / "config/production/config.toml",
+            workdir / "config/production/params.toml",
+        ]
+
+    def test_origin(self, workdir):
+        hugo = HugoConfigLoader(workdir=workdir, environment="production")
+
+        assert hugo.origin("baseURL") == workdir / "config/production/config.toml"
+        assert hugo.origin("title") == workdir / "config/_default/config.toml"
+        assert hugo.origin("params.author") == workdir / "config/_default/params.toml"
+        assert hugo.origin("params.description") == (
+            workdir / "config/production/params.toml"
+        )
+        assert hugo.origin("menus.main") == workdir / "config/_default/menus.yaml"
+        assert hugo.origin("missing") is None
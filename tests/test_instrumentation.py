@@ -0,0 +1,151 @@
+import json
+
+import pytest
+from path import Path
+
+from src.config_loaders import HugoConfigLoader
+from src.instrumentation import Recorder, StageRecord, StageStats, stage
+from src.post_codecs import PostCodec
+
+
+class TestRecorder:
+    def test_stats(self):
+        recorder = Recorder()
+
+        with recorder.stage("parse", "a.md") as parse_stage:
+            parse_stage.add_text("é")
+        with pytest.raises(ValueError):
+            with recorder.stage("parse", "b.md"):
+                raise ValueError()
+
+        stats = recorder.stats["parse"]
+        assert (stats.calls, stats.nbytes, stats.errors) == (2, 2, 1)
+        assert [record.key for record in recorder.records] == ["a.md", "b.md"]
+        assert recorder.by_key()["b.md"]["parse"].errors == 1
+
+    def test_without_records(self):
+        recorder = Recorder(keep_records=False)
+
+        with recorder.stage("parse"):
+            pass
+
+        assert recorder.records == []
+        assert recorder.stats["parse"].calls == 1
+        assert "records" not in json.loads(recorder.to_json())
+
+    def test_drain(self):
+        recorder = Recorder()
+        with recorder.stage("parse"):
+            pass
+
+        assert len(recorder.drain()) == 1
+        assert recorder.records == []
+        assert recorder.stats == dict()
+
+    def test_to_json(self):
+        recorder = Recorder()
+        recorder.add(StageRecord("read", Path("a.md"), 0.5, 10, False))
+
+        report = json.loads(recorder.to_json())
+
+        assert report["stages"] == {
+            "read": {"calls": 1, "seconds": 0.5, "nbytes": 10, "errors": 0}
+        }
+        assert report["records"] == [
+            {
+                "stage": "read",
+                "key": "a.md",
+                "seconds": 0.5,
+                "nbytes": 10,
+                "failed": False,
+            }
+        ]
+
+    def test_to_prometheus(self):
+        recorder = Recorder()
+        recorder.add(StageRecord("read", None, 0.5, 10, False))
+
+        metrics = recorder.to_prometheus(prefix="test")
+
+        assert "# TYPE test_stage_seconds_total counter" in metrics
+        assert 'test_stage_seconds_total{stage="read"} 0.5' in metrics
+        assert 'test_stage_bytes_total{stage="read"} 10' in metrics
+        assert 'test_stage_errors_total{stage="read"} 0' in metrics
+
+    def test_disabled(self):
+        with stage(None, "parse") as parse_stage:
+            parse_stage.nbytes = 10
+            parse_stage.add_text("text")
+
+        assert stage(None, "parse") is stage(None, "render")
+
+
+class TestInstrumentedCodec:
+    def test_load(self, tmpdir, expected_post):
+        expected_post.filepath = Path(tmpdir) / "post.md"
+        PostCodec(postsdir=Path(tmpdir)).dump(expected_post)
+        recorder = Recorder()
+        codec = PostCodec(postsdir=Path(tmpdir), recorder=recorder)
+
+        codec.load(expected_post.filepath)
+
+        stats = recorder.by_key()[expected_post.filepath]
+        assert set(stats) == {"read", "parse", "validate", "render"}
+        assert stats["read"].nbytes == expected_post.filepath.size
+        assert all(stage_stats.calls == 1 for stage_stats in stats.values())
+
+    def test_lazy_render(self, tmpdir, expected_post):
+        expected_post.filepath = Path(tmpdir) / "post.md"
+        PostCodec(postsdir=Path(tmpdir)).dump(expected_post)
+        recorder = Recorder()
+        codec = PostCodec(postsdir=Path(tmpdir), recorder=recorder)
+
+        post = codec.load(expected_post.filepath, lazy=True)
+        assert "render" not in recorder.stats
+
+        post.content
+        assert recorder.stats["render"].calls == 1
+
+    def test_errors(self, tmpdir):
+        filepath = Path(tmpdir) / "post.md"
+        filepath.write_text("---\nfoo: 0\n---\n# Test\n")
+        recorder = Recorder()
+        codec = PostCodec(postsdir=Path(tmpdir), recorder=recorder)
+
+        codec.load_many([filepath], workers=1)
+
+        assert recorder.stats["parse"].errors == 0
+        assert recorder.stats["validate"].errors == 1
+
+    @pytest.mark.parametrize("executor", ["thread", "process"])
+    def test_load_many(self, tmpdir, expected_post, executor):
+        codec = PostCodec(postsdir=Path(tmpdir))
+        filepaths = [Path(tmpdir) / f"post_{i}.md" for i in range(3)]
+        for filepath in filepaths:
+            codec.dump(expected_post.copy(update={"filepath": filepath}))
+        codec.recorder = Recorder()
+
+        codec.load_many(filepaths, workers=2, executor=executor)
+
+        assert set(codec.recorder.by_key()) == set(filepaths)
+        assert codec.recorder.stats["read"] == StageStats(
+            3,
+            codec.recorder.stats["read"].seconds,
+            sum(filepath.size for filepath in filepaths),
+            0,
+        )
+
+
+class TestInstrumentedConfigLoader:
+    def test_load(self, tmpdir):
+        tmpdir.mkdir("config")
+        (Path(tmpdir) / "config/config.yaml").write_text("a: 1\n")
+        (Path(tmpdir) / "config/params.json").write_text('{"b": 2}')
+        recorder = Recorder()
+        hugo = HugoConfigLoader(workdir=Path(tmpdir), recorder=recorder)
+
+        hugo.load()
+
+        assert recorder.stats["config.parse"].calls == 2
+        assert recorder.stats["config.parse"].nbytes == 13
+        assert recorder.stats["config.merge"].calls == 1
@@ -0,0 +1,161 @@
+import pickle
+
+import pytest
+from path import Path
+
+from src.post_cache import PostCache
+from src.post_codecs import PostCodec
+
+
+class TestPostCache:
+    def test_get_set(self, tmpdir):
+        cache = PostCache(Path(tmpdir) / "cache.sqlite")
+
+        assert cache.get("key") is None
+
+        cache.set("key", "value")
+
+        assert cache.get("key") == "value"
+        assert (cache.hits, cache.misses) == (1, 1)
+        assert len(cache) == 1
+
+    def test_persistence(self, tmpdir):
+        cache = PostCache(Path(tmpdir) / "cache.sqlite")
+        cache.set("key", "value")
+        cache.close()
+
+        cache = PostCache(Path(tmpdir) / "cache.sqlite")
+
+        assert cache.get("key") == "value"
+
+    def test_lru_eviction(self, tmpdir):
+        cache = PostCache(Path(tmpdir) / "cache.sqlite", max_entries=2)
+
+        cache.set("a", "1")
+        cache.set("b", "2")
+        cache.get("a")
+        cache.set("c", "3")
+
+        assert len(cache) == 2
+        assert cache.get("b") is None
+        assert cache.get("a") == "1"
+        assert cache.get("c") == "3"
+
+    def test_clear(self, tmpdir):
+        cache = PostCache(Path(tmpdir) / "cache.sqlite")
+        cache.set("key", "value")
+        cache.get("key")
+
+        cache.clear()
+
+        assert len(cache) == 0
+        assert (cache.hits, cache.misses) == (0, 0)
+
+    def test_pickle(self, tmpdir):
+        cache = PostCache(Path(tmpdir) / "cache.sqlite")
+        cache.set("key", "value")
+
+        unpickled_cache = pickle.loads(pickle.dumps(cache))
+
+        assert unpickled_cache.get("key") == "value"
+
+
+class TestPostCodecCache:
+    def test_load_from_cache(self, tmpdir, expected_post):
+        tmpdir = Path(tmpdir)
+        postsdir = (tmpdir / "posts").mkdir()
+        filepath = postsdir / "post.md"
+        expected_post.filepath = filepath
+        cache = PostCache(tmpdir / "cache.sqlite")
+        codec = PostCodec(postsdir=postsdir, cache=cache)
+        codec.dump(expected_post)
+
+        assert codec.load(filepath) == expected_post
+        assert (cache.hits, cache.misses) == (0, 1)
+        assert codec.load(filepath) == expected_post
+        assert (cache.hits, cache.misses) == (1, 1)
+
+        # Same bytes in another file
+        other_filepath = postsdir / "other.md"
+        filepath.copy(other_filepath)
+
+        assert codec.load(other_filepath).filepath == other_filepath
+        assert cache.hits == 2
+
+    def test_cached_post_keeps_markdown_source(self, tmpdir, expected_post):
+        tmpdir = Path(tmpdir)
+        postsdir = (tmpdir / "posts").mkdir()
+        expected_post.filepath = postsdir / "post.md"
+        cache = PostCache(tmpdir / "cache.sqlite")
+        codec = PostCodec(postsdir=postsdir, cache=cache)
+        codec.dump(expected_post)
+
+        loaded_post = codec.load(expected_post.filepath)
+        cached_post = codec.load(expected_post.filepath)
+
+        assert cache.hits == 1
+        assert cached_post.markdown_source == loaded_post.markdown_source
+        assert cached_post.markdown_source is not None
+
+    def test_modified_file_is_a_miss(self, tmpdir, expected_post):
+        tmpdir = Path(tmpdir)
+        postsdir = (tmpdir / "posts").mkdir()
+        expected_post.filepath = postsdir / "post.md"
+        cache = PostCache(tmpdir / "cache.sqlite")
+        codec = PostCodec(postsdir=postsdir, cache=cache)
+        codec.dump(expected_post)
+        codec.load(expected_post.filepath)
+
+        expected_post.title = "New Title"
+        codec.dump(expected_post)
+
+        assert codec.load(expected_post.filepath) == expected_post
+        assert (cache.hits, cache.misses) == (0, 2)
+
+    @pytest.mark.parametrize("executor", ["process", "thread"])
+    def test_load_many_counts(self, tmpdir, expected_post, executor):
+        tmpdir = Path(tmpdir)
+        postsdir = (tmpdir / "posts").mkdir()
+        cache = PostCache(tmpdir / "cache.sqlite")
+        codec = PostCodec(postsdir=postsdir, cache=cache)
+        filepaths = []
+        for i in range(3):
+            expected_post.filepath = postsdir / f"post_{i}.md"
+            expected_post.title = f"Post {i}"
+            codec.dump(expected_post)
+            filepaths.append(expected_post.filepath)
+
+        codec.load_many(filepaths, workers=2, executor=executor)
+        codec.load_many(filepaths, workers=2, executor=executor)
+
+        assert (cache.hits, cache.misses) == (3, 3)
+
+    def test_codec_version_is_part_of_the_key(self, tmpdir, expected_post):
+        class NewPostCodec(PostCodec):
+            CODEC_VERSION = PostCodec.CODEC_VERSION + 1
+
+        tmpdir = Path(tmpdir)
+        postsdir = (tmpdir / "posts").mkdir()
+        expected_post.filepath = postsdir / "post.md"
+        cache = PostCache(tmpdir / "cache.sqlite")
+        PostCodec(postsdir=postsdir, cache=cache).dump(expected_post)
+
+        PostCodec(postsdir=postsdir, cache=cache).load(expected_post.filepath)
+        NewPostCodec(postsdir=postsdir, cache=cache).load(expected_post.filepath)
+
+        assert (cache.hits, cache.misses) == (0, 2)
+
+    def test_post_publisher_id_is_not_cached_when_missing(self, tmpdir):
+        tmpdir = Path(tmpdir)
+        postsdir = (tmpdir / "posts").mkdir()
+        filepath = postsdir / "post.md"
+        filepath.write_text(
+            "---\ntitle: Title\nis_draft: false\ntags: []\ncategories: []\n---\n# Content"
+        )
+        cache = PostCache(tmpdir / "cache.sqlite")
+        codec = PostCodec(postsdir=postsdir, cache=cache)
+
+        first_post, second_post = codec.load(filepath), codec.load(filepath)
+
+        assert cache.hits == 1
+        assert first_post.post_publisher.id != second_post.post_publisher.id
@@ -1,30 +1,30 @@
 import json
+import os
+import pickle
+from uuid import uuid4
 
 import frontmatter
 import pytest
+from frontmatter.default_handlers import JSONHandler, TOMLHandler, YAMLHandler
 from path import Path
+from pydantic import HttpUrl
 
+from src import post_codecs
 from src.post_codecs import (
+    MetadataField,
     HugoPostCodec,
-    Post,
+    IPostCodec,
     PostCodec,
     PostDecodeError,
     PostPublisher,
+    PostsDiff,
+    decode_post,
+    diff_post_contents,
+    diff_posts,
+    encode_post,
+    validate_posts,
 )
-
-
-@pytest.fixture
-def expected_post(scope="function"):
-    return Post(
-        filepath=Path(),
-        post_publisher=PostPublisher(),
-        title="My First Post",
-        canonical_url=None,
-        content="<h1>Content</h1><p>paragraph</p>",
-        tags=frozenset(["tag1", "tag2"]),
-        categories=frozenset(["cat1", "cat2"]),
-        is_draft=True,
-    )
+from src.utils.content_diff import BlockEdit, apply_patch
 
 
 class TestPostCodec:
@@ -44,6 +44,110 @@ class TestPostCodec:
         assert codec.is_post(filepath)
         assert codec.is_publishable(filepath)
 
+    def test_lazy_load(self, tmpdir, expected_post, monkeypatch):
+        tmpdir = Path(tmpdir)
+        postsdir = (tmpdir / "posts").mkdir()
+        expected_post.filepath = postsdir / "test_post.md"
+        codec = PostCodec(postsdir=postsdir)
+        codec.dump(expected_post)
+
+        rendered = []
+        render = codec.renderer.render
+        monkeypatch.setattr(
+            codec.renderer, "render", lambda text: rendered.append(text) or render(text)
+        )
+
+        test_post = codec.load(expected_post.filepath, lazy=True)
+
+        assert test_post.title == expected_post.title
+        assert not test_post.is_content_loaded
+        assert rendered == []
+
+        assert test_post.content == "<h1>Content</h1>\n<p>paragraph</p>"
+        assert test_post.content == "<h1>Content</h1>\n<p>paragraph</p>"
+        assert test_post.is_content_loaded
+        assert len(rendered) == 1
+
+        assert codec.load(expected_post.filepath, lazy=True) == expected_post
+        lazy_post = codec.load(expected_post.filepath, lazy=True)
+        assert pickle.loads(pickle.dumps(lazy_post)) == expected_post
+
+    def test_lazy_content_can_be_replaced(self, tmpdir, expected_post):
+        tmpdir = Path(tmpdir)
+        postsdir = (tmpdir / "posts").mkdir()
+        expected_post.filepath = postsdir / "test_post.md"
+        codec = PostCodec(postsdir=postsdir)
+        codec.dump(expected_post)
+
+        test_post = codec.load(expected_post.filepath, lazy=True)
+        test_post.content = "<p>New content</p>"
+
+        assert test_post.content == "<p>New content</p>"
+        assert test_post.dict()["content"] == "<p>New content</p>"
+
+    @pytest.mark.parametrize(
+        "frontmatter_text",
+        [
+            "---\ntitle: My First Post\nis_draft: true\ntags: [tag1, tag2]\n"
+            "categories: [cat1, cat2]\n---",
+            '+++\ntitle = "My First Post"\nis_draft = true\ntags = ["tag1", "tag2"]\n'
+            'categories = ["cat1", "cat2"]\n+++',
+            '{\n"title": "My First Post", "is_draft": true, "tags": ["tag1", "tag2"],\n'
+            '"categories": ["cat1", "cat2"]\n}',
+        ],
+    )
+    def test_load_metadata(self, tmpdir, expected_post, frontmatter_text):
+        tmpdir = Path(tmpdir)
+        postsdir = (tmpdir / "posts").mkdir()
+        filepath = expected_post.filepath = postsdir / "test_post.md"
+        filepath.write_text(f"\n{frontmatter_text}\n# Content\n\nparagraph\n")
+        codec = PostCodec(postsdir=postsdir)
+
+        test_post = codec.load_metadata(filepath)
+
+        assert test_post.title == expected_post.title
+        assert test_post.tags == expected_post.tags
+        assert not test_post.is_content_loaded
+
+        test_post.post_publisher = expected_post.post_publisher
+
+        assert test_post == expected_post
+        assert test_post.is_content_loaded
+
+    def test_load_metadata_stops_at_the_frontmatter_end(self, tmpdir):
+        tmpdir = Path(tmpdir)
+        postsdir = (tmpdir / "posts").mkdir()
+        filepath = postsdir / "test_post.md"
+        filepath.write_bytes(
+            b"---\ntitle: T\nis_draft: true\ntags: []\ncategories: []\n---\n"
+            b"# Content\n\xff\xfe not UTF-8"
+        )
+        codec = PostCodec(postsdir=postsdir)
+
+        test_post = codec.load_metadata(filepath)
+
+        assert test_post.title == "T"
+        with pytest.raises(UnicodeDecodeError):
+            test_post.content
+
+    def test_load_metadata_errors(self, tmpdir):
+        tmpdir = Path(tmpdir)
+        postsdir = (tmpdir / "posts").mkdir()
+        filepath = postsdir / "test_post.md"
+        codec = PostCodec(postsdir=postsdir)
+
+        filepath.write_text("# Content")
+        with pytest.raises(PostDecodeError, match="Frontmatter not found."):
+            codec.load_metadata(filepath)
+
+        filepath.write_text("---\ntitle: Test\n# Content")
+        with pytest.raises(PostDecodeError, match="Frontmatter not found."):
+            codec.load_metadata(filepath)
+
+        filepath.write_text("---\ntitle: Test\nis_draft = true\n---\n# Content")
+        with pytest.raises(PostDecodeError, match=r"Error in YAML Frontmatter.*"):
+            codec.load_metadata(filepath)
+
     def test_file_not_found(self, tmpdir, expected_post):
         tmpdir = Path(tmpdir)
         postsdir = (tmpdir / "posts").mkdir()
@@ -78,6 +182,177 @@ class TestPostCodec:
         with pytest.raises(IsADirectoryError):
             codec.load(filepath)
 
+    def test_dump_app_data(self, tmpdir, expected_post):
+        tmpdir = Path(tmpdir)
+        postsdir = (tmpdir / "posts").mkdir()
+        filepath = postsdir / "test_post.md"
+        body = b"# Content\r\n\r\nparagraph   \n"
+        filepath.write_bytes(
+            b"---\ntitle: My First Post\nis_draft: true\ntags: [tag1, tag2]\n"
+            b"categories: [cat1, cat2]\n---\n" + body
+        )
+        expected_post.filepath = filepath
+
+        codec = PostCodec(postsdir=postsdir)
+        codec.dump_app_data(expected_post)
+
+        assert filepath.read_bytes().endswith(b"\n---\n" + body)
+        assert codec.load(filepath) == expected_post
+
+    def test_dump_app_data_many(self, tmpdir, expected_post):
+        tmpdir = Path(tmpdir)
+        postsdir = (tmpdir / "posts").mkdir()
+        codec = PostCodec(postsdir=postsdir)
+
+        posts = []
+        for i in range(3):
+            post = expected_post.copy(deep=True)
+            post.filepath = postsdir / f"post_{i}.md"
+            codec.dump(post)
+            post.post_publisher = PostPublisher(id=uuid4())
+            posts.append(post)
+
+        codec.dump_app_data_many(posts)
+
+        assert [codec.load(post.filepath) for post in posts] == posts
+
+    def test_dump_app_data_many_is_all_or_nothing(self, tmpdir, expected_post):
+        postsdir = Path(tmpdir)
+        codec = PostCodec(postsdir=postsdir)
+        expected_post.filepath = postsdir / "post.md"
+        codec.dump(expected_post)
+        data = expected_post.filepath.read_bytes()
+        expected_post.post_publisher = PostPublisher()
+
+        missing_post = expected_post.copy(update={"filepath": postsdir / "missing.md"})
+        with pytest.raises(FileNotFoundError):
+            codec.dump_app_data_many([expected_post, missing_post])
+
+        assert expected_post.filepath.read_bytes() == data
+
+    def test_dump_metadata(self, expected_post):
+        codec = PostCodec(postsdir=Path())
+
+        assert codec._dump_metadata(expected_post) == json.loads(
+            expected_post.json(exclude={"canonical_url", "filepath", "content"})
+        )
+
+    @pytest.mark.parametrize("executor", ["process", "thread"])
+    def test_dump_many(self, tmpdir, expected_post, executor):
+        tmpdir = Path(tmpdir)
+        postsdir = (tmpdir / "posts").mkdir()
+        codec = PostCodec(postsdir=postsdir)
+
+        posts = []
+        for i in range(5):
+            post = expected_post.copy(deep=True)
+            post.filepath = postsdir / f"post_{i}.md"
+            post.title = f"Post {i}"
+            posts.append(post)
+
+        codec.dump_many(posts, workers=2, executor=executor)
+
+        assert [codec.load(post.filepath) for post in posts] == posts
+
+        dumped_files = [post.filepath.read_bytes() for post in posts]
+        for post in posts:
+            codec.dump(post)
+
+        assert [post.filepath.read_bytes() for post in posts] == dumped_files
+
+    def test_dump_many_rolls_back(self, tmpdir, expected_post):
+        tmpdir = Path(tmpdir)
+        postsdir = (tmpdir / "posts").mkdir()
+        codec = PostCodec(postsdir=postsdir)
+
+        existing_post = expected_post.copy(update={"filepath": postsdir / "a.md"})
+        codec.dump(existing_post)
+        existing_file = existing_post.filepath.read_bytes()
+
+        posts = [
+            existing_post.copy(update={"title": "Changed"}),
+            expected_post.copy(update={"filepath": postsdir / "b.md"}),
+            expected_post.copy(update={"filepath": (postsdir / "c.md").mkdir()}),
+        ]
+
+        with pytest.raises(IsADirectoryError):
+            codec.dump_many(posts, executor="thread")
+
+        assert existing_post.filepath.read_bytes() == existing_file
+        assert sorted(postsdir.listdir()) == [postsdir / "a.md", postsdir / "c.md"]
+
+    def test_dump_keeps_unchanged_markdown(self, tmpdir, monkeypatch):
+        tmpdir = Path(tmpdir)
+        postsdir = (tmpdir / "posts").mkdir()
+        filepath = postsdir / "test_post.md"
+        body = "Some *Markdown*   with a [link][1].\n\n[1]: https://example.com"
+        filepath.write_text(
+            "---\ntitle: My First Post\nis_draft: true\ntags: [tag1]\n"
+            "categories: [cat1]\n---\n" + body + "\n"
+        )
+        codec = PostCodec(postsdir=postsdir)
+        monkeypatch.setattr("src.post_codecs.markdownify", None)
+
+        for post in [
+            codec.load(filepath),
+            codec.load(filepath, lazy=True),
+            codec.load_metadata(filepath),
+        ]:
+            post.title = "New Title"
+            codec.dump(post)
+
+            assert filepath.read_text().endswith("\n---\n\n" + body)
+            assert codec.load(filepath).title == "New Title"
+
+    def test_dump_converts_changed_content(self, tmpdir, expected_post):
+        tmpdir = Path(tmpdir)
+        postsdir = (tmpdir / "posts").mkdir()
+        expected_post.filepath = postsdir / "test_post.md"
+        codec = PostCodec(postsdir=postsdir)
+        codec.dump(expected_post)
+
+        for post in [
+            codec.load(expected_post.filepath),
+            codec.load(expected_post.filepath, lazy=True),
+        ]:
+            assert post.markdown_source == "Content\n=======\n\nparagraph"
+
+            post.content = "<p>New paragraph</p>"
+            assert post.markdown_source is None
+
+            codec.dump(post)
+            assert codec.load(expected_post.filepath).content == "<p>New paragraph</p>"
+
+        post = codec.load(expected_post.filepath)
+        copied_post = post.copy(update={"content": "<p>Copy</p>"})
+        assert post.markdown_source is not None
+        assert copied_post.markdown_source is None
+
+    def test_dump_many_converts_changed_contents(self, tmpdir, expected_post):
+        tmpdir = Path(tmpdir)
+        postsdir = (tmpdir / "posts").mkdir()
+        codec = PostCodec(postsdir=postsdir)
+
+        for i in range(3):
+            post = expected_post.copy(update={"filepath": postsdir / f"post_{i}.md"})
+            codec.dump(post)
+        posts = [codec.load(filepath) for filepath in sorted(postsdir.files())]
+        posts[1].content = "<p>New paragraph</p>"
+
+        codec.dump_many(posts, executor="thread")
+
+        assert [codec.load(post.filepath).content for post in posts] == [
+            "<h1>Content</h1>\n<p>paragraph</p>",
+            "<p>New paragraph</p>",
+            "<h1>Content</h1>\n<p>paragraph</p>",
+        ]
+
+    def test_dump_many_unknown_executor(self, tmpdir, expected_post):
+        codec = PostCodec(postsdir=Path(tmpdir))
+
+        with pytest.raises(ValueError, match="Unknown executor 'fiber'."):
+            codec.dump_many([expected_post], executor="fiber")
+
     def test_post_is_not_publishable(self, tmpdir):
         tmpdir = Path(tmpdir)
         postsdir = (tmpdir / "posts").mkdir()
@@ -93,6 +368,32 @@ class TestPostCodec:
         assert codec.is_publishable(file_publishable_1)
         assert codec.is_publishable(file_publishable_2)
 
+    def test_filter_publishable(self, tmpdir):
+        tmpdir = Path(tmpdir)
+        postsdir = (tmpdir / "posts").mkdir()
+        (postsdir / "drafts").mkdir()
+        filepaths = [
+            postsdir / "post.md",
+            postsdir / "drafts/draft.md",
+            postsdir / "drafts/keep.md",
+            tmpdir / "outside.md",
+        ]
+
+        codec = PostCodec(postsdir=postsdir, ignore_globs=["drafts/*", "!drafts/keep.md"])
+
+        assert codec.filter_publishable(filepaths) == [
+            filepaths[0],
+            filepaths[2],
+            filepaths[3],
+        ]
+        assert codec.filter_publishable(filepaths) == [
+            path for path in filepaths if codec.is_publishable(path)
+        ]
+
+        codec.ignore_globs.append("post.md")
+
+        assert not codec.is_publishable(filepaths[0])
+
     def test_file_formats(self, tmpdir, expected_post):
         tmpdir = Path(tmpdir)
         postsdir = (tmpdir / "posts").mkdir()
@@ -115,6 +416,245 @@ class TestPostCodec:
                 assert codec.is_post(filepath)
                 assert codec.is_publishable(filepath)
 
+    @pytest.mark.parametrize("parser_backend", ["fast", "pure"])
+    def test_parser_backends(self, tmpdir, expected_post, parser_backend):
+        tmpdir = Path(tmpdir)
+        postsdir = (tmpdir / "posts").mkdir()
+        codec = HugoPostCodec(postsdir=postsdir, parser_backend=parser_backend)
+
+        metadata = {"title": "Title", "is_draft": True, "tags": ["a"], "categories": []}
+
+        for ext, handler in [
+            (".md", YAMLHandler()),
+            (".markdown", TOMLHandler()),
+            (".mdown", JSONHandler()),
+        ]:
+            filepath = postsdir / f"post{ext}"
+            frontmatter_post = frontmatter.Post("Content", **metadata)
+            filepath.write_text(frontmatter.dumps(frontmatter_post, handler=handler))
+            post = codec.load(filepath)
+
+            assert (post.title, post.is_draft, post.tags) == ("Title", True, {"a"})
+            assert post.content == "<p>Content</p>"
+            assert codec.load_metadata(filepath).title == "Title"
+
+    def test_iter_posts(self, tmpdir):
+        tmpdir = Path(tmpdir)
+        postsdir = (tmpdir / "posts").mkdir()
+        for dirname in ["2020", "2020/drafts", "2021", ".git", "old", "old/dir"]:
+            (postsdir / dirname).mkdir()
+        for filename in [
+            "b.md",
+            "a.md",
+            "image.png",
+            ".hidden.md",
+            "2020/post.md",
+            "2020/drafts/draft.md",
+            "2020/drafts/keep.md",
+            "2021/post.md",
+            ".git/HEAD.md",
+            "old/dir/post.md",
+        ]:
+            (postsdir / filename).touch()
+
+        codec = PostCodec(
+            postsdir=postsdir,
+            ignore_globs=["**/drafts/*", "!**/drafts/keep.md", "old/**", "2021/*"],
+        )
+
+        posts = list(codec.iter_posts())
+
+        assert posts == [
+            postsdir / "a.md",
+            postsdir / "b.md",
+            postsdir / "2020/post.md",
+            postsdir / "2020/drafts/keep.md",
+        ]
+        assert all(codec.is_post(path) and codec.is_publishable(path) for path in posts)
+
+    def test_iter_posts_prunes_ignored_directories(self, tmpdir, monkeypatch):
+        tmpdir = Path(tmpdir)
+        postsdir = (tmpdir / "posts").mkdir()
+        (postsdir / "old").mkdir()
+        (postsdir / "old/post.md").touch()
+
+        scanned = []
+        scandir = os.scandir
+        monkeypatch.setattr(
+            os, "scandir", lambda path: scanned.append(path) or scandir(path)
+        )
+
+        codec = PostCodec(postsdir=postsdir, ignore_globs=["old/**"])
+
+        assert list(codec.iter_posts()) == []
+        assert scanned == [postsdir]
+
+    def test_iter_posts_postsdir_not_found(self, tmpdir):
+        codec = PostCodec(postsdir=Path(tmpdir) / "posts")
+
+        with pytest.raises(FileNotFoundError):
+            list(codec.iter_posts())
+
+    @pytest.mark.parametrize("executor", ["process", "thread"])
+    def test_load_many(self, tmpdir, expected_post, executor):
+        tmpdir = Path(tmpdir)
+        postsdir = (tmpdir / "posts").mkdir()
+        codec = PostCodec(postsdir=postsdir)
+
+        filepaths = []
+        for i in range(10):
+            filepath = postsdir / f"post_{i}.md"
+            if i % 3:
+                expected_post.filepath = filepath
+                expected_post.title = f"Post {i}"
+                codec.dump(expected_post)
+            else:
+                filepath.write_text("# No frontmatter", encoding="utf-8")
+            filepaths.append(filepath)
+
+        result = codec.load_many(filepaths, workers=2, executor=executor)
+
+        assert [post.filepath for post in result.posts] == [
+            path for i, path in enumerate(filepaths) if i % 3
+        ]
+        assert [post.title for post in result.posts] == [
+            f"Post {i}" for i in range(10) if i % 3
+        ]
+        assert list(result.errors) == filepaths[::3]
+        assert all(
+            isinstance(error, PostDecodeError) and str(error) == "Frontmatter not found."
+            for error in result.errors.values()
+        )
+
+    @pytest.mark.parametrize("executor", ["process", "thread"])
+    def test_load_many_invalid_posts(self, tmpdir, expected_post, executor):
+        postsdir = Path(tmpdir)
+        codec = PostCodec(postsdir=postsdir)
+        expected_post.filepath = postsdir / "valid.md"
+        codec.dump(expected_post)
+        (postsdir / "invalid_draft.md").write_text(
+            "---\ntitle: A\nis_draft: maybe\ntags: []\ncategories: []\n---\nText"
+        )
+        (postsdir / "invalid_tags.md").write_text(
+            "---\ntitle: A\nis_draft: false\ntags: 1\ncategories: []\n---\nText"
+        )
+        (postsdir / "invalid_utf8.md").write_bytes(
+            b"---\ntitle: A\nis_draft: false\ntags: []\ncategories: []\n---\n\xff"
+        )
+
+        result = codec.load_many(sorted(postsdir.files()), workers=2, executor=executor)
+
+        assert result.posts == [expected_post]
+        assert sorted(result.errors) == [
+            postsdir / "invalid_draft.md",
+            postsdir / "invalid_tags.md",
+            postsdir / "invalid_utf8.md",
+        ]
+        assert all(isinstance(e, PostDecodeError) for e in result.errors.values())
+        assert "is_draft" in str(result.errors[postsdir / "invalid_draft.md"])
+
+    @pytest.mark.parametrize("lazy", [False, True])
+    def test_trusted_load(self, tmpdir, expected_post, lazy):
+        expected_post.filepath = Path(tmpdir) / "post.md"
+        PostCodec(postsdir=Path(tmpdir)).dump(expected_post)
+        codec = PostCodec(postsdir=Path(tmpdir), trusted=True)
+
+        post = codec.load(expected_post.filepath, lazy=lazy)
+
+        assert post == expected_post
+        assert post.__fields_set__ == expected_post.__fields_set__ - {"canonical_url"}
+        assert validate_posts([post]) == dict()
+        assert post.content == codec.load(expected_post.filepath).content
+
+    @pytest.mark.parametrize("executor", ["process", "thread"])
+    def test_trusted_load_many(self, tmpdir, expected_post, executor, monkeypatch):
+        validated = []
+        monkeypatch.setattr(
+            post_codecs,
+            "validate_posts",
+            lambda posts: validate_posts(validated.extend(posts) or posts),
+        )
+        postsdir = Path(tmpdir)
+        codec = PostCodec(postsdir=postsdir, trusted=True)
+        expected_post.filepath = postsdir / "valid.md"
+        codec.dump(expected_post)
+        (postsdir / "converted.md").write_text(
+            "---\ntitle: 1\nis_draft: 'yes'\ntags: []\ncategories: []\n---\nText"
+        )
+        (postsdir / "invalid_title.md").write_text(
+            "---\ntitle: [1]\nis_draft: false\ntags: []\ncategories: []\n---\nText"
+        )
+        (postsdir / "invalid_tags.md").write_text(
+            "---\ntitle: A\nis_draft: false\ntags: 1\ncategories: []\n---\nText"
+        )
+        (postsdir / "invalid_id.md").write_text(
+            "---\ntitle: A\nis_draft: false\ntags: []\ncategories: []\n"
+            "post_publisher:\n  id: not-a-uuid\n---\nText"
+        )
+        (postsdir / "extra_key.md").write_text(
+            "---\ntitle: A\nis_draft: false\ntags: []\ncategories: []\n"
+            "post_publisher:\n  foo: 1\n---\nText"
+        )
+
+        result = codec.load_many(
+            sorted(postsdir.files()), workers=2, executor=executor
+        )
+
+        assert sorted(result.errors) == [
+            postsdir / "extra_key.md",
+            postsdir / "invalid_id.md",
+            postsdir / "invalid_tags.md",
+            postsdir / "invalid_title.md",
+        ]
+        assert "title" in str(result.errors[postsdir / "invalid_title.md"])
+        assert "tags" in str(result.errors[postsdir / "invalid_tags.md"])
+        posts = {post.filepath.name: post for post in result.posts}
+        assert posts["valid.md"] == expected_post
+        assert (posts["converted.md"].title, posts["converted.md"].is_draft) == (
+            "1",
+            True,
+        )
+        # The process workers already validated the posts they sent back
+        assert bool(validated) == (executor == "thread")
+
+    def test_validate_posts_post_publisher(self, tmpdir, expected_post):
+        codec = PostCodec(postsdir=Path(tmpdir), trusted=True)
+        invalid_post = expected_post.copy(
+            update={
+                "filepath": Path("invalid_id.md"),
+                "post_publisher": codec._new(PostPublisher, id="not-a-uuid"),
+            }
+        )
+        extra_key_post = expected_post.copy(
+            update={
+                "filepath": Path("extra_key.md"),
+                "post_publisher": codec._new(PostPublisher, foo=1),
+            }
+        )
+
+        errors = validate_posts([expected_post, invalid_post, extra_key_post])
+
+        assert sorted(errors) == [extra_key_post.filepath, invalid_post.filepath]
+        assert "post_publisher -> id" in str(errors[invalid_post.filepath])
+        assert "post_publisher -> foo" in str(errors[extra_key_post.filepath])
+
+    def test_pickle_codec(self, tmpdir):
+        codec = HugoPostCodec(
+            postsdir=Path(tmpdir),
+            ignore_globs=["drafts/*"],
+            markdown_extensions=["tables"],
+            parser_backend="pure",
+            trusted=True,
+        )
+
+        assert pickle.loads(pickle.dumps(codec)).config == codec.config
+
+    def test_load_many_unknown_executor(self, tmpdir):
+        codec = PostCodec(postsdir=Path(tmpdir))
+
+        with pytest.raises(ValueError, match="Unknown executor 'fiber'."):
+            codec.load_many([], executor="fiber")
+
     def test_invalid_frontmatter_data(self, tmpdir):
         invalid_post = """---
 invalid_var: false
@@ -274,3 +814,164 @@ class TestHugoPostCodec:
         assert file_frontmatter["title"] == expected_json["title"]
         assert file_frontmatter["tags"] == expected_json["tags"]
         assert file_frontmatter["categories"] == expected_json["categories"]
+
+    def test_draft_key(self, tmpdir):
+        filepath = Path(tmpdir) / "post.md"
+        filepath.write_text(
+            "---\ntitle: T\ndraft: true\ntags: []\ncategories: []\n---\nText"
+        )
+
+        post = HugoPostCodec(postsdir=Path(tmpdir)).load(filepath)
+
+        assert post.is_draft is True
+        with pytest.raises(PostDecodeError, match="is_draft.+ key is missing."):
+            PostCodec(postsdir=Path(tmpdir)).load(filepath)
+
+    def test_missing_key(self, tmpdir):
+        filepath = Path(tmpdir) / "post.md"
+        filepath.write_text("---\ntitle: T\ntags: []\ncategories: []\n---\nText")
+
+        with pytest.raises(PostDecodeError, match="is_draft.+ key is missing."):
+            HugoPostCodec(postsdir=Path(tmpdir)).load(filepath)
+
+
+class TestCustomCodec:
+    def test_metadata_fields(self, tmpdir):
+        class JekyllPostCodec(PostCodec):
+            METADATA_FIELDS = [
+                MetadataField("is_draft", ("published",), True, lambda v: not v),
+                MetadataField("title", ("title",)),
+                MetadataField("tags", ("tags",), [], str.split),
+                MetadataField("categories", ("categories", "category"), []),
+            ]
+
+        filepath = Path(tmpdir) / "post.md"
+        filepath.write_text("---\ntitle: T\npublished: true\ntags: a b\n---\nText")
+
+        post = JekyllPostCodec(postsdir=Path(tmpdir)).load(filepath)
+
+        assert post.is_draft is False
+        assert post.tags == {"a", "b"}
+        assert post.categories == frozenset()
+
+    def test_no_content_formats(self, tmpdir):
+        class AbstractPostCodec(IPostCodec):
+            pass
+
+        for codec_class in [IPostCodec, AbstractPostCodec]:
+            message = f"{codec_class.__name__} does not declare CONTENT_FORMATS."
+            with pytest.raises(TypeError, match=message):
+                codec_class(postsdir=Path(tmpdir))
+
+
+class TestPost:
+    def test_equality_ignores_whitespace_in_content(self, expected_post):
+        other_post = expected_post.copy(
+            update={"content": "<h1>Content</h1>\n<p>paragraph</p>"}
+        )
+
+        assert other_post == expected_post
+        assert hash(other_post) == hash(expected_post)
+
+    def test_content_fingerprint_follows_content(self, expected_post):
+        fingerprint = expected_post.content_fingerprint
+
+        assert expected_post.content_fingerprint is fingerprint
+
+        other_post = expected_post.copy(update={"content": "<p>Other</p>"})
+        expected_post.content = "<p>Other</p>"
+
+        assert expected_post.content_fingerprint != fingerprint
+        assert other_post.content_fingerprint == expected_post.content_fingerprint
+
+    def test_inequality(self, expected_post):
+        for field, value in [
+            ("title", "Other Title"),
+            ("content", "<p>Other</p>"),
+            ("tags", frozenset()),
+            ("is_draft", False),
+            ("post_publisher", PostPublisher()),
+            ("filepath", Path("other.md")),
+        ]:
+            assert expected_post.copy(update={field: value}) != expected_post
+
+    def test_set_of_posts(self, expected_post):
+        posts = {expected_post, expected_post.copy(deep=True)}
+
+        assert posts == {expected_post}
+
+    def test_equality_with_dict(self, expected_post):
+        assert expected_post == expected_post.dict()
+
+    def test_diff_posts(self, expected_post):
+        unchanged, changed, removed = [
+            expected_post.copy(update={"filepath": Path(f"{i}.md")}) for i in range(3)
+        ]
+        new_changed = changed.copy(update={"title": "New Title"})
+        added = expected_post.copy(update={"filepath": Path("added.md")})
+
+        diff = diff_posts(
+            [unchanged, changed, removed], [added, unchanged.copy(), new_changed]
+        )
+
+        assert diff == PostsDiff(added=[added], removed=[removed], changed=[new_changed])
+
+    def test_diff_posts_without_app_data(self, tmpdir):
+        filepath = Path(tmpdir) / "post.md"
+        filepath.write_text(
+            "---\ntitle: Title\nis_draft: false\ntags: []\ncategories: []\n---\nText"
+        )
+        codec = PostCodec(postsdir=Path(tmpdir))
+
+        old_post, new_post = codec.load(filepath), codec.load(filepath)
+
+        assert old_post.post_publisher.id != new_post.post_publisher.id
+        assert old_post == new_post
+        assert hash(old_post) == hash(new_post)
+        assert diff_posts([old_post], [new_post]) == PostsDiff([], [], [])
+
+    def test_diff_post_contents(self, expected_post):
+        new_post = expected_post.copy(
+            update={"content": "<h1>Content</h1>\n<p>other paragraph</p>"}
+        )
+
+        patch = diff_post_contents(expected_post, new_post)
+
+        assert patch.edits == (BlockEdit(1, 2, ("<p>other paragraph</p>",)),)
+        assert apply_patch(expected_post.content_blocks, patch) == new_post.content
+        assert diff_post_contents(expected_post, expected_post.copy()).edits == ()
+
+    def test_wire_format(self, expected_post):
+        expected_post.post_publisher = PostPublisher()
+        expected_post.filepath = Path("posts/été.md")
+        expected_post.canonical_url = "https://example.com/été"
+        expected_post.tags = frozenset(["tag1", "ünïcode", ""])
+        expected_post.categories = frozenset()
+
+        post = decode_post(encode_post(expected_post))
+
+        assert not post.is_content_loaded
+        assert post == expected_post
+        assert post.canonical_url == expected_post.canonical_url
+        assert isinstance(post.canonical_url, HttpUrl)
+        assert post.__fields_set__ == expected_post.__fields_set__
+        assert post.post_publisher.__fields_set__ == set()
+        assert post.post_publisher.id == expected_post.post_publisher.id
+
+    def test_wire_format_keeps_markdown_source(self, expected_post):
+        expected_post.set_markdown_source("# Content", expected_post.content)
+        expected_post.post_publisher = PostPublisher(id=expected_post.post_publisher.id)
+
+        post = decode_post(encode_post(expected_post))
+
+        assert post.markdown_source == "# Content"
+        assert post.post_publisher.__fields_set__ == {"id"}
+        assert post.content == expected_post.content
+
+    def test_wire_format_unknown_version(self, expected_post):
+        data = bytearray(encode_post(expected_post))
+        data[0] += 1
+
+        with pytest.raises(ValueError, match="Unknown post wire format version"):
+            decode_post(bytes(data))
+
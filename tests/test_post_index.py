@@ -0,0 +1,149 @@
+from uuid import uuid4
+
+import pytest
+from path import Path
+
+from src.post_codecs import PostCodec, PostPublisher
+from src.post_index import PostIndex
+from src.post_manifest import ChangeKind, PostChange
+
+POST = """---
+title: {title}
+is_draft: {is_draft}
+tags: {tags}
+categories: {categories}
+---
+Content
+"""
+
+
+@pytest.fixture
+def postsdir(tmpdir):
+    postsdir = (Path(tmpdir) / "posts").mkdir()
+    for name, is_draft, tags, categories in [
+        ("a", "false", "[python, web]", "[dev]"),
+        ("b", "true", "[python]", "[dev]"),
+        ("c", "false", "[python]", "[life]"),
+        ("d", "false", "[]", "[]"),
+    ]:
+        (postsdir / f"{name}.md").write_text(
+            POST.format(title=name, is_draft=is_draft, tags=tags, categories=categories)
+        )
+
+    return postsdir
+
+
+@pytest.fixture
+def index(postsdir):
+    index = PostIndex()
+    assert index.rebuild(PostCodec(postsdir)) == {}
+
+    return index
+
+
+class TestPostIndex:
+    def test_find(self, index, postsdir):
+        assert len(index) == 4
+        assert index.find(tags=["python"]) == {
+            postsdir / "a.md",
+            postsdir / "b.md",
+            postsdir / "c.md",
+        }
+        assert index.find(tags=["python"], is_draft=False) == {
+            postsdir / "a.md",
+            postsdir / "c.md",
+        }
+        assert index.find(tags=["python"], categories=["dev"], is_draft=False) == {
+            postsdir / "a.md"
+        }
+        assert index.find(tags=["python", "unknown"]) == set()
+        assert index.find(is_draft=True) == {postsdir / "b.md"}
+        assert len(index.find()) == 4
+
+    def test_tags_and_categories(self, index):
+        assert index.tags() == ["python", "web"]
+        assert index.categories() == ["dev", "life"]
+
+    def test_post_publisher_id(self, index, postsdir, expected_post):
+        expected_post.filepath = postsdir / "e.md"
+        expected_post.post_publisher = PostPublisher(id=uuid4())
+        index.add(expected_post)
+
+        assert (
+            index.find_by_post_publisher_id(expected_post.post_publisher.id)
+            == expected_post.filepath
+        )
+        # A generated ID is not indexed
+        assert index.entries[postsdir / "a.md"].post_publisher_id is None
+
+        index.remove(expected_post.filepath)
+
+        assert index.find_by_post_publisher_id(expected_post.post_publisher.id) is None
+
+    def test_incremental_update(self, index, postsdir, expected_post):
+        codec = PostCodec(postsdir)
+        (postsdir / "a.md").write_text(
+            POST.format(title="a", is_draft="true", tags="[rust]", categories="[dev]")
+        )
+        (postsdir / "b.md").remove()
+        (postsdir / "e.md").write_text("No frontmatter")
+
+        errors = index.apply(
+            codec,
+            [
+                PostChange(ChangeKind.MODIFIED, postsdir / "a.md"),
+                PostChange(ChangeKind.DELETED, postsdir / "b.md"),
+                PostChange(ChangeKind.ADDED, postsdir / "e.md"),
+            ],
+        )
+
+        assert list(errors) == [postsdir / "e.md"]
+        assert index.tags() == ["python", "rust"]
+        assert index.find(tags=["python"]) == {postsdir / "c.md"}
+        assert index.find(is_draft=True) == {postsdir / "a.md"}
+        assert postsdir / "b.md" not in index
+
+    def test_rebuild_invalid_post(self, postsdir):
+        (postsdir / "a.md").write_text(
+            POST.format(title="a", is_draft="maybe", tags="[rust]", categories="[]")
+        )
+        index = PostIndex()
+
+        errors = index.rebuild(PostCodec(postsdir))
+
+        assert list(errors) == [postsdir / "a.md"]
+        assert "is_draft" in str(errors[postsdir / "a.md"])
+        assert len(index) == 3
+        assert index.tags() == ["python"]
+
+    def test_replace_post(self, index, postsdir, expected_post):
+        expected_post.filepath = postsdir / "a.md"
+        expected_post.post_publisher = PostPublisher(id=uuid4())
+
+        index.add(expected_post)
+
+        assert len(index) == 4
+        assert index.tags() == ["python", "tag1", "tag2"]
+        assert index.find(tags=["tag1"]) == {postsdir / "a.md"}
+
+    def test_save_and_load(self, index, tmpdir, expected_post, postsdir):
+        expected_post.filepath = postsdir / "e.md"
+        expected_post.post_publisher = PostPublisher(id=uuid4())
+        index.add(expected_post)
+        filepath = Path(tmpdir) / "index.json"
+
+        index.save(filepath)
+        loaded_index = PostIndex.load(filepath)
+
+        assert loaded_index.entries == index.entries
+        assert loaded_index.find(tags=["python"], is_draft=False) == {
+            postsdir / "a.md",
+            postsdir / "c.md",
+        }
+        assert (
+            loaded_index.find_by_post_publisher_id(expected_post.post_publisher.id)
+            == expected_post.filepath
+        )
+
+    def test_load_missing_file(self, tmpdir):
+        assert len(PostIndex.load(Path(tmpdir) / "index.json")) == 0
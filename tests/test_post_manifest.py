@@ -0,0 +1,99 @@
+import os
+
+import pytest
+from path import Path
+
+from src.post_codecs import PostCodec
+from src.post_manifest import ChangeKind, PostChange, PostManifest
+
+
+@pytest.fixture
+def postsdir(tmpdir):
+    postsdir = (Path(tmpdir) / "posts").mkdir()
+    (postsdir / "a.md").write_text("a")
+    (postsdir / "b.md").write_text("b")
+    (postsdir / "dir").mkdir()
+    (postsdir / "dir/c.md").write_text("c")
+    (postsdir / "dir/image.png").write_bytes(b"")
+
+    return postsdir
+
+
+class TestPostManifest:
+    def test_first_run(self, tmpdir, postsdir):
+        manifest = PostManifest(Path(tmpdir) / "manifest.json", PostCodec(postsdir))
+
+        changes = sorted(manifest.changes())
+
+        assert changes == [
+            PostChange(ChangeKind.ADDED, postsdir / "a.md"),
+            PostChange(ChangeKind.ADDED, postsdir / "b.md"),
+            PostChange(ChangeKind.ADDED, postsdir / "dir/c.md"),
+        ]
+
+    def test_no_changes_after_commit(self, tmpdir, postsdir):
+        manifest = PostManifest(Path(tmpdir) / "manifest.json", PostCodec(postsdir))
+        list(manifest.changes())
+        manifest.commit()
+
+        manifest = PostManifest(Path(tmpdir) / "manifest.json", PostCodec(postsdir))
+
+        assert list(manifest.changes()) == []
+
+    def test_changes_without_commit_are_reported_again(self, tmpdir, postsdir):
+        manifest = PostManifest(Path(tmpdir) / "manifest.json", PostCodec(postsdir))
+        list(manifest.changes())
+
+        assert len(list(manifest.changes())) == 3
+
+    def test_added_modified_deleted(self, tmpdir, postsdir):
+        manifest = PostManifest(Path(tmpdir) / "manifest.json", PostCodec(postsdir))
+        list(manifest.changes())
+        manifest.commit()
+
+        (postsdir / "a.md").write_text("modified a")
+        (postsdir / "b.md").remove()
+        (postsdir / "dir/d.md").write_text("d")
+
+        assert set(manifest.changes()) == {
+            PostChange(ChangeKind.ADDED, postsdir / "dir/d.md"),
+            PostChange(ChangeKind.DELETED, postsdir / "b.md"),
+            PostChange(ChangeKind.MODIFIED, postsdir / "a.md"),
+        }
+
+    def test_touched_file_is_not_modified(self, tmpdir, postsdir):
+        manifest = PostManifest(Path(tmpdir) / "manifest.json", PostCodec(postsdir))
+        list(manifest.changes())
+        manifest.commit()
+
+        stat = (postsdir / "a.md").stat()
+        os.utime(postsdir / "a.md", ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+        assert list(manifest.changes()) == []
+
+    def test_unchanged_stat_is_not_read(self, tmpdir, postsdir, monkeypatch):
+        manifest = PostManifest(Path(tmpdir) / "manifest.json", PostCodec(postsdir))
+        list(manifest.changes())
+        manifest.commit()
+
+        def read_bytes(self):
+            raise AssertionError(f"{self} was read")
+
+        monkeypatch.setattr(Path, "read_bytes", read_bytes)
+
+        assert list(manifest.changes()) == []
+
+    def test_ignored_posts(self, tmpdir, postsdir):
+        codec = PostCodec(postsdir, ignore_globs=["dir/**"])
+        manifest = PostManifest(Path(tmpdir) / "manifest.json", codec)
+
+        assert sorted(change.filepath for change in manifest.changes()) == [
+            postsdir / "a.md",
+            postsdir / "b.md",
+        ]
+
+    def test_commit_before_changes(self, tmpdir, postsdir):
+        manifest = PostManifest(Path(tmpdir) / "manifest.json", PostCodec(postsdir))
+
+        with pytest.raises(RuntimeError, match=r"changes\(\) must be fully iterated"):
+            manifest.commit()
@@ -0,0 +1,136 @@
+import pytest
+from path import Path
+
+from src.post_codecs import PostCodec, PostPublisher
+from src.post_index import PostIndex
+from src.post_store import PostStore
+
+
+@pytest.fixture
+def store():
+    with PostStore() as store:
+        yield store
+
+
+class TestPostStore:
+    def test_add_and_get(self, store, expected_post):
+        expected_post.filepath = Path("posts/post.md")
+
+        store.add(expected_post)
+
+        assert len(store) == 1
+        assert expected_post.filepath in store
+        assert store[expected_post.filepath] == expected_post
+        assert store.get("posts/post.md") == expected_post
+        assert store.get("posts/other.md") is None
+        assert store.filepaths() == [expected_post.filepath]
+
+    def test_views_are_lazy(self, store, expected_post):
+        store.add(expected_post)
+
+        post = store[expected_post.filepath]
+
+        assert not post.is_content_loaded
+        assert post.title == expected_post.title
+        assert post.content == expected_post.content
+        assert post.post_publisher.id == expected_post.post_publisher.id
+        assert isinstance(post.filepath, Path)
+
+    def test_keeps_missing_app_data(self, store, expected_post):
+        expected_post.post_publisher = PostPublisher()
+        with_app_data = expected_post.copy(
+            update={
+                "filepath": Path("with_app_data.md"),
+                "post_publisher": PostPublisher(id=expected_post.post_publisher.id),
+            }
+        )
+        store.extend([expected_post, with_app_data])
+
+        assert store[expected_post.filepath].post_publisher.__fields_set__ == set()
+        assert store[with_app_data.filepath].post_publisher.__fields_set__ == {"id"}
+
+        index = PostIndex()
+        for post in store:
+            index.add(post)
+
+        assert index.find_by_post_publisher_id(expected_post.post_publisher.id) == (
+            with_app_data.filepath
+        )
+        assert index.entries[expected_post.filepath].post_publisher_id is None
+
+    def test_interned_tags(self, store, expected_post):
+        for i in range(3):
+            store.add(expected_post.copy(update={"filepath": Path(f"post_{i}.md")}))
+
+        posts = list(store)
+
+        assert len({id(post.tags) for post in posts}) == 1
+        assert all(post.tags == expected_post.tags for post in posts)
+        assert len(store._string_sets) == 2
+
+    def test_replace_and_remove(self, store, expected_post):
+        store.add(expected_post)
+        store.add(expected_post.copy(update={"title": "New Title", "content": "é"}))
+
+        assert len(store) == 1
+        assert store[expected_post.filepath].title == "New Title"
+        assert store[expected_post.filepath].content == "é"
+
+        store.remove(expected_post.filepath)
+
+        assert len(store) == 0
+        assert list(store) == []
+
+    def test_content_added_after_a_read(self, store, expected_post):
+        store.add(expected_post.copy(update={"filepath": Path("a.md")}))
+        assert store["a.md"].content == expected_post.content
+
+        store.add(expected_post.copy(update={"filepath": Path("b.md"), "content": ""}))
+        store.add(expected_post.copy(update={"filepath": Path("c.md"), "content": "C"}))
+
+        assert store["b.md"].content == ""
+        assert store["c.md"].content == "C"
+
+    def test_keeps_markdown_source(self, tmpdir, store, expected_post):
+        postsdir = Path(tmpdir)
+        expected_post.filepath = postsdir / "post.md"
+        codec = PostCodec(postsdir=postsdir)
+        codec.dump(expected_post)
+        loaded_post = codec.load(expected_post.filepath, lazy=True)
+
+        store.add(loaded_post)
+        post = store[expected_post.filepath]
+
+        assert post.markdown_source == loaded_post.markdown_source
+        assert post.content == loaded_post.content
+        assert post.markdown_source == loaded_post.markdown_source
+
+        post.content = "<p>New</p>"
+        assert post.markdown_source is None
+
+    def test_metadata_pass_reads_nothing(self, store, expected_post, monkeypatch):
+        for i in range(3):
+            post = expected_post.copy(update={"filepath": Path(f"{i}.md")})
+            post.set_markdown_source("# Content", post.content)
+            store.add(post)
+        reads = []
+        read = store._read
+        monkeypatch.setattr(
+            store, "_read", lambda *args: reads.append(args) or read(*args)
+        )
+
+        assert [post.title for post in store] == 3 * [expected_post.title]
+        assert reads == []
+
+        assert store["0.md"].markdown_source == "# Content"
+        assert len(reads) == 2
+
+    def test_content_file(self, tmpdir, expected_post):
+        content_filepath = Path(tmpdir) / "contents.bin"
+
+        with PostStore(content_filepath) as store:
+            store.add(expected_post)
+
+            assert store[expected_post.filepath].content == expected_post.content
+
+        assert content_filepath.read_bytes() == expected_post.content.encode("utf-8")
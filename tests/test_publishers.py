@@ -0,0 +1,238 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from path import Path
+
+from src.publishers import (
+    HttpPlatformClient,
+    PublishError,
+    Publisher,
+    RetryablePublishError,
+    TokenBucket,
+)
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, delay=0.0, failures=0, status_code=503, retry_after=None):
+        super().__init__(("127.0.0.1", 0), StubHandler)
+        self.delay = delay
+        self.failures = failures
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+        self.lock = threading.Lock()
+        self.payloads = list()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.client_ports = set()
+
+    @property
+    def endpoint(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/posts"
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    # Keeps the connections alive between the requests
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        server = self.server
+        payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        with server.lock:
+            server.client_ports.add(self.client_address[1])
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+            failed = server.failures > 0
+            server.failures -= failed
+
+        time.sleep(server.delay)
+
+        with server.lock:
+            server.in_flight -= 1
+            if not failed:
+                server.payloads.append(payload)
+
+        body = b"" if failed else json.dumps({"id": f"remote-{payload['id']}"}).encode()
+        self.send_response(server.status_code if failed else 200)
+        self.send_header("Content-Length", str(len(body)))
+        if failed and server.retry_after is not None:
+            self.send_header("Retry-After", str(server.retry_after))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def stub_server(request):
+    server = StubServer(**getattr(request, "param", dict()))
+    thread = threading.Thread(target=server.serve_forever, args=(0.01,), daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def posts(expected_post):
+    return [
+        expected_post.copy(
+            update={"filepath": Path(f"post_{i}.md"), "title": f"Post {i}"}, deep=True
+        )
+        for i in range(8)
+    ]
+
+
+class TestTokenBucket:
+    def test_invalid_rate(self):
+        with pytest.raises(ValueError, match="The rate must be positive."):
+            TokenBucket(0)
+
+
+class TestPublisher:
+    @pytest.mark.parametrize("stub_server", [{"delay": 0.1}], indirect=True)
+    def test_publish(self, stub_server, posts):
+        client = HttpPlatformClient("stub", stub_server.endpoint, max_concurrency=4)
+
+        with Publisher([client]) as publisher:
+            results = publisher.publish(posts)
+
+        assert sorted(result.filepath for result in results) == sorted(
+            post.filepath for post in posts
+        )
+        assert all(result.error is None for result in results)
+        assert {result.remote_id for result in results} == {
+            f"remote-{post.post_publisher.id}" for post in posts
+        }
+        assert {payload["title"] for payload in stub_server.payloads} == {
+            post.title for post in posts
+        }
+        # The requests run concurrently, over reused connections
+        assert stub_server.max_in_flight == 4
+        assert len(stub_server.client_ports) <= 4
+
+    @pytest.mark.parametrize("stub_server", [{"delay": 0.05}], indirect=True)
+    def test_throughput_scales_with_concurrency(self, stub_server, posts):
+        durations = dict()
+        for max_concurrency in [1, 8]:
+            client = HttpPlatformClient(
+                "stub", stub_server.endpoint, max_concurrency=max_concurrency
+            )
+            with Publisher([client]) as publisher:
+                start = time.perf_counter()
+                publisher.publish(posts)
+                durations[max_concurrency] = time.perf_counter() - start
+
+        assert durations[1] >= 8 * 0.05
+        assert durations[8] < durations[1] / 2
+
+    def test_rate_limit(self, stub_server, posts):
+        client = HttpPlatformClient(
+            "stub", stub_server.endpoint, max_concurrency=8, rate=40
+        )
+
+        with Publisher([client]) as publisher:
+            start = time.perf_counter()
+            publisher.publish(posts[:5])
+
+        # The first request uses the initial token
+        assert time.perf_counter() - start >= 4 / 40
+
+    @pytest.mark.parametrize("stub_server", [{"failures": 2}], indirect=True)
+    def test_retry(self, stub_server, posts):
+        client = HttpPlatformClient("stub", stub_server.endpoint, max_concurrency=1)
+
+        with Publisher([client], backoff=0.01) as publisher:
+            results = publisher.publish(posts[:1])
+
+        assert results[0].error is None
+        assert results[0].attempts == 3
+
+    @pytest.mark.parametrize(
+        "stub_server", [{"failures": 1, "retry_after": 3600}], indirect=True
+    )
+    def test_retry_after_is_capped(self, stub_server, posts):
+        client = HttpPlatformClient("stub", stub_server.endpoint, max_concurrency=1)
+
+        start = time.perf_counter()
+        with Publisher([client], max_backoff=0.05) as publisher:
+            results = publisher.publish(posts[:1])
+
+        assert results[0].error is None
+        assert results[0].attempts == 2
+        assert time.perf_counter() - start < 5
+
+    @pytest.mark.parametrize("stub_server", [{"failures": 10}], indirect=True)
+    def test_retries_exhausted(self, stub_server, posts):
+        client = HttpPlatformClient("stub", stub_server.endpoint, max_concurrency=1)
+
+        with Publisher([client], max_retries=2, backoff=0.01) as publisher:
+            results = publisher.publish(posts[:1])
+
+        assert isinstance(results[0].error, RetryablePublishError)
+        assert results[0].remote_id is None
+        assert results[0].attempts == 3
+
+    @pytest.mark.parametrize(
+        "stub_server", [{"failures": 10, "status_code": 400}], indirect=True
+    )
+    def test_permanent_error(self, stub_server, posts):
+        client = HttpPlatformClient("stub", stub_server.endpoint)
+
+        with Publisher([client], backoff=0.01) as publisher:
+            results = publisher.publish(posts[:2])
+
+        assert all(type(result.error) is PublishError for result in results)
+        assert all(result.attempts == 1 for result in results)
+
+    def test_several_platforms(self, stub_server, posts):
+        clients = [
+            HttpPlatformClient("first", stub_server.endpoint),
+            HttpPlatformClient("second", stub_server.endpoint),
+        ]
+
+        with Publisher(clients) as publisher:
+            results = publisher.publish(iter(posts))
+
+        assert len(results) == 2 * len(posts)
+        assert {result.platform for result in results} == {"first", "second"}
+
+    def test_lazy_content_is_rendered_once(self, stub_server, posts):
+        calls = list()
+
+        def load_content():
+            calls.append(None)
+            time.sleep(0.05)
+            return "<p>Lazy</p>"
+
+        post = posts[0]
+        post.defer_content(load_content)
+        clients = [
+            HttpPlatformClient("first", stub_server.endpoint),
+            HttpPlatformClient("second", stub_server.endpoint),
+            HttpPlatformClient("third", stub_server.endpoint),
+        ]
+
+        with Publisher(clients) as publisher:
+            results = publisher.publish([post])
+
+        assert all(result.error is None for result in results)
+        assert len(calls) == 1
+        assert [payload["content"] for payload in stub_server.payloads] == 3 * [
+            "<p>Lazy</p>"
+        ]
+
+    def test_unique_platform_names(self, stub_server):
+        clients = [
+            HttpPlatformClient("stub", stub_server.endpoint),
+            HttpPlatformClient("stub", stub_server.endpoint),
+        ]
+
+        with pytest.raises(ValueError, match="The platform names must be unique."):
+            Publisher(clients)
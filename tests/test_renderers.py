@@ -0,0 +1,72 @@
+import pickle
+from concurrent.futures import ThreadPoolExecutor
+
+from markdown import markdown
+
+from src.post_codecs import HugoPostCodec, PostCodec
+from src.renderers import MarkdownRenderer
+
+TEXTS = [
+    "# Title\n\nparagraph",
+    "* item 1\n* item 2\n\n> quote",
+    "[link][ref]\n\n[ref]: https://example.com",
+    "[link][ref]",
+]
+
+
+class TestMarkdownRenderer:
+    def test_same_output_as_markdown(self):
+        renderer = MarkdownRenderer()
+
+        assert [renderer.render(text) for text in TEXTS] == [
+            markdown(text) for text in TEXTS
+        ]
+
+    def test_extensions(self):
+        renderer = MarkdownRenderer(["tables", "fenced_code", "toc"])
+        text = "# Title\n\n```python\ncode\n```\n\n| a | b |\n|---|---|\n| 1 | 2 |"
+
+        assert renderer.render(text) == markdown(
+            text, extensions=["tables", "fenced_code", "toc"]
+        )
+
+    def test_state_is_reset_between_documents(self):
+        renderer = MarkdownRenderer(["toc"])
+
+        assert renderer.render("# Title") == renderer.render("# Title")
+
+    def test_threads(self):
+        renderer = MarkdownRenderer()
+
+        with ThreadPoolExecutor(4) as executor:
+            rendered = list(executor.map(renderer.render, TEXTS * 50))
+
+        assert rendered == [markdown(text) for text in TEXTS * 50]
+
+    def test_pickle(self):
+        renderer = MarkdownRenderer(["toc"])
+        renderer.render("# Title")
+
+        unpickled_renderer = pickle.loads(pickle.dumps(renderer))
+
+        assert unpickled_renderer.extensions == ("toc",)
+        assert unpickled_renderer.render("# Title") == renderer.render("# Title")
+
+
+class TestCodecRenderer:
+    def test_codec_extensions(self, tmpdir):
+        assert PostCodec(postsdir=tmpdir).renderer.extensions == ()
+        assert HugoPostCodec(postsdir=tmpdir).renderer.extensions == (
+            "tables",
+            "fenced_code",
+            "toc",
+        )
+        assert PostCodec(
+            postsdir=tmpdir, markdown_extensions=["toc"]
+        ).renderer.extensions == ("toc",)
+
+    def test_extensions_are_part_of_the_cache_key(self, tmpdir):
+        codec = PostCodec(postsdir=tmpdir)
+        codec_with_toc = PostCodec(postsdir=tmpdir, markdown_extensions=["toc"])
+
+        assert codec._cache_key(b"data") != codec_with_toc._cache_key(b"data")
@@ -1,10 +1,42 @@
-import pytest
+import io
+import os
+from typing import FrozenSet, Optional
+from uuid import UUID, uuid4
 
+import frontmatter
+import pytest
+import toml
+from path import Path
+from pydantic import BaseModel, Field, HttpUrl, PrivateAttr
+
+from src.utils.content_diff import (
+    BlockEdit,
+    apply_patch,
+    diff_content,
+    index_blocks,
+    split_blocks,
+)
+from src.utils.frontmatter_blocks import (
+    find_frontmatter,
+    parse_frontmatter,
+    parse_frontmatter_bytes,
+    scan_frontmatter,
+    set_metadata_entry,
+)
+from src.utils.field_maps import MetadataField, compile_field_map
+from src.utils.globs import IgnoreMatcher
+from src.utils import misc
 from src.utils.misc import (
+    atomic_write_bytes,
+    atomic_write_many,
+    freeze_nested,
+    get_nested_value,
     is_absolute_url,
     list_to_nested_dicts,
     merge_nested_dicts,
 )
+from src.utils.parsers import FAST_PARSERS, PURE_PARSERS, get_parsers
+from src.utils.trusted_models import construct_trusted, is_exact, validate_values
 
 
 class TestIsUrl:
@@ -125,3 +157,556 @@ class TestMergeNestedDicts:
         merged_dict = merge_nested_dicts(a, b)
 
         assert merged_dict == {1: 2, 3: {4: 10, 6: 7}, 8: 9}
+
+
+class TestContentDiff:
+    def test_split_blocks(self):
+        html = (
+            "<h1>Title</h1>\n<p>A <em>paragraph</em></p>\n\n"
+            "<ul>\n<li>a</li>\n<li><p>b</p></li>\n</ul>\n<hr />\n"
+            "<pre><code>&lt;p&gt;\n\n</p></code></pre>\ntext<!-- comment -->"
+        )
+
+        assert split_blocks(html) == [
+            "<h1>Title</h1>",
+            "<p>A <em>paragraph</em></p>",
+            "<ul>\n<li>a</li>\n<li><p>b</p></li>\n</ul>",
+            "<hr />",
+            "<pre><code>&lt;p&gt;\n\n</p></code></pre>",
+            "text",
+            "<!-- comment -->",
+        ]
+
+    def test_split_blocks_unbalanced_tags(self):
+        assert split_blocks("</div><p>a</p><div><p>b") == ["</div>", "<p>a</p>", "<div><p>b"]
+        assert split_blocks("") == []
+
+    def test_diff_content(self):
+        old_html = "\n".join(f"<p>{i}</p>" for i in range(10))
+        new_html = "\n".join(
+            ["<p>0</p>", "<p>new</p>"]
+            + [f"<p>{i}</p>" for i in range(1, 10) if i != 5]
+            + ["<hr />"]
+        )
+
+        patch = diff_content(old_html, new_html)
+
+        assert patch.edits == (
+            BlockEdit(1, 1, ("<p>new</p>",)),
+            BlockEdit(5, 6, ()),
+            BlockEdit(10, 10, ("<hr />",)),
+        )
+        assert apply_patch(index_blocks(old_html), patch) == new_html
+
+    def test_diff_same_content(self):
+        html = "<hr />\n<p>a</p>\n<hr />"
+
+        patch = diff_content(html, html.replace("\n", "\n\n"))
+
+        assert patch.edits == ()
+        assert apply_patch(index_blocks("<p>other</p>"), patch) == "<p>other</p>"
+
+    def test_apply_patch_other_content(self):
+        patch = diff_content("<p>a</p>", "<p>b</p>")
+
+        with pytest.raises(ValueError, match="The patch does not apply"):
+            apply_patch(index_blocks("<p>c</p>"), patch)
+
+
+class TestCompileFieldMap:
+    def test_keys(self):
+        extract = compile_field_map(
+            [
+                MetadataField("title", ("title",)),
+                MetadataField("is_draft", ("is_draft", "draft")),
+                MetadataField("tags", ("tags", "tag"), frozenset()),
+            ]
+        )
+
+        assert extract({"title": "T", "is_draft": True, "draft": False}) == {
+            "title": "T",
+            "is_draft": True,
+            "tags": frozenset(),
+        }
+        assert extract({"title": "T", "draft": False, "tag": ["a"]}) == {
+            "title": "T",
+            "is_draft": False,
+            "tags": ["a"],
+        }
+
+    def test_transform(self):
+        extract = compile_field_map(
+            [MetadataField("is_draft", ("published",), True, lambda value: not value)]
+        )
+
+        assert extract({"published": True}) == {"is_draft": False}
+        assert extract({}) == {"is_draft": False}
+
+    @pytest.mark.parametrize("keys", [("title",), ("title", "name")])
+    def test_missing_key(self, keys):
+        extract = compile_field_map([MetadataField("title", keys)])
+
+        with pytest.raises(KeyError, match="'title'"):
+            extract({"other": 1})
+
+    def test_no_key(self):
+        with pytest.raises(ValueError, match="Field 'title' has no key."):
+            compile_field_map([MetadataField("title", ())])
+
+
+class TestIgnoreMatcher:
+    def test_no_patterns(self):
+        matcher = IgnoreMatcher([])
+
+        assert not matcher.is_ignored("post.md")
+        assert not matcher.is_ignored("dir/post.md")
+
+    def test_star_does_not_cross_directories(self):
+        matcher = IgnoreMatcher(["dir/*"])
+
+        assert matcher.is_ignored("dir/post.md")
+        assert matcher.is_ignored("dir/subdir")
+        assert not matcher.is_ignored("dir/subdir/post.md")
+        assert not matcher.is_ignored("post.md")
+
+    def test_double_star(self):
+        matcher = IgnoreMatcher(["**/drafts/**"])
+
+        assert matcher.is_ignored("drafts")
+        assert matcher.is_ignored("drafts/post.md")
+        assert matcher.is_ignored("2020/drafts/post.md")
+        assert matcher.is_ignored("2020/drafts/dir/post.md")
+        assert not matcher.is_ignored("2020/post.md")
+
+    def test_hidden_files(self):
+        matcher = IgnoreMatcher(["*", "**/*.md"])
+
+        assert matcher.is_ignored("post.md")
+        assert matcher.is_ignored("dir/post.md")
+        assert not matcher.is_ignored(".post.md")
+        assert not matcher.is_ignored("dir/.post.md")
+        assert IgnoreMatcher([".*"]).is_ignored(".post.md")
+
+    def test_character_classes(self):
+        matcher = IgnoreMatcher(["post[0-9].md", "[!a]*.txt"])
+
+        assert matcher.is_ignored("post1.md")
+        assert not matcher.is_ignored("posta.md")
+        assert matcher.is_ignored("b.txt")
+        assert not matcher.is_ignored("a.txt")
+
+    def test_negation_last_match_wins(self):
+        matcher = IgnoreMatcher(["*.md", "!keep*.md", "keep_not.md"])
+
+        assert matcher.is_ignored("post.md")
+        assert not matcher.is_ignored("keep.md")
+        assert matcher.is_ignored("keep_not.md")
+
+    def test_comments_and_escapes(self):
+        matcher = IgnoreMatcher(["# comment", "", "\\!important.md", "\\#tag.md"])
+
+        assert matcher.is_ignored("!important.md")
+        assert matcher.is_ignored("#tag.md")
+        assert not matcher.is_ignored("# comment")
+
+    def test_is_tree_ignored(self):
+        matcher = IgnoreMatcher(["drafts/**", "**/private/**", "dir/*"])
+
+        assert matcher.is_tree_ignored("drafts")
+        assert matcher.is_tree_ignored("drafts/2020")
+        assert matcher.is_tree_ignored("blog/private")
+        assert not matcher.is_tree_ignored("dir")
+        assert not matcher.is_tree_ignored("blog")
+
+    def test_is_tree_ignored_with_negation(self):
+        matcher = IgnoreMatcher(["drafts/**", "!drafts/keep.md", "old/**"])
+
+        assert not matcher.is_tree_ignored("drafts")
+        assert matcher.is_tree_ignored("old")
+
+    def test_filter(self):
+        matcher = IgnoreMatcher(["dir/**"])
+
+        assert matcher.filter(["a.md", "dir/b.md", "c.md"]) == ["a.md", "c.md"]
+
+
+class TestAtomicWriteBytes:
+    def test_new_file(self, tmpdir):
+        filepath = tmpdir / "file.txt"
+
+        atomic_write_bytes(filepath, b"content")
+
+        assert filepath.read_binary() == b"content"
+        assert tmpdir.listdir() == [filepath]
+
+    def test_overwrite_keeps_mode(self, tmpdir):
+        filepath = tmpdir / "file.txt"
+        filepath.write_binary(b"old content")
+        filepath.chmod(0o640)
+
+        atomic_write_bytes(filepath, b"new content")
+
+        assert filepath.read_binary() == b"new content"
+        assert filepath.stat().mode & 0o777 == 0o640
+
+    def test_new_file_follows_umask(self, tmpdir, monkeypatch):
+        filepath = tmpdir / "file.txt"
+        monkeypatch.setattr(misc, "_umask", None)
+        umask = os.umask(0o027)
+        try:
+            atomic_write_bytes(filepath, b"content")
+
+            assert os.umask(0o027) == 0o027
+        finally:
+            os.umask(umask)
+
+        assert filepath.stat().mode & 0o777 == 0o640
+
+    def test_error_leaves_file_untouched(self, tmpdir):
+        filepath = tmpdir / "file.txt"
+        filepath.write_binary(b"content")
+
+        with pytest.raises(TypeError):
+            atomic_write_bytes(filepath, "not bytes")
+
+        assert filepath.read_binary() == b"content"
+        assert tmpdir.listdir() == [filepath]
+
+
+class TestAtomicWriteMany:
+    def test_write(self, tmpdir):
+        old_filepath = tmpdir / "old.txt"
+        old_filepath.write_binary(b"old content")
+        new_filepath = tmpdir / "new.txt"
+
+        atomic_write_many({old_filepath: b"content 1", new_filepath: b"content 2"})
+
+        assert old_filepath.read_binary() == b"content 1"
+        assert new_filepath.read_binary() == b"content 2"
+        assert sorted(tmpdir.listdir()) == [new_filepath, old_filepath]
+
+    def test_error_restores_files(self, tmpdir):
+        old_filepath = tmpdir / "old.txt"
+        old_filepath.write_binary(b"old content")
+        old_filepath.chmod(0o640)
+        new_filepath = tmpdir / "new.txt"
+        dirpath = tmpdir.mkdir("dir")
+
+        with pytest.raises(IsADirectoryError):
+            atomic_write_many(
+                {old_filepath: b"content", new_filepath: b"content", dirpath: b"content"}
+            )
+
+        assert old_filepath.read_binary() == b"old content"
+        assert old_filepath.stat().mode & 0o777 == 0o640
+        assert sorted(tmpdir.listdir()) == [dirpath, old_filepath]
+
+
+class TestFindFrontmatter:
+    def test_yaml(self):
+        text = "\n---\ntitle: Test\n---\nContent\n---\n"
+
+        block = find_frontmatter(text)
+
+        assert text[block.start : block.end] == "---\ntitle: Test\n---"
+        assert text[block.metadata_start : block.metadata_end] == "\ntitle: Test\n"
+
+    def test_toml(self):
+        text = '+++\ntitle = "Test"\n+++\nContent'
+
+        block = find_frontmatter(text)
+
+        assert text[block.start : block.end] == '+++\ntitle = "Test"\n+++'
+
+    def test_json(self):
+        text = '{\n"title": "Test"\n}\nContent'
+
+        block = find_frontmatter(text)
+
+        assert text[block.start : block.end] == '{\n"title": "Test"\n}'
+
+    def test_no_frontmatter(self):
+        assert find_frontmatter("# Content") is None
+        assert find_frontmatter("---\ntitle: Test\n") is None
+
+
+class TestScanFrontmatter:
+    TEXTS = [
+        "---\ntitle: Test\n---\nContent\n---\n",
+        "\n \n  ---\ntitle: Test\n---   \n\nContent",
+        "---\r\ntitle: Test\r\n---\r\nContent\r\n",
+        "---\rtitle: Test\r---\rContent",
+        '+++\ntitle = "Test"\n+++\nContent',
+        '{\n"title": "Test"\n}\nContent',
+        '{\r\n"title": "Test"\r\n}\r\nContent',
+        "---\ntitle: Test\n----\n\n",
+        "---\ntitle: |\n  ---\n---\nContent\n--- x",
+        "---\n\t\ntitle: Test\n---\nContent",
+        "---\r\n \r\n\r\ntitle: Test\r\n---\r\nContent",
+        '+++\n\t\n\ntitle = "Test"\n+++\nContent',
+        "---\ntitle: Test\n",
+        "---\n",
+        "# Content\n---\n",
+        "  ",
+        "",
+    ]
+
+    @pytest.mark.parametrize("text", TEXTS)
+    @pytest.mark.parametrize("chunk_size", [1, 4, 4096])
+    def test_same_as_parse_frontmatter(self, text, chunk_size, monkeypatch):
+        monkeypatch.setattr(
+            "src.utils.frontmatter_blocks.scan_frontmatter.__defaults__", (chunk_size,)
+        )
+        translated_text = text.replace("\r\n", "\n").replace("\r", "\n")
+
+        assert parse_frontmatter_bytes(text.encode("utf-8")) == parse_frontmatter(
+            translated_text
+        )
+
+    def test_body_offset(self):
+        data = "---\ntitle: é\n---\nContent".encode("utf-8")
+
+        split = scan_frontmatter(io.BytesIO(data), chunk_size=2)
+
+        assert split.metadata_text == "\ntitle: é\n"
+        assert data[split.body_offset :] == b"\nContent"
+
+    def test_stops_at_the_closing_delimiter(self):
+        file = io.BytesIO(b"---\ntitle: Test\n---\n" + b"x" * 1_000_000)
+
+        assert scan_frontmatter(file, chunk_size=16) is not None
+        assert file.tell() <= 32
+
+    def test_no_frontmatter_reads_the_first_line(self):
+        file = io.BytesIO(b"data:" * 1_000_000)
+
+        assert scan_frontmatter(file, chunk_size=16) is None
+        assert file.tell() == 16
+
+
+class TestSetMetadataEntry:
+    @pytest.mark.parametrize(
+        "text",
+        [
+            "---\ntitle: Test\nkey:\n  id: old\nz: 1\n---\nContent",
+            "---\ntitle: Test\n---\nContent",
+            "---\nkey: {id: old}\n---\nContent",
+            '+++\ntitle = "Test"\n[key]\nid = "old"\n\n[z]\na = 1\n+++\nContent',
+            '+++\ntitle = "Test"\n+++\nContent',
+            '{\n"title": "Test",\n"key": {"id": "old"}\n}\nContent',
+            "Content",
+        ],
+    )
+    def test_set_entry(self, text):
+        metadata, content = frontmatter.parse(text)
+
+        new_metadata, new_content = frontmatter.parse(
+            set_metadata_entry(text, "key", {"id": "new"})
+        )
+
+        assert new_metadata == dict(metadata, key={"id": "new"})
+        assert new_content == content
+
+    def test_only_the_entry_is_rewritten(self):
+        text = "---\n# Comment\nz: 1\na: [1, 2]\nkey:\n  id: old\n---\nContent"
+
+        assert set_metadata_entry(text, "key", {"id": "new"}) == (
+            "---\n# Comment\nz: 1\na: [1, 2]\nkey:\n  id: new\n---\nContent"
+        )
+
+
+    @pytest.mark.parametrize(
+        "text",
+        [
+            "---\r\ntitle: Test\r\nkey:\r\n  id: old\r\nz: 1\r\n---\r\nContent",
+            "---\r\ntitle: Test\r\n---\r\nContent",
+            '+++\r\ntitle = "Test"\r\n+++\r\nContent',
+        ],
+    )
+    def test_keeps_crlf_newlines(self, text):
+        new_text = set_metadata_entry(text, "key", {"id": "new"})
+
+        assert "\n" not in new_text.replace("\r\n", "")
+        assert frontmatter.parse(new_text)[0]["key"] == {"id": "new"}
+
+
+class TestFreezeNested:
+    def test_nested(self):
+        frozen = freeze_nested({"a": [1, {"b": [2]}], "c": {"d": "e"}})
+
+        assert frozen == {"a": (1, {"b": (2,)}), "c": {"d": "e"}}
+        with pytest.raises(TypeError):
+            frozen["c"]["d"] = "f"
+
+    def test_scalar(self):
+        assert freeze_nested(1) == 1
+
+
+class TestGetNestedValue:
+    def test_nested(self):
+        a = {1: {2: {3: 4}}, 5: 6}
+
+        assert get_nested_value(a, [1, 2, 3]) == 4
+        assert get_nested_value(a, [1, 2]) == {3: 4}
+        assert get_nested_value(a, []) == a
+
+    def test_missing(self):
+        a = {1: {2: 3}}
+
+        assert get_nested_value(a, [1, 4]) is None
+        assert get_nested_value(a, [1, 2, 3], "default") == "default"
+
+
+class TestParsers:
+    YAML = "title: Title\ndate: 2020-12-01 10:00:00+02:00\ntags: [a, b]\nn: ~\n"
+    TOML = 'title = "Title"\ndate = 2020-12-01T10:00:00+02:00\n[params]\nkey = 1.5\n'
+    JSON = '{"title": "Title", "big": 123456789012345678901234567890, "nan": NaN}'
+
+    def test_same_results(self):
+        assert FAST_PARSERS.load_yaml(self.YAML) == PURE_PARSERS.load_yaml(self.YAML)
+        assert FAST_PARSERS.load_toml(self.TOML) == PURE_PARSERS.load_toml(self.TOML)
+        assert str(FAST_PARSERS.load_json(self.JSON)) == str(
+            PURE_PARSERS.load_json(self.JSON)
+        )
+
+    @pytest.mark.parametrize(
+        "load_name, text",
+        [
+            ("load_yaml", "title: Test\nis_draft = true\n  - a"),
+            ("load_toml", "title: Test"),
+            ("load_json", '{"title" = "Test"}'),
+        ],
+    )
+    def test_same_errors(self, load_name, text):
+        with pytest.raises(Exception) as pure_error:
+            getattr(PURE_PARSERS, load_name)(text)
+        with pytest.raises(Exception) as fast_error:
+            getattr(FAST_PARSERS, load_name)(text)
+
+        assert type(fast_error.value) is type(pure_error.value)
+        assert str(fast_error.value) == str(pure_error.value)
+
+    @pytest.mark.skipif(
+        FAST_PARSERS.load_toml is PURE_PARSERS.load_toml, reason="No tomllib"
+    )
+    def test_toml_1_0_documents(self):
+        # tomllib follows TOML 1.0, toml only TOML 0.5
+        text = 'a = [1, "x"]'
+
+        assert FAST_PARSERS.load_toml(text) == {"a": [1, "x"]}
+        with pytest.raises(toml.TomlDecodeError):
+            PURE_PARSERS.load_toml(text)
+
+    def test_parse_frontmatter(self):
+        for text in [
+            "---\ntitle: Title\n---\n\nContent\n",
+            '{\n"title": "Title"\n}\n\nContent\n',
+            '+++\ntitle = "Title"\n+++\n\nContent\n',
+            "No frontmatter\n",
+            "---\n- a\n---\nContent",
+            "---\n\t\ntitle: Title\n---\nContent",
+        ]:
+            assert parse_frontmatter(text, FAST_PARSERS) == frontmatter.parse(text)
+            assert parse_frontmatter(text, PURE_PARSERS) == frontmatter.parse(text)
+
+    def test_get_parsers(self):
+        assert get_parsers("fast") is FAST_PARSERS
+        assert get_parsers("pure") is PURE_PARSERS
+
+        with pytest.raises(ValueError, match="Unknown parser backend 'c'."):
+            get_parsers("c")
+
+
+class TrustedModel(BaseModel):
+    class Config:
+        extra = "forbid"
+
+    id: UUID = Field(default_factory=uuid4)
+    filepath: Path
+    name: str
+    url: Optional[HttpUrl]
+    tags: FrozenSet[str]
+    values: FrozenSet[int] = frozenset()
+    nested: Optional["TrustedModel"] = None
+
+    _private: Optional[str] = PrivateAttr(default=None)
+
+
+TrustedModel.update_forward_refs()
+
+
+class TestTrustedModels:
+    VALUES = {
+        "id": "2d3dc4b4-0e5b-4c4f-8f51-a8c8d6a7a8f5",
+        "filepath": Path("post.md"),
+        "name": "Name",
+        "tags": ["a", "b"],
+        "nested": {
+            "id": UUID("76f3d4c2-52cd-4b5e-9f0e-1c4b0c7d6b6a"),
+            "filepath": Path("nested.md"),
+            "name": "Nested",
+            "tags": set(),
+        },
+    }
+
+    def test_construct_trusted(self):
+        model = construct_trusted(TrustedModel, self.VALUES)
+        expected_model = TrustedModel(**self.VALUES)
+
+        assert model == expected_model
+        assert model.__fields_set__ == expected_model.__fields_set__
+        assert model.nested.__fields_set__ == expected_model.nested.__fields_set__
+        assert isinstance(model.id, UUID)
+        assert model._private is None
+
+    def test_validate_values(self):
+        values = dict(self.VALUES, url="https://example.com")
+        model = construct_trusted(TrustedModel, values)
+        expected_model = TrustedModel(**values)
+
+        # URLs are only built by the validation
+        assert not is_exact(TrustedModel, model.__dict__)
+        values, error = validate_values(TrustedModel, model.__dict__)
+
+        assert error is None
+        assert values == expected_model.__dict__
+        assert isinstance(values["url"], HttpUrl)
+
+    def test_validate_exact_values(self):
+        values = TrustedModel(**self.VALUES).__dict__
+
+        assert is_exact(TrustedModel, values)
+        assert is_exact(TrustedModel, construct_trusted(TrustedModel, values).__dict__)
+        assert validate_values(TrustedModel, values) == (values, None)
+        assert not is_exact(TrustedModel, dict(values, name=1))
+        assert not is_exact(TrustedModel, dict(values, url="https://example.com"))
+
+    def test_validate_invalid_values(self):
+        model = construct_trusted(
+            TrustedModel, dict(self.VALUES, id="invalid", name=["a"], extra=1)
+        )
+
+        _, error = validate_values(TrustedModel, model.__dict__)
+
+        assert {error["loc"][0] for error in error.errors()} == {"id", "name", "extra"}
+
+    def test_validate_invalid_nested_values(self):
+        nested_values = dict(self.VALUES["nested"], id="invalid", extra=1)
+        model = construct_trusted(TrustedModel, dict(self.VALUES, nested=nested_values))
+
+        _, error = validate_values(TrustedModel, model.__dict__)
+
+        assert {error["loc"] for error in error.errors()} == {
+            ("nested", "id"),
+            ("nested", "extra"),
+        }
+
+    def test_validate_nested_values(self):
+        nested_values = dict(self.VALUES["nested"], url="https://example.com")
+        model = construct_trusted(TrustedModel, dict(self.VALUES, nested=nested_values))
+
+        values, error = validate_values(TrustedModel, model.__dict__)
+
+        assert error is None
+        assert isinstance(values["nested"].url, HttpUrl)
+        assert values["nested"].__fields_set__ == model.nested.__fields_set__
@@ -0,0 +1,171 @@
+import pytest
+from path import Path
+
+from src.config_loaders import HugoConfigLoader
+from src.post_codecs import HugoPostCodec, PostDecodeError
+from src.watcher import PostWatcher
+
+POST = """---
+title: {title}
+is_draft: false
+tags: []
+categories: []
+---
+Content
+"""
+
+
+def drain(watcher):
+    events = []
+    while (event := watcher.poll(timeout=0.5)) is not None:
+        events.append(event)
+
+    return events
+
+
+@pytest.fixture
+def workdir(tmpdir):
+    workdir = Path(tmpdir)
+    (workdir / "content/posts").makedirs()
+    (workdir / "content/posts/a.md").write_text(POST.format(title="A"))
+    (workdir / "content/posts/b.md").write_text(POST.format(title="B"))
+    (workdir / "config/_default").makedirs()
+    (workdir / "config/_default/config.toml").write_text('title = "Title"')
+
+    return workdir
+
+
+@pytest.fixture(params=["inotify", "polling"])
+def watcher(request, workdir):
+    codec = HugoPostCodec(workdir / "content", ignore_globs=["drafts/**"])
+    config_loader = HugoConfigLoader(workdir)
+    watcher = PostWatcher(
+        codec, config_loader, debounce=0.02, backend=request.param, poll_interval=0.01
+    )
+    watcher.load()
+
+    yield watcher
+
+    watcher.close()
+
+
+class TestPostWatcher:
+    def test_load(self, watcher, workdir):
+        assert sorted(watcher.posts) == [
+            workdir / "content/posts/a.md",
+            workdir / "content/posts/b.md",
+        ]
+        assert watcher.config == {"title": "Title"}
+
+    def test_modified_post(self, watcher, workdir):
+        filepath = workdir / "content/posts/a.md"
+        filepath.write_text(POST.format(title="New A"))
+
+        event = watcher.poll(timeout=5)
+
+        assert [post.title for post in event.changed] == ["New A"]
+        assert watcher.posts[filepath].title == "New A"
+        assert event.config is None
+
+    def test_burst_of_saves(self, watcher, workdir):
+        filepath = workdir / "content/posts/a.md"
+        for i in range(5):
+            filepath.write_text(POST.format(title="A" * (i + 2)))
+
+        event = watcher.poll(timeout=5)
+
+        assert [post.title for post in event.changed] == ["AAAAAA"]
+
+    def test_atomic_save(self, watcher, workdir):
+        tmp_filepath = workdir / "content/posts/.a.md.tmp"
+        tmp_filepath.write_text(POST.format(title="New A"))
+        tmp_filepath.rename(workdir / "content/posts/a.md")
+
+        event = watcher.poll(timeout=5)
+
+        assert [post.filepath for post in event.changed] == [
+            workdir / "content/posts/a.md"
+        ]
+
+    def test_added_and_removed_posts(self, watcher, workdir):
+        (workdir / "content/posts/b.md").remove()
+        (workdir / "content/new").mkdir()
+        (workdir / "content/new/c.md").write_text(POST.format(title="C"))
+
+        events = drain(watcher)
+
+        assert [path for event in events for path in event.removed] == [
+            workdir / "content/posts/b.md"
+        ]
+        assert workdir / "content/posts/b.md" not in watcher.posts
+        assert watcher.posts[workdir / "content/new/c.md"].title == "C"
+
+    def test_removed_directory(self, watcher, workdir):
+        (workdir / "content/posts").rmtree()
+
+        events = drain(watcher)
+
+        assert sorted(path for event in events for path in event.removed) == [
+            workdir / "content/posts/a.md",
+            workdir / "content/posts/b.md",
+        ]
+        assert watcher.posts == {}
+
+    def test_ignored_files(self, watcher, workdir):
+        (workdir / "content/drafts").mkdir()
+        (workdir / "content/drafts/draft.md").write_text(POST.format(title="Draft"))
+        (workdir / "content/posts/.hidden.md").write_text(POST.format(title="Hidden"))
+        (workdir / "content/posts/image.png").write_bytes(b"")
+
+        assert watcher.poll(timeout=0.3) is None
+
+    def test_invalid_post(self, watcher, workdir):
+        filepath = workdir / "content/posts/a.md"
+        filepath.write_text("No frontmatter")
+
+        event = watcher.poll(timeout=5)
+
+        assert isinstance(event.errors[filepath], PostDecodeError)
+        assert filepath not in watcher.posts
+
+    @pytest.mark.parametrize(
+        "text",
+        [
+            POST.format(title="A").replace("is_draft: false", "is_draft: tru"),
+            "---\ntitle: [A\n---\nContent",
+        ],
+    )
+    def test_half_saved_post(self, watcher, workdir, text):
+        filepath = workdir / "content/posts/a.md"
+        filepath.write_text(text)
+
+        event = watcher.poll(timeout=5)
+
+        assert list(event.errors) == [filepath]
+        assert filepath not in watcher.posts
+
+        filepath.write_text(POST.format(title="A2"))
+
+        assert [post.title for post in watcher.poll(timeout=5).changed] == ["A2"]
+
+    def test_load_invalid_post(self, watcher, workdir):
+        filepath = workdir / "content/posts/a.md"
+        filepath.write_text(POST.format(title="[A]"))
+
+        event = watcher.load()
+
+        assert list(event.errors) == [filepath]
+        assert sorted(watcher.posts) == [workdir / "content/posts/b.md"]
+
+    def test_config(self, watcher, workdir):
+        (workdir / "config/_default/params.toml").write_text('key = "value"')
+
+        event = watcher.poll(timeout=5)
+
+        assert event.config == {"title": "Title", "params": {"key": "value"}}
+        assert watcher.config == event.config
+        assert event.changed == []
+
+    def test_unknown_backend(self, workdir):
+        with pytest.raises(ValueError, match="Unknown watch backend 'fsevents'."):
+            PostWatcher(HugoPostCodec(workdir / "content"), backend="fsevents")